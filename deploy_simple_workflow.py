@@ -9,6 +9,8 @@ import requests
 import os
 from dotenv import load_dotenv
 
+from tools.rate_limiter import get_rate_limiter
+
 # Load environment variables
 load_dotenv('config/.env')
 
@@ -39,15 +41,19 @@ def deploy_workflow():
         if field in workflow:
             del workflow[field]
 
+    # Share the client-side rate limit with the other n8n tools
+    limiter = get_rate_limiter()
+
     # Create the workflow
     print(f"📤 Deploying simplified workflow to {n8n_url}...")
 
     try:
-        response = requests.post(
-            f"{n8n_url}/api/v1/workflows",
-            headers=headers,
-            json=workflow
-        )
+        with limiter.slot():
+            response = requests.post(
+                f"{n8n_url}/api/v1/workflows",
+                headers=headers,
+                json=workflow
+            )
 
         if response.status_code in [200, 201]:
             result = response.json()
@@ -60,21 +66,23 @@ def deploy_workflow():
             print("\n🔄 Attempting to activate workflow...")
 
             # Get the current workflow data
-            get_response = requests.get(
-                f"{n8n_url}/api/v1/workflows/{workflow_id}",
-                headers=headers
-            )
+            with limiter.slot():
+                get_response = requests.get(
+                    f"{n8n_url}/api/v1/workflows/{workflow_id}",
+                    headers=headers
+                )
 
             if get_response.status_code == 200:
                 workflow_data = get_response.json()
                 workflow_data['active'] = True
 
                 # Update workflow with active=true
-                activate_response = requests.put(
-                    f"{n8n_url}/api/v1/workflows/{workflow_id}",
-                    headers=headers,
-                    json=workflow_data
-                )
+                with limiter.slot():
+                    activate_response = requests.put(
+                        f"{n8n_url}/api/v1/workflows/{workflow_id}",
+                        headers=headers,
+                        json=workflow_data
+                    )
 
                 if activate_response.status_code == 200:
                     print("✅ Workflow activated successfully!")
@@ -8,6 +8,8 @@ import requests
 import os
 from dotenv import load_dotenv
 
+from tools.rate_limiter import get_rate_limiter
+
 # Load environment variables
 load_dotenv('config/.env')
 
@@ -49,15 +51,19 @@ def deploy_workflow():
             valid_settings['saveManualExecutions'] = workflow['settings']['saveManualExecutions']
         workflow['settings'] = valid_settings
 
+    # Share the client-side rate limit with the other n8n tools
+    limiter = get_rate_limiter()
+
     # Create the workflow
     print(f"📤 Deploying workflow to {n8n_url}...")
 
     try:
-        response = requests.post(
-            f"{n8n_url}/api/v1/workflows",
-            headers=headers,
-            json=workflow
-        )
+        with limiter.slot():
+            response = requests.post(
+                f"{n8n_url}/api/v1/workflows",
+                headers=headers,
+                json=workflow
+            )
 
         if response.status_code == 200 or response.status_code == 201:
             result = response.json()
@@ -68,11 +74,12 @@ def deploy_workflow():
 
             # Activate the workflow
             print("\n🔄 Activating workflow...")
-            activate_response = requests.patch(
-                f"{n8n_url}/api/v1/workflows/{workflow_id}",
-                headers=headers,
-                json={"active": True}
-            )
+            with limiter.slot():
+                activate_response = requests.patch(
+                    f"{n8n_url}/api/v1/workflows/{workflow_id}",
+                    headers=headers,
+                    json={"active": True}
+                )
 
             if activate_response.status_code == 200:
                 print("✅ Workflow activated!")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+n8n Analysis Cache
+工作流分析结果的磁盘缓存
+
+结果以 JSON 文件保存在缓存目录下，文件名为键的哈希：键由工作流内容的规范哈希
+(workflow_model.canonical_hash)、分析器版本和分析设置 (耗时模型、环报告上限等)
+组成，因此内容未变的工作流直接读取上次的结果，分析器或设置变化后自动失效。
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value: Any) -> Any:
+    """集合保存为排序后的列表，其余无法序列化的值保存为字符串"""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+
+class AnalysisCache:
+    """
+    按内容哈希缓存分析结果 (目录中每个结果一个 JSON 文件)
+
+    多个进程可以共享同一个目录：写入先写临时文件再原子替换。
+    """
+
+    def __init__(self, cache_dir: str):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录 (不存在时在首次写入时创建)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+
+    @staticmethod
+    def make_key(content_hash: str, version: str, settings: Dict[str, Any]) -> str:
+        """
+        生成缓存键
+
+        Args:
+            content_hash: 工作流内容的规范哈希
+            version: 分析器版本
+            settings: 影响结果的分析设置 (可 JSON 序列化)
+
+        Returns:
+            十六进制键
+        """
+        material = json.dumps({"workflow": content_hash, "version": version, "settings": settings},
+                              sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        # 按键的前两位分子目录，避免单个目录下文件过多
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存的结果
+
+        Args:
+            key: make_key() 生成的键
+
+        Returns:
+            分析结果，未命中或文件损坏时返回 None
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                results = json.load(f)
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return None
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable analysis cache entry {path}: {e}")
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return results
+
+    def put(self, key: str, results: Dict[str, Any]):
+        """
+        写入分析结果 (失败时只记录日志)
+
+        Args:
+            key: make_key() 生成的键
+            results: 分析结果
+        """
+        path = self._path(key)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, separators=(',', ':'), ensure_ascii=False, default=_json_default)
+            os.replace(tmp_path, path)
+            self.stats["writes"] += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to write analysis cache entry {path}: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+    def clear(self) -> int:
+        """
+        清空缓存目录中的所有结果
+
+        Returns:
+            删除的文件数
+        """
+        removed = 0
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob('*/*.json'):
+                path.unlink()
+                removed += 1
+        logger.info(f"Cleared analysis cache ({removed} entries)")
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取命中统计
+
+        Returns:
+            命中/未命中/写入次数和命中率
+        """
+        stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0
+        return stats
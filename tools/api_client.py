@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+n8n API Client
+n8n API 连接层：配置加载、连接池会话、重试策略
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import os
+import re
+import time
+import random
+import logging
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+import yaml
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# 默认配置文件路径
+DEFAULT_CONFIG_PATH = Path(__file__).parent.parent / 'config' / 'agent_config.yaml'
+
+# ${VAR} / ${VAR:default} 占位符
+_ENV_PATTERN = re.compile(r'\$\{([A-Za-z_][A-Za-z0-9_]*)(?::([^}]*))?\}')
+
+_config_cache: Dict[str, Dict[str, Any]] = {}
+
+
+def load_agent_config(config_path: str = None) -> Dict[str, Any]:
+    """
+    加载agent_config.yaml并展开环境变量占位符
+
+    Args:
+        config_path: 配置文件路径 (默认读取 N8N_AGENT_CONFIG 或 config/agent_config.yaml)
+
+    Returns:
+        配置字典，文件不存在时返回空字典
+    """
+    path = Path(config_path or os.getenv('N8N_AGENT_CONFIG', DEFAULT_CONFIG_PATH))
+    key = str(path.resolve())
+
+    if key in _config_cache:
+        return _config_cache[key]
+
+    if not path.exists():
+        logger.debug(f"Config file not found: {path}")
+        return {}
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = _expand_env(yaml.safe_load(f) or {})
+    except Exception as e:
+        logger.error(f"Failed to load config {path}: {e}")
+        config = {}
+
+    _config_cache[key] = config
+    return config
+
+
+def _expand_env(value: Any) -> Any:
+    """递归展开配置中的环境变量占位符"""
+    if isinstance(value, dict):
+        return {k: _expand_env(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_expand_env(v) for v in value]
+    if not isinstance(value, str) or '${' not in value:
+        return value
+
+    expanded = _ENV_PATTERN.sub(
+        lambda m: os.getenv(m.group(1), m.group(2) if m.group(2) is not None else ''),
+        value
+    )
+
+    # 整个值就是一个占位符时，按YAML标量解析类型 (true / 100 / ...)
+    if _ENV_PATTERN.fullmatch(value):
+        if expanded == '':
+            return None
+        try:
+            parsed = yaml.safe_load(expanded)
+            if isinstance(parsed, (bool, int, float, str)):
+                return parsed
+        except yaml.YAMLError:
+            pass
+    return expanded
+
+
+def get_config_value(config: Dict[str, Any], dotted_key: str, default: Any = None) -> Any:
+    """
+    按点号路径读取配置值
+
+    Args:
+        config: 配置字典
+        dotted_key: 键路径，如 'n8n.retry.max_attempts'
+        default: 缺省值
+
+    Returns:
+        配置值
+    """
+    value = config
+    for key in dotted_key.split('.'):
+        if not isinstance(value, dict) or value.get(key) is None:
+            return default
+        value = value[key]
+    return value
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """带连接复用统计的HTTP适配器"""
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        汇总每个主机连接池的使用情况
+
+        Returns:
+            {host: {"connections": 新建连接数, "requests": 请求数, "reused": 复用次数}}
+        """
+        stats = {}
+        pools = self.poolmanager.pools
+        for pool_key in pools.keys():
+            pool = pools.get(pool_key)
+            if pool is None:
+                continue
+            host = f"{pool.scheme}://{pool.host}:{pool.port}"
+            entry = stats.setdefault(host, {"connections": 0, "requests": 0, "reused": 0})
+            entry["connections"] += pool.num_connections
+            entry["requests"] += pool.num_requests
+            entry["reused"] += max(pool.num_requests - pool.num_connections, 0)
+        return stats
+
+
+def get_timeout(config: Dict[str, Any]) -> Tuple[float, float]:
+    """
+    根据配置计算 (连接超时, 读取超时)，单位秒
+
+    n8n.timeout 以毫秒配置；n8n.pool.connect_timeout 可单独指定连接超时。
+    """
+    read_timeout = float(get_config_value(config, 'n8n.timeout', 30000)) / 1000
+    connect_timeout = float(get_config_value(config, 'n8n.pool.connect_timeout', 5000)) / 1000
+    return (min(connect_timeout, read_timeout), read_timeout)
+
+
+def create_session(config: Dict[str, Any] = None,
+                   headers: Dict[str, str] = None) -> Tuple[requests.Session, PooledHTTPAdapter]:
+    """
+    创建共享连接池的HTTP会话
+
+    Args:
+        config: agent配置 (读取 n8n.pool.*)
+        headers: 默认请求头
+
+    Returns:
+        (会话, 适配器)
+    """
+    config = config or {}
+    adapter = PooledHTTPAdapter(
+        pool_connections=int(get_config_value(config, 'n8n.pool.connections', 10)),
+        pool_maxsize=int(get_config_value(config, 'n8n.pool.maxsize', 10)),
+        pool_block=bool(get_config_value(config, 'n8n.pool.block', False))
+    )
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    if headers:
+        session.headers.update(headers)
+
+    if get_config_value(config, 'n8n.pool.keep_alive', True):
+        session.headers['Connection'] = 'keep-alive'
+    else:
+        session.headers['Connection'] = 'close'
+
+    return session, adapter
+
+
+class RetryPolicy:
+    """
+    API请求重试策略
+
+    从 n8n.retry 读取配置：
+        enabled: 是否启用
+        max_attempts: 最大尝试次数 (含首次)
+        delay: 初始等待时间 (毫秒)
+        backoff: exponential | linear | fixed
+        max_delay: 单次等待上限 (毫秒)
+        jitter: 是否添加随机抖动
+        retry_on: 触发重试的HTTP状态码
+        retry_post: POST等非幂等请求是否默认重试
+    """
+
+    IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'PATCH', 'DELETE'}
+    DEFAULT_RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+    def __init__(self, config: Dict[str, Any] = None):
+        """
+        初始化重试策略
+
+        Args:
+            config: agent配置
+        """
+        config = config or {}
+        self.enabled = bool(get_config_value(config, 'n8n.retry.enabled', True))
+        self.max_attempts = max(int(get_config_value(config, 'n8n.retry.max_attempts', 3)), 1)
+        self.delay = float(get_config_value(config, 'n8n.retry.delay', 1000)) / 1000
+        self.backoff = get_config_value(config, 'n8n.retry.backoff', 'exponential')
+        self.max_delay = float(get_config_value(config, 'n8n.retry.max_delay', 30000)) / 1000
+        self.jitter = bool(get_config_value(config, 'n8n.retry.jitter', True))
+        self.retry_statuses = set(get_config_value(config, 'n8n.retry.retry_on',
+                                                   self.DEFAULT_RETRY_STATUSES))
+        self.retry_post = bool(get_config_value(config, 'n8n.retry.retry_post', False))
+
+    def allows(self, method: str, retry_unsafe: bool = None) -> bool:
+        """
+        判断请求方法是否允许重试
+
+        Args:
+            method: HTTP方法
+            retry_unsafe: 是否显式允许重试非幂等请求 (None 表示使用配置)
+
+        Returns:
+            是否允许重试
+        """
+        if not self.enabled or self.max_attempts <= 1:
+            return False
+        if method.upper() in self.IDEMPOTENT_METHODS:
+            return True
+        return self.retry_post if retry_unsafe is None else retry_unsafe
+
+    def should_retry(self, status_code: int) -> bool:
+        """判断状态码是否需要重试"""
+        return status_code in self.retry_statuses
+
+    def get_delay(self, attempt: int, response: requests.Response = None) -> float:
+        """
+        计算第 attempt 次重试前的等待时间 (秒)
+
+        优先使用响应中的 Retry-After；否则按退避策略计算并添加抖动。
+
+        Args:
+            attempt: 已失败的次数 (从1开始)
+            response: 上一次的响应
+
+        Returns:
+            等待秒数
+        """
+        retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+
+        if self.backoff == 'exponential':
+            delay = self.delay * (2 ** (attempt - 1))
+        elif self.backoff == 'linear':
+            delay = self.delay * attempt
+        else:
+            delay = self.delay
+        delay = min(delay, self.max_delay)
+
+        if self.jitter:
+            # equal jitter: 在 [delay/2, delay] 之间随机，保留一半的退避时间，同时避免批量任务同时重试
+            delay = random.uniform(delay / 2, delay)
+        return delay
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """
+    解析n8n返回的ISO时间戳 (如 2024-01-01T00:00:00.000Z)
+
+    Args:
+        value: ISO字符串或datetime
+
+    Returns:
+        带时区的datetime，无法解析时返回 None
+    """
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    else:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def parse_retry_after(value: str) -> Any:
+    """
+    解析 Retry-After 响应头
+
+    Args:
+        value: 秒数或HTTP日期
+
+    Returns:
+        等待秒数，无法解析时返回 None
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def request_with_retry(session: requests.Session, method: str, url: str,
+                       policy: RetryPolicy, retry_unsafe: bool = None,
+                       sleep=time.sleep, limiter=None, **kwargs) -> requests.Response:
+    """
+    按重试策略发送请求
+
+    可重试的状态码和连接错误会按退避策略重试；响应对象上的
+    ``retries`` 属性记录本次调用实际重试的次数。指定 limiter 时每次尝试
+    都占用一个并发槽位和一个令牌，429 响应会让共享该限速器的调用方一起退避。
+
+    Args:
+        session: HTTP会话
+        method: HTTP方法
+        url: 请求URL
+        policy: 重试策略
+        retry_unsafe: 是否重试非幂等请求
+        sleep: 等待函数
+        limiter: 流量控制器 (RateLimiter)
+        **kwargs: 传递给 requests 的参数
+
+    Returns:
+        HTTP响应
+    """
+    attempts = policy.max_attempts if policy.allows(method, retry_unsafe) else 1
+    retries = 0
+
+    while True:
+        try:
+            with limiter.slot(sleep) if limiter else nullcontext():
+                response = session.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if retries + 1 >= attempts:
+                raise
+            retries += 1
+            delay = policy.get_delay(retries)
+            logger.warning(f"⚠️ {method} {url} failed ({e.__class__.__name__}), "
+                           f"retry {retries}/{attempts - 1} in {delay:.2f}s")
+            sleep(delay)
+            continue
+
+        if policy.should_retry(response.status_code) and retries + 1 < attempts:
+            retries += 1
+            delay = policy.get_delay(retries, response)
+            if limiter and response.status_code == 429:
+                limiter.pause(delay)
+            logger.warning(f"⚠️ {method} {url} returned {response.status_code}, "
+                           f"retry {retries}/{attempts - 1} in {delay:.2f}s")
+            response.close()
+            sleep(delay)
+            continue
+
+        response.retries = retries
+        return response
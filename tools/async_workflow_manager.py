@@ -0,0 +1,668 @@
+#!/usr/bin/env python3
+"""
+n8n Async Workflow Manager
+基于aiohttp的并发工作流管理工具
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import json
+import os
+import asyncio
+import argparse
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple, Iterable, AsyncIterator
+from pathlib import Path
+import logging
+
+import aiohttp
+
+try:
+    from tools.api_client import load_agent_config, get_config_value, get_timeout, RetryPolicy
+    from tools.n8n_workflow_manager import apply_workflow_changes, diff_workflows
+    from tools.rate_limiter import get_rate_limiter
+except ModuleNotFoundError:  # 作为脚本直接运行
+    from api_client import load_agent_config, get_config_value, get_timeout, RetryPolicy
+    from n8n_workflow_manager import apply_workflow_changes, diff_workflows
+    from rate_limiter import get_rate_limiter
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class AsyncN8nWorkflowManager:
+    """异步n8n工作流管理器"""
+
+    def __init__(self, base_url: str = None, api_key: str = None,
+                 config: Dict[str, Any] = None, max_concurrent: int = None):
+        """
+        初始化异步工作流管理器
+
+        Args:
+            base_url: n8n实例URL (默认从环境变量读取)
+            api_key: API密钥 (默认从环境变量读取)
+            config: agent配置 (默认读取 config/agent_config.yaml)
+            max_concurrent: 最大并发请求数 (默认 advanced.max_concurrent)
+        """
+        self.config = config if config is not None else load_agent_config()
+        self.base_url = base_url or os.getenv('N8N_BASE_URL', 'http://localhost:5678')
+        self.api_key = api_key or os.getenv('N8N_API_KEY', '')
+
+        self.headers = {
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        }
+
+        if self.api_key:
+            self.headers['Authorization'] = f'Bearer {self.api_key}'
+
+        self.api_url = f"{self.base_url}/api/v1"
+
+        self.max_concurrent = max_concurrent or int(
+            get_config_value(self.config, 'advanced.max_concurrent', 5)
+        )
+        self.page_size = int(get_config_value(self.config, 'n8n.page_size', 100))
+        self.retry_policy = RetryPolicy(self.config)
+        self.retry_stats = {"requests": 0, "retried_requests": 0, "retries": 0}
+        # 与同步管理器共享令牌桶；并发由下面的 asyncio 信号量控制
+        self.rate_limiter = get_rate_limiter(self.config)
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def open(self):
+        """创建共享的ClientSession和并发信号量"""
+        if self._session and not self._session.closed:
+            return
+
+        connect_timeout, read_timeout = get_timeout(self.config)
+        connector = aiohttp.TCPConnector(
+            limit=int(get_config_value(self.config, 'n8n.pool.maxsize', 10)),
+            limit_per_host=int(get_config_value(self.config, 'n8n.pool.maxsize', 10)),
+            force_close=not get_config_value(self.config, 'n8n.pool.keep_alive', True)
+        )
+        self._session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+    async def close(self):
+        """关闭会话"""
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    async def _request(self, method: str, path: str, retry_unsafe: bool = None,
+                       **kwargs) -> Tuple[int, Any]:
+        """
+        在并发限制和共享限速内发送API请求，按 n8n.retry 策略重试
+
+        Args:
+            method: HTTP方法
+            path: API路径 (相对于 /api/v1)
+            retry_unsafe: 是否允许重试非幂等请求
+            **kwargs: 传递给 aiohttp 的参数
+
+        Returns:
+            (状态码, 响应内容)，响应内容为JSON或文本
+        """
+        await self.open()
+        policy = self.retry_policy
+        attempts = policy.max_attempts if policy.allows(method, retry_unsafe) else 1
+        url = f"{self.api_url}{path}"
+        retries = 0
+        self.retry_stats["requests"] += 1
+
+        while True:
+            delay = None
+            async with self._semaphore:
+                await self.rate_limiter.acquire_async()
+                try:
+                    async with self._session.request(method, url, **kwargs) as response:
+                        if policy.should_retry(response.status) and retries + 1 < attempts:
+                            delay = policy.get_delay(retries + 1, response)
+                            if response.status == 429:
+                                await self.rate_limiter.pause_async(delay)
+                            logger.warning(f"⚠️ {method} {url} returned {response.status}, "
+                                           f"retry {retries + 1}/{attempts - 1} in {delay:.2f}s")
+                        else:
+                            text = await response.text()
+                            try:
+                                body = json.loads(text) if text else {}
+                            except ValueError:
+                                body = text
+                            if retries:
+                                self.retry_stats["retried_requests"] += 1
+                                self.retry_stats["retries"] += retries
+                            return response.status, body
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    if retries + 1 >= attempts:
+                        raise
+                    delay = policy.get_delay(retries + 1)
+                    logger.warning(f"⚠️ {method} {url} failed ({e.__class__.__name__}), "
+                                   f"retry {retries + 1}/{attempts - 1} in {delay:.2f}s")
+
+            # 在信号量外等待，不占用并发名额
+            retries += 1
+            await asyncio.sleep(delay)
+
+    async def test_connection(self) -> bool:
+        """测试n8n连接"""
+        try:
+            status, _ = await self._request("GET", "/workflows", params={"limit": 1})
+            if status == 200:
+                logger.info("✅ Successfully connected to n8n")
+                return True
+            logger.error(f"❌ Connection failed: {status}")
+            return False
+        except Exception as e:
+            logger.error(f"❌ Connection error: {e}")
+            return False
+
+    async def get_workflow(self, workflow_id: str) -> Dict[str, Any]:
+        """
+        获取工作流
+
+        Args:
+            workflow_id: 工作流ID
+
+        Returns:
+            工作流对象
+        """
+        try:
+            status, body = await self._request("GET", f"/workflows/{workflow_id}")
+            if status == 200:
+                return body
+            logger.error(f"❌ Failed to get workflow {workflow_id}: {body}")
+            return {"error": body, "status_code": status}
+        except Exception as e:
+            logger.error(f"❌ Error getting workflow {workflow_id}: {e}")
+            return {"error": str(e)}
+
+    async def create_workflow(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        创建新工作流
+
+        Args:
+            config: 工作流配置
+
+        Returns:
+            创建的工作流信息
+        """
+        try:
+            workflow_data = {
+                "name": config.get("name", f"Workflow_{datetime.now().strftime('%Y%m%d_%H%M%S')}"),
+                "nodes": config.get("nodes", []),
+                "connections": config.get("connections", {}),
+                "active": config.get("active", False),
+                "settings": config.get("settings", {
+                    "executionOrder": "v1",
+                    "saveManualExecutions": True,
+                    "callerPolicy": "workflowsFromSameOwner"
+                }),
+                "staticData": config.get("staticData", None),
+                "tags": config.get("tags", [])
+            }
+
+            status, body = await self._request("POST", "/workflows", json=workflow_data)
+
+            if status in [200, 201]:
+                logger.info(f"✅ Workflow created successfully: {body.get('id')}")
+                return body
+            logger.error(f"❌ Failed to create workflow: {body}")
+            return {"error": body, "status_code": status}
+
+        except Exception as e:
+            logger.error(f"❌ Error creating workflow: {e}")
+            return {"error": str(e)}
+
+    async def deploy_workflow(self, workflow: Any) -> bool:
+        """
+        部署工作流（激活）
+
+        Args:
+            workflow: 工作流对象或ID
+
+        Returns:
+            是否成功激活
+        """
+        try:
+            workflow_id = workflow if isinstance(workflow, str) else workflow.get('id')
+            status, body = await self._request("PATCH", f"/workflows/{workflow_id}",
+                                               json={"active": True})
+            if status == 200:
+                logger.info(f"✅ Workflow {workflow_id} deployed successfully")
+                return True
+            logger.error(f"❌ Failed to deploy workflow: {body}")
+            return False
+
+        except Exception as e:
+            logger.error(f"❌ Error deploying workflow: {e}")
+            return False
+
+    async def update_workflow(self, workflow_id: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        更新工作流 (只发送有变化的字段，无变化时跳过)
+
+        Args:
+            workflow_id: 工作流ID
+            changes: 要更新的内容
+
+        Returns:
+            更新后的工作流
+        """
+        try:
+            workflow = await self.get_workflow(workflow_id)
+            if workflow.get('error'):
+                return {"error": f"Workflow not found: {workflow_id}"}
+
+            updated = apply_workflow_changes(workflow, changes)
+            diff = diff_workflows(workflow, updated)
+            if not diff["fields"]:
+                logger.info(f"Workflow {workflow_id} unchanged, skipping update")
+                return workflow
+
+            payload = {key: updated.get(key) for key in diff["fields"]}
+
+            status, body = await self._request("PATCH", f"/workflows/{workflow_id}", json=payload)
+
+            if status == 200:
+                logger.info(f"✅ Workflow {workflow_id} updated successfully")
+                return body
+            if status in [409, 412]:
+                logger.error(f"❌ Workflow {workflow_id} was modified concurrently: {body}")
+                return {"error": body, "conflict": True}
+            logger.error(f"❌ Failed to update workflow: {body}")
+            return {"error": body}
+
+        except Exception as e:
+            logger.error(f"❌ Error updating workflow: {e}")
+            return {"error": str(e)}
+
+    async def delete_workflow(self, workflow_id: str) -> bool:
+        """
+        删除工作流
+
+        Args:
+            workflow_id: 工作流ID
+
+        Returns:
+            是否成功删除
+        """
+        try:
+            status, body = await self._request("DELETE", f"/workflows/{workflow_id}")
+            if status in [200, 204]:
+                logger.info(f"✅ Workflow {workflow_id} deleted successfully")
+                return True
+            logger.error(f"❌ Failed to delete workflow: {body}")
+            return False
+
+        except Exception as e:
+            logger.error(f"❌ Error deleting workflow: {e}")
+            return False
+
+    async def iter_workflows(self, active_only: bool = False,
+                             page_size: int = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        逐个返回所有工作流（按 nextCursor 自动翻页）
+
+        Args:
+            active_only: 是否只返回激活的工作流
+            page_size: 每页数量 (默认 n8n.page_size)
+
+        Yields:
+            工作流对象
+        """
+        params = {"limit": min(page_size or self.page_size, 250)}
+        if active_only:
+            params["active"] = "true"
+
+        while True:
+            status, body = await self._request("GET", "/workflows", params=params)
+            if status != 200:
+                raise RuntimeError(f"{status} {body}")
+            for workflow in body.get('data', []):
+                if active_only and not workflow.get('active'):
+                    continue
+                yield workflow
+            if not body.get('nextCursor'):
+                return
+            params["cursor"] = body['nextCursor']
+
+    async def list_workflows(self, active_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        列出所有工作流
+
+        Args:
+            active_only: 是否只列出激活的工作流
+
+        Returns:
+            工作流列表
+        """
+        try:
+            workflows = [w async for w in self.iter_workflows(active_only)]
+            logger.info(f"Found {len(workflows)} workflows")
+            return workflows
+
+        except Exception as e:
+            logger.error(f"❌ Error listing workflows: {e}")
+            return []
+
+    async def execute_workflow(self, workflow_id: str, data: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        手动执行工作流
+
+        Args:
+            workflow_id: 工作流ID
+            data: 输入数据
+
+        Returns:
+            执行结果
+        """
+        try:
+            execution_data = {"workflowData": {"id": workflow_id}}
+            if data:
+                execution_data["data"] = data
+
+            status, body = await self._request("POST", f"/workflows/{workflow_id}/execute",
+                                               json=execution_data)
+            if status == 200:
+                logger.info(f"✅ Workflow executed successfully: {body.get('id')}")
+                return body
+            logger.error(f"❌ Failed to execute workflow: {body}")
+            return {"error": body}
+
+        except Exception as e:
+            logger.error(f"❌ Error executing workflow: {e}")
+            return {"error": str(e)}
+
+    async def iter_executions(self, workflow_id: str = None, status: str = None,
+                              include_data: bool = False,
+                              page_size: int = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        逐个返回执行记录（按 nextCursor 自动翻页，按时间倒序）
+
+        Args:
+            workflow_id: 工作流ID (为空时返回所有工作流的执行)
+            status: 执行状态过滤 (success, error, waiting)
+            include_data: 是否包含执行数据
+            page_size: 每页数量 (默认 n8n.page_size)
+
+        Yields:
+            执行记录
+
+        Raises:
+            RuntimeError: 接口返回非200状态码
+        """
+        params = {"limit": min(page_size or self.page_size, 250)}
+        if workflow_id:
+            params["workflowId"] = workflow_id
+        if status:
+            params["status"] = status
+        if include_data:
+            params["includeData"] = "true"
+
+        while True:
+            status_code, body = await self._request("GET", "/executions", params=params)
+            if status_code != 200:
+                raise RuntimeError(f"{status_code} {body}")
+            for execution in body.get('data', []):
+                yield execution
+            if not body.get('nextCursor'):
+                return
+            params["cursor"] = body['nextCursor']
+
+    async def get_workflow_executions(self, workflow_id: str, limit: int = 10,
+                                      raise_errors: bool = False) -> List[Dict[str, Any]]:
+        """
+        获取工作流执行历史
+
+        Args:
+            workflow_id: 工作流ID
+            limit: 返回数量限制
+            raise_errors: 列表读取失败时是否抛出异常 (否则返回已读取的部分)
+
+        Returns:
+            执行历史列表
+
+        Raises:
+            RuntimeError: raise_errors 为真且列表读取失败
+        """
+        executions = []
+        try:
+            async for execution in self.iter_executions(workflow_id, page_size=min(limit, self.page_size)):
+                executions.append(execution)
+                if len(executions) >= limit:
+                    break
+        except Exception as e:
+            logger.error(f"❌ Error getting executions: {e}")
+            if raise_errors:
+                raise RuntimeError(f"Error getting executions: {e}") from e
+
+        logger.info(f"Found {len(executions)} executions for workflow {workflow_id}")
+        return executions
+
+    async def export_workflow(self, workflow_id: str, output_path: str = None) -> str:
+        """
+        导出工作流到文件
+
+        Args:
+            workflow_id: 工作流ID
+            output_path: 输出文件路径
+
+        Returns:
+            导出的文件路径
+        """
+        workflow = await self.get_workflow(workflow_id)
+        if workflow.get('error'):
+            logger.error(f"❌ Failed to get workflow for export")
+            return ""
+
+        if not output_path:
+            output_path = f"workflow_{workflow_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+        try:
+            await _run_in_thread(_write_json, output_path, workflow)
+            logger.info(f"✅ Workflow exported to: {output_path}")
+            return output_path
+        except Exception as e:
+            logger.error(f"❌ Error exporting workflow: {e}")
+            return ""
+
+    async def backup_workflow(self, workflow_id: str, backup_dir: str = "./backups") -> str:
+        """
+        备份工作流
+
+        Args:
+            workflow_id: 工作流ID
+            backup_dir: 备份目录
+
+        Returns:
+            备份文件路径
+        """
+        Path(backup_dir).mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_file = await self.export_workflow(
+            workflow_id, f"{backup_dir}/workflow_{workflow_id}_{timestamp}.json"
+        )
+        if backup_file:
+            logger.info(f"✅ Workflow backed up to: {backup_file}")
+        return backup_file
+
+    async def restore_workflow(self, backup_file: str) -> Dict[str, Any]:
+        """
+        从备份恢复工作流
+
+        Args:
+            backup_file: 备份文件路径
+
+        Returns:
+            恢复的工作流
+        """
+        try:
+            workflow = await _run_in_thread(_read_json, backup_file)
+            workflow.pop('id', None)
+            workflow['name'] = f"{workflow.get('name', 'Workflow')}_restored_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            return await self.create_workflow(workflow)
+
+        except Exception as e:
+            logger.error(f"❌ Error restoring workflow: {e}")
+            return {"error": str(e)}
+
+    async def import_workflow(self, file_path: str, activate: bool = False) -> Dict[str, Any]:
+        """
+        从文件导入工作流
+
+        Args:
+            file_path: 工作流JSON文件路径
+            activate: 是否自动激活
+
+        Returns:
+            导入的工作流
+        """
+        try:
+            workflow_config = await _run_in_thread(_read_json, file_path)
+            workflow_config['active'] = activate
+            return await self.create_workflow(workflow_config)
+
+        except Exception as e:
+            logger.error(f"❌ Error importing workflow: {e}")
+            return {"error": str(e)}
+
+    async def get_many(self, workflow_ids: Iterable[str]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        并发获取多个工作流，按完成顺序返回
+
+        Args:
+            workflow_ids: 工作流ID列表
+
+        Yields:
+            工作流对象 (失败时包含 error 和 id)
+        """
+        async def fetch(workflow_id):
+            workflow = await self.get_workflow(workflow_id)
+            workflow.setdefault('id', workflow_id)
+            return workflow
+
+        for future in asyncio.as_completed([fetch(wid) for wid in workflow_ids]):
+            yield await future
+
+    async def export_many(self, workflow_ids: Iterable[str],
+                          output_dir: str = "./exports") -> AsyncIterator[Dict[str, Any]]:
+        """
+        并发导出多个工作流，按完成顺序返回结果
+
+        Args:
+            workflow_ids: 工作流ID列表
+            output_dir: 输出目录
+
+        Yields:
+            {"id": 工作流ID, "path": 文件路径 (失败时为空), "duration": 耗时秒数}
+        """
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+        async def export(workflow_id):
+            start = asyncio.get_running_loop().time()
+            path = await self.export_workflow(
+                workflow_id, str(Path(output_dir) / f"workflow_{workflow_id}.json")
+            )
+            return {
+                "id": workflow_id,
+                "path": path,
+                "duration": asyncio.get_running_loop().time() - start
+            }
+
+        for future in asyncio.as_completed([export(wid) for wid in workflow_ids]):
+            yield await future
+
+    async def deploy_many(self, workflow_ids: Iterable[str]) -> Dict[str, bool]:
+        """
+        并发激活多个工作流
+
+        Args:
+            workflow_ids: 工作流ID列表
+
+        Returns:
+            {工作流ID: 是否成功}
+        """
+        workflow_ids = list(workflow_ids)
+        results = await asyncio.gather(*(self.deploy_workflow(wid) for wid in workflow_ids))
+        return dict(zip(workflow_ids, results))
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json(path: str, data: Any):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+async def _run_in_thread(func, *args):
+    """在线程池中执行阻塞的文件操作"""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+async def _export_command(manager: AsyncN8nWorkflowManager, workflow_ids: List[str],
+                          export_all: bool, output_dir: str):
+    """export-many 命令"""
+    async with manager:
+        if export_all:
+            workflow_ids = [w['id'] for w in await manager.list_workflows()]
+
+        done = 0
+        async for result in manager.export_many(workflow_ids, output_dir):
+            done += 1
+            status = "✅" if result["path"] else "❌"
+            print(f"{status} [{done}/{len(workflow_ids)}] {result['id']} ({result['duration']:.2f}s)")
+
+
+def main():
+    """命令行接口"""
+    parser = argparse.ArgumentParser(description='n8n Async Workflow Manager')
+    parser.add_argument('--base-url', default=os.getenv('N8N_BASE_URL', 'http://localhost:5678'),
+                        help='n8n base URL')
+    parser.add_argument('--api-key', default=os.getenv('N8N_API_KEY', ''),
+                        help='n8n API key')
+    parser.add_argument('--config', help='Agent config file (default: config/agent_config.yaml)')
+    parser.add_argument('--max-concurrent', type=int, help='Maximum concurrent requests')
+
+    subparsers = parser.add_subparsers(dest='command', help='Commands')
+
+    # export-many command
+    export_parser = subparsers.add_parser('export-many', help='Export workflows concurrently')
+    export_parser.add_argument('workflow_ids', nargs='*', help='Workflow IDs')
+    export_parser.add_argument('--all', action='store_true', help='Export all workflows')
+    export_parser.add_argument('--dir', default='./exports', help='Output directory')
+
+    args = parser.parse_args()
+
+    manager = AsyncN8nWorkflowManager(
+        args.base_url, args.api_key,
+        load_agent_config(args.config) if args.config else None,
+        args.max_concurrent
+    )
+
+    if args.command == 'export-many':
+        asyncio.run(_export_command(manager, args.workflow_ids, args.all, args.dir))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
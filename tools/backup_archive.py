@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+n8n Backup Archive
+工作流备份归档格式：单文件压缩归档、内容寻址存储、清单
+
+归档结构:
+    manifest.json           清单 (工作流ID -> 内容哈希、更新时间、耗时)
+    blobs/<sha256>.json     工作流内容 (紧凑JSON，相同内容只存一份)
+
+增量归档只包含变更的内容，未变更工作流的清单条目通过 archive 字段
+指向实际存放内容的归档 (同一目录下)，因此任一归档都是完整的恢复点。
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import io
+import os
+import json
+import time
+import hashlib
+import tarfile
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, Tuple, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+BLOB_DIR = 'blobs'
+ARCHIVE_FORMAT = 'n8n-backup/1'
+
+# 归档格式 -> (扩展名, tarfile写模式)
+COMPRESSION_FORMATS = {
+    'gz': ('.tar.gz', 'w:gz'),
+    'xz': ('.tar.xz', 'w:xz'),
+    'zst': ('.tar.zst', None),
+    'none': ('.tar', 'w'),
+}
+
+
+def canonical_json(data: Any) -> bytes:
+    """
+    生成规范化JSON (排序键、紧凑分隔符)，用于哈希和存储
+
+    Args:
+        data: JSON对象
+
+    Returns:
+        UTF-8编码的JSON
+    """
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def content_hash(data: Any) -> str:
+    """计算JSON对象的sha256内容哈希"""
+    return hashlib.sha256(canonical_json(data)).hexdigest()
+
+
+def _zstd_module():
+    """可选依赖 zstandard"""
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+class BackupArchiveWriter:
+    """流式写入备份归档"""
+
+    def __init__(self, path_prefix: str, compression: str = 'gz', level: int = None):
+        """
+        初始化归档写入器
+
+        Args:
+            path_prefix: 归档路径 (不含扩展名)
+            compression: gz | xz | zst | none；zst 需要安装 zstandard，否则回退为 gz
+            level: 压缩级别
+        """
+        if compression == 'zst' and not _zstd_module():
+            logger.warning("⚠️ zstandard not installed, falling back to gzip")
+            compression = 'gz'
+        if compression not in COMPRESSION_FORMATS:
+            raise ValueError(f"Unsupported compression: {compression}")
+
+        extension, mode = COMPRESSION_FORMATS[compression]
+        self.path = f"{path_prefix}{extension}"
+        self.compression = compression
+        self.blobs = set()
+        self.manifest = {
+            "format": ARCHIVE_FORMAT,
+            "created_at": datetime.now().isoformat(),
+            "workflows": {},
+            "stats": {}
+        }
+        self._start = time.time()
+        self._raw_bytes = 0
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'wb')
+        self._zstd_writer = None
+
+        if compression == 'zst':
+            zstd = _zstd_module()
+            self._zstd_writer = zstd.ZstdCompressor(level=level or 3).stream_writer(self._file)
+            self._tar = tarfile.open(fileobj=self._zstd_writer, mode='w|')
+        elif compression in ('gz', 'xz') and level is not None:
+            key = 'compresslevel' if compression == 'gz' else 'preset'
+            self._tar = tarfile.open(fileobj=self._file, mode=mode, **{key: level})
+        else:
+            self._tar = tarfile.open(fileobj=self._file, mode=mode)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _add_bytes(self, name: str, data: bytes):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def add_workflow(self, workflow: Dict[str, Any], **meta) -> str:
+        """
+        写入一个工作流
+
+        Args:
+            workflow: 工作流对象
+            **meta: 写入清单的附加信息 (如 fetch_time)
+
+        Returns:
+            内容哈希
+        """
+        body = canonical_json(workflow)
+        sha = hashlib.sha256(body).hexdigest()
+
+        if sha not in self.blobs:
+            self._add_bytes(f"{BLOB_DIR}/{sha}.json", body)
+            self.blobs.add(sha)
+            self._raw_bytes += len(body)
+
+        self.add_reference(workflow, sha, len(body), **meta)
+        return sha
+
+    def add_reference(self, workflow: Dict[str, Any], sha: str, size: int, **meta):
+        """
+        在清单中记录工作流；内容不在本归档时通过 archive=<归档文件名> 指明位置
+
+        Args:
+            workflow: 工作流对象或列表条目 (至少包含 id)
+            sha: 内容哈希
+            size: 内容字节数
+            **meta: 附加信息
+        """
+        self.manifest["workflows"][str(workflow.get('id'))] = {
+            "name": workflow.get('name', ''),
+            "active": workflow.get('active', False),
+            "updatedAt": workflow.get('updatedAt'),
+            "sha256": sha,
+            "size": size,
+            **meta
+        }
+
+    def close(self) -> Dict[str, Any]:
+        """
+        写入清单并关闭归档
+
+        Returns:
+            清单
+        """
+        if self._tar is None:
+            return self.manifest
+
+        self.manifest["stats"].update({
+            "workflows": len(self.manifest["workflows"]),
+            "unique_blobs": len(self.blobs),
+            "raw_bytes": self._raw_bytes,
+            "duration": round(time.time() - self._start, 3)
+        })
+        self._add_bytes(MANIFEST_NAME, json.dumps(self.manifest, indent=2, ensure_ascii=False).encode('utf-8'))
+
+        self._tar.close()
+        self._tar = None
+        if self._zstd_writer:
+            self._zstd_writer.close()
+        if not self._file.closed:
+            self._file.close()
+
+        self.manifest["stats"]["archive_bytes"] = Path(self.path).stat().st_size
+        return self.manifest
+
+    def abort(self):
+        """写入失败时关闭并删除未完成的归档"""
+        for stream in (self._tar, self._zstd_writer, self._file):
+            try:
+                if stream is not None:
+                    stream.close()
+            except Exception:
+                pass
+        self._tar = None
+        Path(self.path).unlink(missing_ok=True)
+
+
+def _open_archive(path: str) -> Tuple[tarfile.TarFile, Optional[Any]]:
+    """按扩展名打开归档，返回 (tar, 需要关闭的底层流)"""
+    if str(path).endswith('.zst'):
+        zstd = _zstd_module()
+        if not zstd:
+            raise RuntimeError("zstandard is required to read .tar.zst archives")
+        stream = zstd.ZstdDecompressor().stream_reader(open(path, 'rb'))
+        return tarfile.open(fileobj=stream, mode='r|'), stream
+    return tarfile.open(path, mode='r:*'), None
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """
+    读取归档清单
+
+    Args:
+        path: 归档路径
+
+    Returns:
+        清单
+    """
+    tar, stream = _open_archive(path)
+    try:
+        for member in tar:
+            if member.name == MANIFEST_NAME:
+                return json.load(tar.extractfile(member))
+        return {}
+    finally:
+        tar.close()
+        if stream:
+            stream.close()
+
+
+def iter_blobs(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    流式读取归档中的工作流内容
+
+    Args:
+        path: 归档路径
+
+    Yields:
+        (内容哈希, 工作流对象)
+    """
+    tar, stream = _open_archive(path)
+    try:
+        for member in tar:
+            if member.name.startswith(f"{BLOB_DIR}/") and member.isfile():
+                sha = Path(member.name).name.split('.')[0]
+                yield sha, json.load(tar.extractfile(member))
+    finally:
+        tar.close()
+        if stream:
+            stream.close()
+
+
+def read_backup_archive(path: str) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    读取完整归档
+
+    Args:
+        path: 归档路径
+
+    Returns:
+        (清单, {工作流ID: 工作流对象})，仅包含内容存于本归档的工作流
+    """
+    manifest = read_manifest(path)
+    blobs = dict(iter_blobs(path))
+    workflows = {
+        workflow_id: blobs[entry["sha256"]]
+        for workflow_id, entry in manifest.get("workflows", {}).items()
+        if entry.get("sha256") in blobs
+    }
+    return manifest, workflows
+
+
+def load_restore_point(path: str, allow_incomplete: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    读取归档对应的完整恢复点，增量归档引用的内容从被引用的归档中读取
+
+    Args:
+        path: 归档路径
+        allow_incomplete: 是否允许读取工作流列表未完整读取的归档
+
+    Returns:
+        {工作流ID: 工作流对象}
+
+    Raises:
+        RuntimeError: 归档清单标记为不完整
+    """
+    manifest, workflows = read_backup_archive(path)
+    if manifest.get("complete") is False:
+        message = f"Backup {path} is incomplete: {manifest.get('error', 'workflow listing was interrupted')}"
+        if not allow_incomplete:
+            raise RuntimeError(message)
+        logger.warning(f"⚠️ {message}")
+    base_dir = Path(path).parent
+
+    # 按被引用的归档分组，每个归档只读取一次
+    referenced: Dict[str, Dict[str, str]] = {}
+    for workflow_id, entry in manifest.get("workflows", {}).items():
+        if workflow_id not in workflows and entry.get("archive"):
+            referenced.setdefault(entry["archive"], {})[entry["sha256"]] = workflow_id
+
+    for archive_name, wanted in referenced.items():
+        archive_path = base_dir / archive_name
+        if not archive_path.exists():
+            logger.error(f"❌ Referenced archive missing: {archive_path}")
+            continue
+        for sha, workflow in iter_blobs(str(archive_path)):
+            if sha in wanted:
+                workflows[wanted[sha]] = workflow
+
+    missing = set(manifest.get("workflows", {})) - set(workflows)
+    if missing:
+        logger.warning(f"⚠️ {len(missing)} workflows could not be resolved from {path}")
+    return workflows
+
+
+class BackupIndex:
+    """
+    本地备份索引 {工作流ID: {updatedAt, sha256, size, archive}}
+
+    用于增量备份时判断哪些工作流需要重新获取完整内容。
+    """
+
+    def __init__(self, backup_dir: str, filename: str = 'backup_index.json'):
+        """
+        初始化索引
+
+        Args:
+            backup_dir: 备份目录
+            filename: 索引文件名
+        """
+        self.backup_dir = Path(backup_dir)
+        self.path = self.backup_dir / filename
+        self.workflows: Dict[str, Dict[str, Any]] = {}
+        self.last_archive: Optional[str] = None
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.workflows = data.get("workflows", {})
+                self.last_archive = data.get("last_archive")
+            except Exception as e:
+                logger.warning(f"⚠️ Ignoring unreadable backup index {self.path}: {e}")
+
+    def lookup(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        查找列表条目对应的已备份内容
+
+        Args:
+            entry: 工作流列表条目 (包含 id 和 updatedAt)
+
+        Returns:
+            索引记录；工作流有更新或内容所在归档已不存在时返回 None
+        """
+        record = self.workflows.get(str(entry.get('id')))
+        if not record or not record.get("updatedAt") or not entry.get('updatedAt'):
+            return None
+        if entry['updatedAt'] != record["updatedAt"]:
+            return None
+        if not (self.backup_dir / record["archive"]).exists():
+            return None
+        return record
+
+    def update(self, manifest: Dict[str, Any], archive_name: str):
+        """
+        根据新归档的清单更新索引并保存
+
+        Args:
+            manifest: 归档清单
+            archive_name: 归档文件名
+        """
+        self.workflows = {
+            workflow_id: {
+                "updatedAt": entry.get("updatedAt"),
+                "sha256": entry["sha256"],
+                "size": entry.get("size", 0),
+                "archive": entry.get("archive", archive_name)
+            }
+            for workflow_id, entry in manifest.get("workflows", {}).items()
+        }
+        self.last_archive = archive_name
+
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"last_archive": archive_name, "workflows": self.workflows}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+n8n Node Cost Model
+节点耗时模型：用于加权关键路径分析
+
+    StaticCostModel    按节点类型的默认耗时 (templates/node_mappings.json 的 cost_ms)
+    MeasuredCostModel  按执行记录实测耗时 (ExecutionProfiler)，无数据的节点回退到静态模型
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAPPINGS_PATH = Path(__file__).parent.parent / 'templates' / 'node_mappings.json'
+
+# 未登记节点类型的默认耗时 (毫秒)
+DEFAULT_COST_MS = 10
+
+# 未登记节点类型按关键字估算 (毫秒)
+KEYWORD_COSTS_MS = (
+    ('http', 2000),
+    ('database', 1000),
+    ('postgres', 1000),
+    ('mysql', 1000),
+    ('mongo', 1000),
+    ('loop', 5000),
+)
+
+# Wait 节点时间单位 -> 毫秒
+WAIT_UNITS_MS = {
+    'seconds': 1000,
+    'minutes': 60 * 1000,
+    'hours': 60 * 60 * 1000,
+    'days': 24 * 60 * 60 * 1000,
+}
+
+
+class CostModel:
+    """耗时模型基类：节点耗时和连接耗时，单位毫秒"""
+
+    source = "none"
+
+    def node_cost(self, node: Dict[str, Any]) -> float:
+        """
+        节点耗时
+
+        Args:
+            node: 节点对象
+
+        Returns:
+            耗时 (毫秒)
+        """
+        return 0.0
+
+    def edge_cost(self, source: Dict[str, Any], target: Dict[str, Any]) -> float:
+        """
+        连接耗时 (节点之间传递数据的开销)
+
+        Args:
+            source: 源节点
+            target: 目标节点
+
+        Returns:
+            耗时 (毫秒)
+        """
+        return 0.0
+
+
+def _collect_type_costs(mappings: Dict[str, Any], costs: Dict[str, float]):
+    """递归收集 node_mappings.json 中带 type 和 cost_ms 的条目"""
+    for value in mappings.values():
+        if not isinstance(value, dict):
+            continue
+        if 'type' in value and 'cost_ms' in value:
+            costs[value['type']] = float(value['cost_ms'])
+        else:
+            _collect_type_costs(value, costs)
+
+
+class StaticCostModel(CostModel):
+    """按节点类型的默认耗时"""
+
+    source = "static"
+
+    def __init__(self, mappings_path: str = None, type_costs: Dict[str, float] = None):
+        """
+        初始化静态模型
+
+        Args:
+            mappings_path: 节点映射文件 (默认 templates/node_mappings.json)
+            type_costs: 额外的 {节点类型: 耗时毫秒}，优先于映射文件
+        """
+        self.type_costs: Dict[str, float] = {}
+        path = Path(mappings_path) if mappings_path else DEFAULT_MAPPINGS_PATH
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                _collect_type_costs(json.load(f), self.type_costs)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load node costs from {path}: {e}")
+        self.type_costs.update(type_costs or {})
+
+    def node_cost(self, node: Dict[str, Any]) -> float:
+        node_type = node.get('type', '')
+        if node.get('disabled'):
+            return 0.0
+        if node_type.lower().endswith('.wait'):
+            wait_ms = self._wait_cost(node)
+            if wait_ms is not None:
+                return wait_ms
+        if node_type in self.type_costs:
+            return self.type_costs[node_type]
+        lowered = node_type.lower()
+        for keyword, cost in KEYWORD_COSTS_MS:
+            if keyword in lowered:
+                return float(cost)
+        return float(DEFAULT_COST_MS)
+
+    @staticmethod
+    def _wait_cost(node: Dict[str, Any]) -> Optional[float]:
+        params = node.get('parameters', {})
+        amount = params.get('amount')
+        if amount is None:
+            return None
+        try:
+            return float(amount) * WAIT_UNITS_MS.get(params.get('unit', 'seconds'), 1000)
+        except (TypeError, ValueError):
+            return None
+
+
+class MeasuredCostModel(CostModel):
+    """按实测耗时，没有实测数据的节点使用回退模型"""
+
+    source = "measured"
+
+    def __init__(self, node_timings: Dict[str, Any], stat: str = 'p50',
+                 fallback: CostModel = None):
+        """
+        初始化实测模型
+
+        Args:
+            node_timings: ExecutionProfiler.summary() 的结果或 {节点名: 耗时统计}
+            stat: 使用的统计量 (p50 | p95 | p99 | max | mean)
+            fallback: 无实测数据时的模型 (默认 StaticCostModel)
+        """
+        self.node_timings = node_timings.get('nodes', node_timings) if node_timings else {}
+        self.stat = stat
+        self.fallback = fallback or StaticCostModel()
+
+    def timing(self, node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """节点的实测统计 (runData 以节点名为键)"""
+        return self.node_timings.get(node.get('name')) or self.node_timings.get(node.get('id'))
+
+    def node_cost(self, node: Dict[str, Any]) -> float:
+        timing = self.timing(node)
+        if timing and self.stat in timing:
+            return float(timing[self.stat])
+        return self.fallback.node_cost(node)
+
+    def edge_cost(self, source: Dict[str, Any], target: Dict[str, Any]) -> float:
+        return self.fallback.edge_cost(source, target)
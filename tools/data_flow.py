@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+n8n Data Flow Analysis
+表达式数据依赖分析
+
+节点通过表达式读取上游数据：
+
+    $json.field / $json["field"]            直接输入的当前条目
+    $input.item.json / $input.first() ...   直接输入 ($input.all() 为全部条目)
+    $('Node').item.json.field               指定节点的输出
+    $node["Node"].json.field                旧语法，同上
+    $items("Node")                          指定节点的全部条目
+
+extract_references 从任意字符串 (表达式参数或 jsCode 等代码) 中提取这些引用，
+analyze_data_flow 把所有节点的引用解析为数据依赖图 (引用节点 -> 被引用节点，
+带读取的字段和在连接图上的距离)，并检查：
+
+    far_upstream       跨多个节点读取整条数据或全部条目 (执行期间占用内存的主要来源)
+    not_upstream       引用的节点不在上游 (运行时得不到数据)
+    unused_fields      Set 节点设置了但下游从未读取的字段
+    redundant          同一数据上的相同表达式在多个节点重复计算
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import re
+from collections import deque
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+try:
+    from tools.workflow_graph import ReachabilityIndex
+except ModuleNotFoundError:  # 作为脚本直接运行
+    from workflow_graph import ReachabilityIndex
+
+# 引用距离 (连接跳数) 达到此值视为远距离读取
+FAR_UPSTREAM_HOPS = 3
+
+# 原样传递输入条目的节点类型 (输出中保留上游字段)
+PASS_THROUGH_TYPES = ('if', 'switch', 'filter', 'merge', 'wait', 'noOp', 'splitInBatches', 'limit', 'sort',
+                      'removeDuplicates')
+
+# 不通过表达式、默认整体读取输入条目的节点类型 (写入、转换、返回整条数据)
+IMPLICIT_INPUT_TYPES = ('respondToWebhook', 'itemLists', 'aggregate', 'splitOut', 'convertToFile', 'spreadsheetFile',
+                        'executeWorkflow', 'googleSheets', 'airtable', 'postgres', 'mySql', 'microsoftSql', 'mongoDb')
+
+# 字段访问链：.field / ?.field / ["field"] / ['field']
+_ACCESSORS = r"(?P<chain>(?:\??\.[A-Za-z_$][\w$]*|\[\s*(?:'[^']*'|\"[^\"]*\")\s*\])*)"
+_NAME = r"\s*(?P<q>['\"])(?P<name>(?:(?!(?P=q)).)+)(?P=q)\s*"
+_ACCESS = r"(?:\.(?P<access>item|first\(\s*\)|last\(\s*\)|all\(\s*\)|itemMatching\([^)]*\)|pairedItem\([^)]*\)))"
+
+_PATTERNS = (
+    ('$json', re.compile(r"\$json\b" + _ACCESSORS)),
+    ('$input', re.compile(r"\$input" + _ACCESS + r"(?P<json>\??\.json\b)?" + _ACCESSORS)),
+    ('$()', re.compile(r"\$\(" + _NAME + r"\)" + _ACCESS + r"?(?P<json>\??\.json\b)?" + _ACCESSORS)),
+    ('$node', re.compile(r"\$node(?:\[" + _NAME + r"\]|\.(?P<bare>[A-Za-z_$][\w$]*))"
+                         r"(?P<json>\??\.json\b)?" + _ACCESSORS)),
+    ('$items', re.compile(r"\$items\(\s*(?:(?P<q>['\"])(?P<name>(?:(?!(?P=q)).)+)(?P=q))?")),
+)
+_SEGMENT = re.compile(r"\??\.([A-Za-z_$][\w$]*)|\[\s*(?:'([^']*)'|\"([^\"]*)\")\s*\]")
+_EXPRESSION = re.compile(r"\{\{(.*?)\}\}", re.S)
+
+
+def _fields(chain: str) -> List[str]:
+    """访问链中的字段路径 (遇到方法调用为止)"""
+    fields = []
+    for match in _SEGMENT.finditer(chain):
+        fields.append(match.group(1) or match.group(2) or match.group(3) or '')
+    return fields
+
+
+def extract_references(text: str) -> List[Dict[str, Any]]:
+    """
+    提取字符串中的数据引用
+
+    Args:
+        text: 参数值 (表达式或代码)
+
+    Returns:
+        引用列表，每项包含：
+            syntax: $json | $input | $() | $node | $items
+            node: 被引用的节点名 (None 表示直接输入)
+            access: item | first | last | all | itemMatching | pairedItem | meta (只读取节点元数据)
+            field: 读取的顶层字段 (None 表示整条数据)
+            path: 完整的字段路径 (用 . 连接)
+    """
+    references = []
+    if '$' not in text:
+        return references
+
+    for syntax, pattern in _PATTERNS:
+        for match in pattern.finditer(text):
+            groups = match.groupdict()
+            if syntax == '$json':
+                access = 'item'
+            elif syntax == '$items':
+                access = 'all'
+            elif groups.get('access'):
+                access = groups['access'].split('(')[0]
+            else:
+                # $node["X"].json 读取条目；$node["X"].parameter、$('X').params 等只读取节点元数据
+                access = 'item' if groups.get('json') else 'meta'
+
+            path = []
+            if access != 'all' and (syntax == '$json' or groups.get('json')):
+                path = _fields(groups.get('chain') or '')
+                # 链的最后一段后面是括号时是方法调用，不是字段
+                if path and text[match.end():match.end() + 1] == '(':
+                    path = path[:-1]
+
+            references.append({
+                "syntax": syntax,
+                "node": groups.get('name') or groups.get('bare'),
+                "access": access,
+                "field": path[0] if path else None,
+                "path": '.'.join(path),
+            })
+    return references
+
+
+def _walk(value: Any, path: str) -> Iterable[Tuple[str, str]]:
+    """参数中的所有字符串及其路径"""
+    if isinstance(value, str):
+        yield path, value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield from _walk(item, f"{path}.{key}" if path else str(key))
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            yield from _walk(item, f"{path}[{i}]")
+
+
+def node_references(node: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    提取节点所有参数 (包括 jsCode 等代码) 中的数据引用
+
+    Args:
+        node: 节点对象
+
+    Returns:
+        引用列表 (extract_references 的结果加上 parameter：参数路径)
+    """
+    references = []
+    for parameter, text in _walk(node.get('parameters', {}), ''):
+        for reference in extract_references(text):
+            reference["parameter"] = parameter
+            references.append(reference)
+    return references
+
+
+def node_expressions(node: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    节点参数中包含计算的表达式 ({{ }} 内不只是读取字段的部分)
+
+    Args:
+        node: 节点对象
+
+    Returns:
+        [(参数路径, 去掉空白的表达式)]
+    """
+    expressions = []
+    for parameter, text in _walk(node.get('parameters', {}), ''):
+        if not text.startswith('=') or '{{' not in text:
+            continue
+        for match in _EXPRESSION.finditer(text):
+            expression = re.sub(r"\s+", '', match.group(1))
+            if not extract_references(expression):
+                continue
+            # 去掉引用本身后还有内容 (调用、运算) 才算计算
+            rest = expression
+            for _, pattern in _PATTERNS:
+                rest = pattern.sub('', rest)
+            if rest:
+                expressions.append((parameter, expression))
+    return expressions
+
+
+def set_fields(node: Dict[str, Any]) -> List[str]:
+    """
+    Set 节点设置的顶层字段 (支持 v1/v2 的 values、v3.0-3.2 的 fields 和 v3.3+ 的 assignments)
+
+    Args:
+        node: 节点对象
+
+    Returns:
+        字段名列表 (不是 Set 节点时为空)
+    """
+    if not node.get('type', '').endswith('.set'):
+        return []
+    parameters = node.get('parameters', {}) or {}
+    entries = []
+    values = parameters.get('values')
+    if isinstance(values, dict):
+        for group in values.values():
+            if isinstance(group, list):
+                entries.extend(group)
+    for container, key in (('fields', 'values'), ('assignments', 'assignments')):
+        group = (parameters.get(container) or {}).get(key) if isinstance(parameters.get(container), dict) else None
+        if isinstance(group, list):
+            entries.extend(group)
+
+    fields = []
+    for entry in entries:
+        name = entry.get('name') if isinstance(entry, dict) else None
+        if isinstance(name, str) and name and not name.startswith('='):
+            field = name.split('.')[0] if parameters.get('options', {}).get('dotNotation', True) else name
+            if field not in fields:
+                fields.append(field)
+    return fields
+
+
+def passes_through(node: Dict[str, Any]) -> bool:
+    """
+    节点的输出是否保留输入条目的字段
+
+    Args:
+        node: 节点对象
+
+    Returns:
+        PASS_THROUGH_TYPES 中的节点，以及保留其他字段的 Set 节点为 True
+    """
+    node_type = node.get('type', '')
+    base_type = node_type.split('.')[-1]
+    if base_type == 'set':
+        parameters = node.get('parameters', {}) or {}
+        if 'includeOtherFields' in parameters:
+            return bool(parameters['includeOtherFields'])
+        if 'keepOnlySet' in parameters:
+            return not parameters['keepOnlySet']
+        # v1/v2 默认保留其他字段，v3 起默认只输出设置的字段
+        return (node.get('typeVersion') or 1) < 3
+    return base_type in PASS_THROUGH_TYPES
+
+
+def _upstream_distances(graph, start: str, wanted: set) -> Dict[str, int]:
+    """从节点沿前驱方向的距离 (找到所有 wanted 节点后停止)"""
+    distances = {start: 0}
+    queue = deque([start])
+    remaining = set(wanted) - {start}
+    while queue and remaining:
+        key = queue.popleft()
+        for pred in graph.predecessors(key):
+            if pred not in distances:
+                distances[pred] = distances[key] + 1
+                remaining.discard(pred)
+                queue.append(pred)
+    return distances
+
+
+def _related_nodes(graph, start: str, forward: bool) -> set:
+    """节点的所有后代 (forward) 或祖先，用于有环的图"""
+    step = graph.successors if forward else graph.predecessors
+    seen = {start}
+    stack = [start]
+    while stack:
+        for key in step(stack.pop()):
+            if key not in seen:
+                seen.add(key)
+                stack.append(key)
+    seen.discard(start)
+    return seen
+
+
+class _Reachability:
+    """无环图用 ReachabilityIndex 位集判断可达，有环时逐个节点搜索 (结果按节点缓存)"""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.index = ReachabilityIndex(graph, graph.topological_sort()) if graph.is_directed_acyclic_graph() else None
+        self._ancestors: Dict[str, set] = {}
+        self._masks: Dict[str, int] = {}
+
+    def is_upstream(self, source: str, target: str) -> bool:
+        """source 是否是 target 的祖先"""
+        if self.index is not None:
+            return bool(self.index.ancestors[self.index.position[target]] >> self.index.position[source] & 1)
+        if target not in self._ancestors:
+            self._ancestors[target] = _related_nodes(self.graph, target, forward=False)
+        return source in self._ancestors[target]
+
+    def reaches_any(self, source: str, group: str, targets: Iterable[str]) -> bool:
+        """source 的后代中是否有 targets 中的节点 (group 为 targets 的缓存键)"""
+        if self.index is not None:
+            if group not in self._masks:
+                self._masks[group] = self.index.mask(targets)
+            return bool(self.index.descendants[self.index.position[source]] & self._masks[group])
+        return not _related_nodes(self.graph, source, forward=True).isdisjoint(targets)
+
+
+def analyze_data_flow(model, graph, references: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                      expressions: Optional[Dict[str, List[Tuple[str, str]]]] = None,
+                      far_hops: int = FAR_UPSTREAM_HOPS) -> Dict[str, Any]:
+    """
+    建立表达式数据依赖图并检查内存和重复计算问题
+
+    Args:
+        model: WorkflowModel
+        graph: 以节点ID为键的连接图
+        references: {节点ID: node_references() 的结果}，调用方可传入缓存 (缺少的节点现场提取)
+        expressions: {节点ID: node_expressions() 的结果}，同上
+        far_hops: 远距离读取的跳数阈值
+
+    Returns:
+        edges: 数据依赖 (source 被引用节点, target 引用节点, fields, whole_item, all_items, distance)
+        references: 引用总数
+        far_upstream: 跨 far_hops 个以上节点读取整条数据或全部条目的引用
+        not_upstream: 引用了不在上游 (或不存在) 的节点
+        unused_fields: Set 节点设置但下游没有读取的字段
+        redundant: 在多个节点重复计算的表达式
+    """
+    references = dict(references or {})
+    node_keys = [model.node_id(node) for node in model.nodes]
+    for node_id in node_keys:
+        if node_id not in references:
+            references[node_id] = node_references(model.by_id[node_id])
+
+    result = {"edges": [], "references": sum(len(references[node_id]) for node_id in node_keys),
+              "far_upstream": [], "not_upstream": [], "unused_fields": [], "redundant": []}
+    if graph is None:
+        return result
+
+    def name_of(node_id):
+        return model.by_id[node_id].get('name', node_id)
+
+    reach = None
+    edges: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    # 被读取整条数据或全部条目的节点，以及按字段名读取数据的节点
+    whole_reads = set()
+    readers: Dict[str, set] = {}
+
+    for node_id in node_keys:
+        node = model.by_id[node_id]
+        if node.get('type', '').split('.')[-1] in IMPLICIT_INPUT_TYPES:
+            if not (node.get('parameters') or {}).get('responseBody'):
+                whole_reads.update(graph.predecessors(node_id))
+
+        node_refs = [ref for ref in references[node_id] if ref['access'] != 'meta']
+        if not node_refs:
+            continue
+        predecessors = list(graph.predecessors(node_id))
+
+        # 指定节点的引用：先判断是否在上游，再从引用节点反向搜索距离
+        targets = {}
+        for name in {ref['node'] for ref in node_refs if ref['node'] is not None}:
+            source = model.resolve_id(name)
+            if source is not None:
+                if reach is None:
+                    reach = _Reachability(graph)
+                if not reach.is_upstream(source, node_id):
+                    source = False
+            targets[name] = source
+        distances = _upstream_distances(graph, node_id, {key for key in targets.values() if key})
+
+        for ref in node_refs:
+            whole = ref['field'] is None or ref['access'] == 'all'
+            if ref['field'] is not None:
+                readers.setdefault(ref['field'], set()).add(node_id)
+            if ref['node'] is None:
+                sources = [(pred, 1) for pred in predecessors]
+            else:
+                source = targets[ref['node']]
+                if not source:
+                    result["not_upstream"].append({
+                        "node": name_of(node_id),
+                        "references": ref['node'],
+                        "parameter": ref['parameter'],
+                        "reason": "Referenced node does not exist" if source is None
+                                  else "Referenced node is not upstream of this node"
+                    })
+                    continue
+                sources = [(source, distances[source])]
+                if distances[source] >= far_hops and whole:
+                    result["far_upstream"].append({
+                        "node": name_of(node_id),
+                        "source": ref['node'],
+                        "distance": distances[source],
+                        "access": ref['access'],
+                        "payload": "all_items" if ref['access'] == 'all' else "whole_item",
+                        "parameter": ref['parameter'],
+                        "severity": "high" if ref['access'] == 'all' else "medium"
+                    })
+
+            for source, distance in sources:
+                if whole:
+                    whole_reads.add(source)
+                edge = edges.get((source, node_id))
+                if edge is None:
+                    edge = edges[(source, node_id)] = {
+                        "source": source, "target": node_id, "fields": [],
+                        "whole_item": False, "all_items": False, "distance": distance
+                    }
+                if ref['access'] == 'all':
+                    edge["all_items"] = True
+                elif ref['field'] is None:
+                    edge["whole_item"] = True
+                elif ref['field'] not in edge["fields"]:
+                    edge["fields"].append(ref['field'])
+    # 按节点顺序排列 (与连接的加入顺序无关)
+    position = {key: i for i, key in enumerate(node_keys)}
+    result["edges"] = sorted(edges.values(), key=lambda edge: (position[edge["target"]], position[edge["source"]]))
+
+    # 未使用的字段：Set 节点的后代都没有按字段名读取 (字段可能经过中间节点传递，按名称匹配
+    # 读取任何节点的引用)，也没有整体读取仍带着这些字段的数据。从被整体读取的节点沿
+    # 原样传递的节点反向，得到输出会被整体读取的节点；没有后继的 Set 节点的输出即工作流结果，不检查
+    carrying = set(whole_reads)
+    stack = [key for key in whole_reads if passes_through(model.by_id[key])]
+    while stack:
+        for pred in graph.predecessors(stack.pop()):
+            if pred not in carrying:
+                carrying.add(pred)
+                if passes_through(model.by_id[pred]):
+                    stack.append(pred)
+
+    for node_id in node_keys:
+        if node_id in carrying:
+            continue
+        fields = set_fields(model.by_id[node_id])
+        if not fields or not any(True for _ in graph.successors(node_id)):
+            continue
+        if reach is None:
+            reach = _Reachability(graph)
+        for field in fields:
+            if field not in readers or not reach.reaches_any(node_id, field, readers[field]):
+                result["unused_fields"].append({"node": name_of(node_id), "field": field})
+
+    # 重复计算：读取相同数据的相同表达式出现在多个节点。直接输入按数据来源比较：
+    # 原样传递的节点 (IF、Merge 等) 的输出视为其上游的数据
+    origins: Dict[str, tuple] = {}
+
+    def origin(node_id):
+        if node_id not in origins:
+            found, seen, stack = set(), {node_id}, [node_id]
+            while stack:
+                for pred in graph.predecessors(stack.pop()):
+                    if not passes_through(model.by_id[pred]):
+                        found.add(str(pred))
+                    elif pred not in seen:
+                        seen.add(pred)
+                        stack.append(pred)
+            origins[node_id] = tuple(sorted(found))
+        return origins[node_id]
+
+    expressions = expressions or {}
+    seen_expressions: Dict[Tuple[str, tuple], List[str]] = {}
+    for node_id in node_keys:
+        node_exprs = expressions.get(node_id)
+        if node_exprs is None:
+            node_exprs = node_expressions(model.by_id[node_id])
+        for _, expression in node_exprs:
+            uses_input = '$json' in expression or '$input' in expression
+            nodes = seen_expressions.setdefault((expression, origin(node_id) if uses_input else ()), [])
+            if name_of(node_id) not in nodes:
+                nodes.append(name_of(node_id))
+    redundant = [{"expression": expression, "nodes": nodes, "count": len(nodes)}
+                 for (expression, _), nodes in seen_expressions.items() if len(nodes) > 1]
+    redundant.sort(key=lambda item: -item["count"])
+    result["redundant"] = redundant
+
+    return result
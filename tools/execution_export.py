@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+n8n Execution Export
+执行记录导出：扁平化为分析用的行，流式写入 NDJSON / Parquet，支持断点续传
+
+每个执行导出为一行，基础字段之外，runData 中每个节点的运行情况展开为列:
+    node.<节点名>.runs      运行次数
+    node.<节点名>.time_ms   累计执行时间 (毫秒)
+    node.<节点名>.items     输出条目数
+    node.<节点名>.error     是否出错
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+try:
+    from tools.api_client import parse_timestamp
+except ModuleNotFoundError:  # 作为脚本直接运行
+    from api_client import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('ndjson', 'parquet')
+
+# 直接导出的执行字段
+EXECUTION_FIELDS = ('id', 'workflowId', 'status', 'mode', 'finished', 'retryOf',
+                    'retrySuccessId', 'startedAt', 'stoppedAt', 'waitTill')
+
+
+def _pyarrow_module():
+    """可选依赖 pyarrow"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        return None
+
+
+def get_run_data(execution: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    取出执行记录中的 runData (需要 includeData)
+
+    Args:
+        execution: 执行记录
+
+    Returns:
+        {节点名: [运行记录]}，没有执行数据时返回空字典
+    """
+    data = execution.get('data') or {}
+    return (data.get('resultData') or {}).get('runData') or {}
+
+
+def _count_items(run: Dict[str, Any]) -> int:
+    outputs = (run.get('data') or {}).get('main') or []
+    return sum(len(items or []) for items in outputs)
+
+
+def flatten_execution(execution: Dict[str, Any], keep_data: bool = False) -> Dict[str, Any]:
+    """
+    将执行记录展开为一行
+
+    Args:
+        execution: 执行记录
+        keep_data: 是否保留原始执行数据 (data 字段)
+
+    Returns:
+        扁平化的记录
+    """
+    row = {field: execution.get(field) for field in EXECUTION_FIELDS}
+    row['id'] = str(row['id']) if row['id'] is not None else None
+
+    started = parse_timestamp(execution.get('startedAt'))
+    stopped = parse_timestamp(execution.get('stoppedAt'))
+    row['duration_ms'] = (stopped - started).total_seconds() * 1000 if started and stopped else None
+
+    run_data = get_run_data(execution)
+    row['node_count'] = len(run_data)
+    for node_name, runs in run_data.items():
+        runs = runs or []
+        prefix = f"node.{node_name}"
+        row[f"{prefix}.runs"] = len(runs)
+        row[f"{prefix}.time_ms"] = sum(run.get('executionTime') or 0 for run in runs)
+        row[f"{prefix}.items"] = sum(_count_items(run) for run in runs)
+        row[f"{prefix}.error"] = any(run.get('error') for run in runs)
+
+    if keep_data and 'data' in execution:
+        row['data'] = execution['data']
+    return row
+
+
+class NDJSONExecutionWriter:
+    """逐行写入 JSON Lines；position 为已写入的字节数"""
+
+    def __init__(self, path: str, position: int = 0):
+        """
+        打开输出文件
+
+        Args:
+            path: 输出路径
+            position: 续传时的起始位置，之后的内容 (上次中断时未提交的部分) 会被截断
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'r+b' if position and self.path.exists() else 'wb')
+        self._file.truncate(position)
+        self._file.seek(position)
+
+    def write_rows(self, rows: List[Dict[str, Any]]):
+        """写入一页记录并刷新到磁盘"""
+        for row in rows:
+            self._file.write(json.dumps(row, ensure_ascii=False, default=str).encode('utf-8'))
+            self._file.write(b'\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    @property
+    def position(self) -> int:
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetExecutionWriter:
+    """
+    每页写入一个 Parquet 分片 (<输出目录>/part-00000.parquet ...)
+
+    节点列随工作流变化，分片之间的 schema 可以不同，pandas / pyarrow.dataset /
+    DuckDB 读取目录时会合并 schema。position 为已写入的分片数。
+    """
+
+    def __init__(self, path: str, position: int = 0):
+        """
+        打开输出目录
+
+        Args:
+            path: 输出目录
+            position: 续传时已提交的分片数，之后的分片会被删除
+        """
+        self._pa = _pyarrow_module()
+        if not self._pa:
+            raise RuntimeError("pyarrow is required for Parquet export (pip install pyarrow)")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._parts = position
+
+        for part in self.path.glob('part-*.parquet'):
+            if int(part.stem.split('-')[1]) >= position:
+                part.unlink()
+
+    def write_rows(self, rows: List[Dict[str, Any]]):
+        """将一页记录写为一个分片"""
+        if not rows:
+            return
+        rows = [
+            {key: json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+             for key, value in row.items()}
+            for row in rows
+        ]
+        table = self._pa.Table.from_pylist(rows)
+        part_path = self.path / f"part-{self._parts:05d}.parquet"
+        tmp_path = part_path.with_suffix('.tmp')
+        self._pa.parquet.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, part_path)
+        self._parts += 1
+
+    @property
+    def position(self) -> int:
+        return self._parts
+
+    def close(self):
+        pass
+
+
+EXPORT_WRITERS = {
+    'ndjson': NDJSONExecutionWriter,
+    'parquet': ParquetExecutionWriter,
+}
+
+
+def detect_format(output: str) -> str:
+    """根据输出路径推断导出格式"""
+    return 'parquet' if str(output).endswith('.parquet') else 'ndjson'
+
+
+class ExportCheckpoint:
+    """
+    导出断点 (<输出路径>.checkpoint.json)
+
+    每写完一页记录一次下一页的游标和输出位置，中断后可从该页继续。
+    """
+
+    def __init__(self, output: str):
+        """
+        Args:
+            output: 导出文件/目录路径
+        """
+        self.path = Path(f"{str(output).rstrip('/')}.checkpoint.json")
+        self.state: Dict[str, Any] = {}
+
+    def load(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        读取与本次查询条件一致的断点
+
+        Args:
+            query: 导出条件
+
+        Returns:
+            断点状态，不存在或条件不一致时返回 None
+        """
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring unreadable checkpoint {self.path}: {e}")
+            return None
+        if state.get('query') != query:
+            logger.warning("⚠️ Checkpoint was written for a different query, starting over")
+            return None
+        self.state = state
+        return state
+
+    def save(self, **state):
+        """原子地保存断点"""
+        self.state.update(state)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
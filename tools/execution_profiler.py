@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+n8n Execution Profiler
+从执行记录的 runData 统计每个节点的实际耗时
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import json
+import argparse
+import logging
+import sys
+from datetime import datetime
+from itertools import islice
+from typing import Dict, List, Any, Iterable
+
+try:
+    from tools.execution_export import get_run_data
+except ModuleNotFoundError:  # 作为脚本直接运行
+    from execution_export import get_run_data
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    计算百分位数 (线性插值)
+
+    Args:
+        values: 已排序的数值
+        q: 百分位 (0-100)
+
+    Returns:
+        百分位数，空列表返回 0
+    """
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(values[-1], 3) if values else 0.0,
+        "mean": round(sum(values) / len(values), 3) if values else 0.0,
+    }
+
+
+class ExecutionProfiler:
+    """
+    节点耗时分析器
+
+    每个执行中一个节点的耗时为其所有运行 (循环中可能多次) 的 executionTime 之和，
+    输出条目数为所有运行的输出条目之和。汇总结果可直接传给
+    WorkflowAnalyzer(node_timings=...)。
+    """
+
+    def __init__(self, manager=None):
+        """
+        初始化分析器
+
+        Args:
+            manager: N8nWorkflowManager 实例 (从n8n拉取执行记录时需要)
+        """
+        self.manager = manager
+        self.executions = 0
+        self._times: Dict[str, List[float]] = {}
+        self._items: Dict[str, List[int]] = {}
+        self._runs: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._durations: List[float] = []
+
+    def add_execution(self, execution: Dict[str, Any]) -> bool:
+        """
+        加入一个执行记录
+
+        Args:
+            execution: 包含执行数据的执行记录
+
+        Returns:
+            是否包含可用的 runData
+        """
+        run_data = get_run_data(execution)
+        if not run_data:
+            return False
+
+        self.executions += 1
+        total = 0.0
+        for node_name, runs in run_data.items():
+            runs = runs or []
+            elapsed = float(sum(run.get('executionTime') or 0 for run in runs))
+            items = sum(
+                len(output or [])
+                for run in runs
+                for output in ((run.get('data') or {}).get('main') or [])
+            )
+            self._times.setdefault(node_name, []).append(elapsed)
+            self._items.setdefault(node_name, []).append(items)
+            self._runs[node_name] = self._runs.get(node_name, 0) + len(runs)
+            self._errors[node_name] = self._errors.get(node_name, 0) + sum(1 for run in runs if run.get('error'))
+            total += elapsed
+        self._durations.append(total)
+        return True
+
+    def add_executions(self, executions: Iterable[Dict[str, Any]]) -> int:
+        """
+        批量加入执行记录
+
+        Returns:
+            实际使用的执行数
+        """
+        return sum(1 for execution in executions if self.add_execution(execution))
+
+    def profile(self, workflow_id: str, limit: int = 50, status: str = None) -> Dict[str, Any]:
+        """
+        拉取工作流最近的执行并汇总节点耗时
+
+        Args:
+            workflow_id: 工作流ID
+            limit: 使用的执行数
+            status: 执行状态过滤 (如 success)
+
+        Returns:
+            汇总结果，见 summary()
+
+        Raises:
+            ValueError: 没有工作流管理器或工作流ID为空 (否则会汇总所有工作流的执行)
+            RuntimeError: 执行列表读取失败 (不汇总不完整的样本)
+        """
+        if not self.manager:
+            raise ValueError("A workflow manager is required to fetch executions")
+        if not workflow_id:
+            raise ValueError("A workflow ID is required to profile executions")
+
+        executions = self.manager.iter_executions(
+            workflow_id, status=status, include_data=True, page_size=min(limit, 100), raise_errors=True
+        )
+        used = self.add_executions(islice(executions, limit))
+        logger.info(f"Profiled {used} executions of workflow {workflow_id}")
+        return self.summary(workflow_id)
+
+    def summary(self, workflow_id: str = None) -> Dict[str, Any]:
+        """
+        汇总统计
+
+        Args:
+            workflow_id: 工作流ID (写入结果)
+
+        Returns:
+            {"executions": 执行数, "total_ms": 总耗时分布,
+             "nodes": {节点名: {p50, p95, p99, max, mean, runs, errors, items_p50, items_max}}}
+            时间单位为毫秒
+        """
+        nodes = {}
+        for node_name, times in self._times.items():
+            items = sorted(self._items[node_name])
+            nodes[node_name] = {
+                **_distribution(times),
+                "samples": len(times),
+                "runs": self._runs[node_name],
+                "errors": self._errors[node_name],
+                "items_p50": percentile(items, 50),
+                "items_max": items[-1] if items else 0,
+            }
+
+        return {
+            "workflow_id": workflow_id,
+            "generated_at": datetime.now().isoformat(),
+            "executions": self.executions,
+            "total_ms": _distribution(self._durations),
+            "nodes": nodes,
+        }
+
+
+def main():
+    """命令行接口"""
+    try:
+        from tools.n8n_workflow_manager import N8nWorkflowManager
+    except ModuleNotFoundError:  # 作为脚本直接运行
+        from n8n_workflow_manager import N8nWorkflowManager
+
+    parser = argparse.ArgumentParser(description='n8n Execution Profiler')
+    parser.add_argument('workflow_id', help='Workflow ID')
+    parser.add_argument('--executions', type=int, default=50, help='Number of recent executions to use')
+    parser.add_argument('--status', help='Only use executions with this status (e.g. success)')
+    parser.add_argument('--output', help='Write the profile JSON to this file')
+
+    args = parser.parse_args()
+
+    manager = N8nWorkflowManager()
+    try:
+        profile = ExecutionProfiler(manager).profile(args.workflow_id, args.executions, args.status)
+    except RuntimeError:
+        # 执行列表不完整，不输出部分样本的统计
+        sys.exit(1)
+    finally:
+        manager.close()
+
+    report = json.dumps(profile, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report)
+        logger.info(f"Profile saved to: {args.output}")
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
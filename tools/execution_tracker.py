@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+n8n Execution Tracker
+执行完成跟踪：单个轮询线程合并多个待完成执行的状态查询
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import time
+import asyncio
+import threading
+import logging
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from itertools import islice
+from typing import Dict, List, Any, Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# 执行结束的状态
+FINISHED_STATUSES = {'success', 'error', 'crashed', 'canceled', 'failed', 'completed'}
+
+
+def adaptive_intervals(initial: float = 0.25, maximum: float = 5.0,
+                       backoff: float = 1.5) -> Iterator[float]:
+    """
+    生成自适应轮询间隔：从较短的初始间隔开始按倍数增长，直到上限
+
+    Args:
+        initial: 初始间隔 (秒)
+        maximum: 最大间隔 (秒)
+        backoff: 增长倍数
+
+    Yields:
+        下一次轮询前的等待秒数
+    """
+    interval = initial
+    while True:
+        yield interval
+        interval = min(interval * backoff, maximum)
+
+
+def is_finished(execution: Dict[str, Any]) -> bool:
+    """判断执行记录是否已结束"""
+    status = execution.get('status')
+    if status:
+        return status in FINISHED_STATUSES
+    return bool(execution.get('finished') or execution.get('stoppedAt'))
+
+
+class _Pending:
+    """一个待完成的执行"""
+
+    def __init__(self, execution_id: str, workflow_id: Optional[str], intervals: Iterator[float]):
+        self.execution_id = execution_id
+        self.workflow_id = workflow_id
+        self.future: Future = Future()
+        self.intervals = intervals
+        self.next_poll = time.monotonic() + next(intervals)
+
+
+class ExecutionTracker:
+    """
+    执行完成跟踪器
+
+    所有待完成的执行共用一个后台轮询线程；同一工作流的多个执行
+    通过一次执行列表查询批量获取状态，找不到的再单独查询。
+    每个执行的轮询间隔独立地按指数增长。
+    """
+
+    def __init__(self, manager, initial_interval: float = 0.25, max_interval: float = 5.0,
+                 backoff: float = 1.5, include_data: bool = False):
+        """
+        初始化跟踪器
+
+        Args:
+            manager: N8nWorkflowManager 实例
+            initial_interval: 初始轮询间隔 (秒)
+            max_interval: 最大轮询间隔 (秒)
+            backoff: 间隔增长倍数
+            include_data: 完成后是否获取完整执行数据
+        """
+        self.manager = manager
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.include_data = include_data
+
+        self._pending: Dict[str, _Pending] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self.stats = {"polls": 0, "batched_queries": 0, "single_queries": 0, "completed": 0}
+
+    def track(self, execution_id: str, workflow_id: str = None,
+              callback: Callable[[Dict[str, Any]], None] = None) -> Future:
+        """
+        开始跟踪一个执行
+
+        Args:
+            execution_id: 执行ID
+            workflow_id: 工作流ID (提供时可与同工作流的其他执行批量查询)
+            callback: 完成时的回调，参数为执行记录
+
+        Returns:
+            完成时返回执行记录的 Future
+        """
+        execution_id = str(execution_id)
+        with self._cond:
+            pending = self._pending.get(execution_id)
+            if pending is None:
+                pending = _Pending(
+                    execution_id, workflow_id,
+                    adaptive_intervals(self.initial_interval, self.max_interval, self.backoff)
+                )
+                self._pending[execution_id] = pending
+                self._ensure_thread()
+                self._cond.notify()
+
+        if callback:
+            pending.future.add_done_callback(
+                lambda f: callback(f.result()) if not f.cancelled() and f.exception() is None else None
+            )
+        return pending.future
+
+    def wait(self, execution_id: str, timeout: float = None, workflow_id: str = None) -> Dict[str, Any]:
+        """
+        阻塞等待执行完成
+
+        Args:
+            execution_id: 执行ID
+            timeout: 最长等待秒数
+            workflow_id: 工作流ID
+
+        Returns:
+            执行记录，超时时返回 error
+        """
+        future = self.track(execution_id, workflow_id)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.untrack(execution_id)
+            return {"error": f"Timeout waiting for execution {execution_id}"}
+
+    async def wait_async(self, execution_id: str, timeout: float = None,
+                         workflow_id: str = None) -> Dict[str, Any]:
+        """
+        在异步代码中等待执行完成
+
+        Args:
+            execution_id: 执行ID
+            timeout: 最长等待秒数
+            workflow_id: 工作流ID
+
+        Returns:
+            执行记录，超时时返回 error
+        """
+        future = asyncio.wrap_future(self.track(execution_id, workflow_id))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.untrack(execution_id)
+            return {"error": f"Timeout waiting for execution {execution_id}"}
+
+    def wait_all(self, execution_ids: List[str], timeout: float = None) -> Dict[str, Dict[str, Any]]:
+        """
+        等待多个执行完成
+
+        Args:
+            execution_ids: 执行ID列表
+            timeout: 总的最长等待秒数
+
+        Returns:
+            {执行ID: 执行记录}
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        futures = {eid: self.track(eid) for eid in execution_ids}
+        results = {}
+        for execution_id, future in futures.items():
+            remaining = max(deadline - time.monotonic(), 0) if deadline else None
+            try:
+                results[execution_id] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                self.untrack(execution_id)
+                results[execution_id] = {"error": f"Timeout waiting for execution {execution_id}"}
+        return results
+
+    def untrack(self, execution_id: str):
+        """停止跟踪一个执行"""
+        with self._cond:
+            pending = self._pending.pop(str(execution_id), None)
+        if pending and not pending.future.done():
+            pending.future.cancel()
+
+    def stop(self):
+        """停止轮询线程，取消所有未完成的跟踪"""
+        with self._cond:
+            self._stopped = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._cond.notify()
+        for p in pending:
+            p.future.cancel()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='n8n-execution-tracker', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and not self._pending:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+
+                now = time.monotonic()
+                next_poll = min(p.next_poll for p in self._pending.values())
+                if next_poll > now:
+                    self._cond.wait(next_poll - now)
+                    continue
+
+                due = [p for p in self._pending.values() if p.next_poll <= now]
+
+            try:
+                self._poll(due)
+            except Exception as e:
+                logger.warning(f"⚠️ Execution poll failed: {e}")
+
+            now = time.monotonic()
+            for p in due:
+                p.next_poll = now + next(p.intervals)
+
+    def _poll(self, due: List[_Pending]):
+        """查询到期执行的状态，完成的执行从跟踪列表中移除"""
+        self.stats["polls"] += 1
+        found: Dict[str, Dict[str, Any]] = {}
+
+        by_workflow: Dict[str, List[_Pending]] = {}
+        for p in due:
+            if p.workflow_id:
+                by_workflow.setdefault(p.workflow_id, []).append(p)
+
+        # 同一工作流的多个执行：一次列表查询
+        for workflow_id, group in by_workflow.items():
+            if len(group) < 2:
+                continue
+            self.stats["batched_queries"] += 1
+            wanted = {p.execution_id for p in group}
+            page_size = min(max(len(group) * 2, 20), 250)
+            for execution in islice(self.manager.iter_executions(workflow_id, page_size=page_size), page_size):
+                if str(execution.get('id')) in wanted:
+                    found[str(execution['id'])] = execution
+
+        for p in due:
+            if p.execution_id not in found:
+                self.stats["single_queries"] += 1
+                execution = self.manager.get_execution(p.execution_id)
+                if not execution.get('error'):
+                    found[p.execution_id] = execution
+
+        for p in due:
+            execution = found.get(p.execution_id)
+            if not execution or not is_finished(execution):
+                continue
+            if self.include_data and 'data' not in execution:
+                execution = self.manager.get_execution(p.execution_id, include_data=True)
+
+            with self._cond:
+                self._pending.pop(p.execution_id, None)
+            self.stats["completed"] += 1
+            if not p.future.done():
+                p.future.set_result(execution)
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+n8n Fleet Analyzer
+批量分析整个目录、备份归档或 n8n 实例中的工作流
+
+工作流分发到进程池并行分析，每个工作流的结果以一行 JSON 流式写出，
+同时汇总为整体报告 (复杂度最高、瓶颈最多的工作流、安全问题统计等)。
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import os
+import json
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Tuple, Optional
+
+try:
+    from tools.api_client import get_config_value
+    from tools.workflow_analyzer import WorkflowAnalyzer
+except ModuleNotFoundError:  # 作为脚本直接运行
+    from api_client import get_config_value
+    from workflow_analyzer import WorkflowAnalyzer
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.xz', '.tar.zst')
+
+# 汇总报告中各排行榜的指标: (报告键, 记录字段)
+RANKINGS = (
+    ('most_complex', 'cyclomatic_complexity'),
+    ('most_bottlenecks', 'bottlenecks'),
+    ('slowest', 'latency_ms'),
+    ('most_security_issues', 'security_issues'),
+)
+
+# 每个工作进程复用的分析器 (节点耗时模型只加载一次)
+_worker_analyzer: Optional[WorkflowAnalyzer] = None
+_worker_options: Dict[str, Any] = {}
+
+
+def is_archive(path: str) -> bool:
+    """是否为备份归档 (backup_archive.py 生成的 tar 归档)"""
+    return str(path).endswith(ARCHIVE_SUFFIXES)
+
+
+def iter_workflow_files(directory: str) -> Iterator[Path]:
+    """
+    递归列出目录下的工作流 JSON 文件
+
+    Args:
+        directory: 目录
+
+    Yields:
+        文件路径 (按路径排序)
+    """
+    yield from sorted(p for p in Path(directory).rglob('*.json') if p.is_file())
+
+
+def iter_instance_workflows(manager, max_workers: int = 5) -> Iterator[Dict[str, Any]]:
+    """
+    读取 n8n 实例中所有工作流的完整内容
+
+    列表条目不含节点时由线程池并发获取完整内容 (与 backup_all 相同，经过工作流缓存)，
+    在途请求数有上限。
+
+    Args:
+        manager: N8nWorkflowManager 实例
+        max_workers: 并发获取数
+
+    Yields:
+        工作流对象，获取失败时为 {"id": ..., "error": ...}
+
+    Raises:
+        RuntimeError: 工作流列表读取失败
+    """
+    def fetch(entry):
+        workflow = manager.get_workflow(entry['id'], updated_at=entry.get('updatedAt'))
+        return {"id": entry['id'], **workflow} if workflow.get('error') else workflow
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for entry in manager.iter_workflows(prefetch=True, raise_errors=True):
+            if isinstance(entry.get('nodes'), list):
+                yield entry
+                continue
+            pending.add(executor.submit(fetch, entry))
+            if len(pending) >= max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+def summarize_analysis(source: str, workflow: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将单个工作流的分析结果压缩为一条记录
+
+    Args:
+        source: 来源 (文件路径、归档内ID或实例)
+        workflow: 工作流对象
+        results: WorkflowAnalyzer.analyze_workflow() 的结果
+
+    Returns:
+        汇总记录
+    """
+    complexity = results.get('complexity', {})
+    validation = results.get('validation', {})
+    security_issues = results.get('security', {}).get('issues', [])
+
+    severity: Dict[str, int] = {}
+    for issue in security_issues:
+        level = issue.get('severity', 'unknown')
+        severity[level] = severity.get(level, 0) + 1
+
+    return {
+        "source": source,
+        "id": workflow.get('id'),
+        "name": workflow.get('name'),
+        "active": workflow.get('active', False),
+        "nodes": results.get('basic_info', {}).get('node_count', 0),
+        "connections": results.get('basic_info', {}).get('connection_count', 0),
+        "cyclomatic_complexity": complexity.get('cyclomatic_complexity', 0),
+        "cognitive_complexity": complexity.get('cognitive_complexity', 0),
+        "complexity_level": complexity.get('complexity_level'),
+        "latency_ms": results.get('critical_path', {}).get('latency_ms', 0.0),
+        "has_cycles": results.get('structure', {}).get('has_cycles', False),
+        "bottlenecks": len(results.get('bottlenecks', [])),
+        "security_issues": len(security_issues),
+        "security_by_severity": severity,
+        "security_issue_types": sorted({issue.get('issue') for issue in security_issues}),
+        "validation_errors": len(validation.get('errors', [])),
+        "validation_warnings": len(validation.get('warnings', [])),
+        "optimizations": len(results.get('optimizations', [])),
+    }
+
+
+def _init_worker(options: Dict[str, Any]):
+    """工作进程初始化：创建分析器并关闭逐个工作流的 INFO 日志"""
+    global _worker_analyzer, _worker_options
+    logging.getLogger('tools.workflow_analyzer').setLevel(logging.WARNING)
+    logging.getLogger('workflow_analyzer').setLevel(logging.WARNING)
+    _worker_options = options
+    _worker_analyzer = WorkflowAnalyzer(graph_backend=options.get('graph_backend', 'compact'),
+                                        cache_dir=options.get('cache_dir'))
+    # 每个工作流只分析一次，不需要在内存中按内容摘要缓存结果
+    _worker_analyzer.memo_size = 0
+
+
+def load_task(task: Tuple[str, Optional[str], Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    读取任务对应的工作流
+
+    Args:
+        task: (来源, 文件路径, 工作流对象)；目录来源只有路径
+
+    Returns:
+        工作流对象
+
+    Raises:
+        ValueError: 不是工作流 (没有 nodes 列表)
+        OSError / json.JSONDecodeError: 文件无法读取
+    """
+    source, path, workflow = task
+    if workflow is None:
+        with open(path, 'r', encoding='utf-8') as f:
+            workflow = json.load(f)
+    if not isinstance(workflow, dict) or not isinstance(workflow.get('nodes'), list):
+        error = workflow.get('error') if isinstance(workflow, dict) else None
+        raise ValueError(error or "Not a workflow (no nodes list)")
+    return workflow
+
+
+def _analyze_task(task: Tuple[str, Optional[str], Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    在工作进程中分析一个工作流
+
+    Args:
+        task: (来源, 文件路径, 工作流对象)；目录来源只传路径，由工作进程读取文件
+
+    Returns:
+        汇总记录，失败时包含 error
+    """
+    source = task[0]
+    try:
+        workflow = load_task(task)
+        results = _worker_analyzer.analyze_workflow(workflow)
+        record = summarize_analysis(source, workflow, results)
+        record["cached"] = _worker_analyzer.last_cache_hit
+        if _worker_options.get('full'):
+            record["analysis"] = json.loads(json.dumps(results, default=str))
+        return record
+    except Exception as e:
+        return {"source": source, "error": str(e)}
+
+
+class FleetReport:
+    """
+    批量分析的汇总报告 (逐条加入记录，不保留全部结果)
+    """
+
+    def __init__(self, top: int = 10):
+        """
+        Args:
+            top: 每个排行榜保留的工作流数
+        """
+        self.top = top
+        self.totals = {"workflows": 0, "analyzed": 0, "failed": 0, "cached": 0, "active": 0, "nodes": 0,
+                       "connections": 0, "with_cycles": 0, "invalid": 0, "with_security_issues": 0}
+        self.complexity_levels: Dict[str, int] = {}
+        self.security_by_severity: Dict[str, int] = {}
+        self.security_by_type: Dict[str, int] = {}
+        self.rankings: Dict[str, List[Dict[str, Any]]] = {key: [] for key, _ in RANKINGS}
+        self.failures: List[Dict[str, Any]] = []
+
+    def add(self, record: Dict[str, Any]):
+        """加入一条汇总记录"""
+        self.totals["workflows"] += 1
+        if record.get('error'):
+            self.totals["failed"] += 1
+            self.failures.append({"source": record.get('source'), "error": record['error']})
+            return
+
+        self.totals["analyzed"] += 1
+        self.totals["cached"] += 1 if record.get('cached') else 0
+        self.totals["active"] += 1 if record.get('active') else 0
+        self.totals["nodes"] += record.get('nodes', 0)
+        self.totals["connections"] += record.get('connections', 0)
+        self.totals["with_cycles"] += 1 if record.get('has_cycles') else 0
+        self.totals["invalid"] += 1 if record.get('validation_errors') else 0
+        self.totals["with_security_issues"] += 1 if record.get('security_issues') else 0
+
+        level = record.get('complexity_level') or 'unknown'
+        self.complexity_levels[level] = self.complexity_levels.get(level, 0) + 1
+        for severity, count in record.get('security_by_severity', {}).items():
+            self.security_by_severity[severity] = self.security_by_severity.get(severity, 0) + count
+        for issue in record.get('security_issue_types', []):
+            self.security_by_type[issue] = self.security_by_type.get(issue, 0) + 1
+
+        for key, field in RANKINGS:
+            value = record.get(field) or 0
+            if not value:
+                continue
+            ranking = self.rankings[key]
+            ranking.append({"source": record['source'], "id": record.get('id'),
+                            "name": record.get('name'), field: value})
+            ranking.sort(key=lambda entry: entry[field], reverse=True)
+            del ranking[self.top:]
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        汇总结果
+
+        Returns:
+            totals、complexity_levels、security (按严重程度/问题类型统计的工作流数)、
+            各排行榜和分析失败的来源
+        """
+        analyzed = self.totals["analyzed"]
+        return {
+            "generated_at": datetime.now().isoformat(),
+            "totals": dict(self.totals),
+            "average_nodes": round(self.totals["nodes"] / analyzed, 2) if analyzed else 0,
+            "complexity_levels": dict(self.complexity_levels),
+            "security": {
+                "by_severity": dict(self.security_by_severity),
+                "workflows_by_issue": dict(sorted(self.security_by_type.items(),
+                                                  key=lambda item: item[1], reverse=True)),
+            },
+            **{key: list(ranking) for key, ranking in self.rankings.items()},
+            "failures": list(self.failures),
+        }
+
+
+def format_fleet_report(summary: Dict[str, Any]) -> str:
+    """
+    生成 Markdown 格式的汇总报告
+
+    Args:
+        summary: FleetReport.summary() 或 analyze_fleet() 的结果
+
+    Returns:
+        报告文本
+    """
+    totals = summary["totals"]
+    lines = [
+        "# Workflow Fleet Report",
+        "",
+        f"Generated: {summary['generated_at']}",
+        "",
+        "## Totals",
+        f"- Workflows: {totals['workflows']} ({totals['analyzed']} analyzed, {totals['failed']} failed)",
+        f"- Answered from cache: {totals['cached']}",
+        f"- Active: {totals['active']}",
+        f"- Nodes: {totals['nodes']} (average {summary['average_nodes']})",
+        f"- With cycles: {totals['with_cycles']}",
+        f"- With validation errors: {totals['invalid']}",
+        f"- With security issues: {totals['with_security_issues']}",
+        "",
+        "## Complexity Levels",
+    ]
+    lines += [f"- {level}: {count}" for level, count in summary["complexity_levels"].items()]
+
+    lines += ["", "## Security Issues"]
+    lines += [f"- {severity}: {count}" for severity, count in summary["security"]["by_severity"].items()]
+    lines += [f"- {issue}: {count} workflows" for issue, count in summary["security"]["workflows_by_issue"].items()]
+
+    titles = {
+        'most_complex': ('Most Complex', 'cyclomatic_complexity'),
+        'most_bottlenecks': ('Most Bottlenecks', 'bottlenecks'),
+        'slowest': ('Slowest (projected latency ms)', 'latency_ms'),
+        'most_security_issues': ('Most Security Issues', 'security_issues'),
+    }
+    for key, (title, field) in titles.items():
+        if summary[key]:
+            lines += ["", f"## {title}"]
+            lines += [f"- {entry['name'] or entry['id']} ({entry['source']}): {entry[field]}"
+                      for entry in summary[key]]
+
+    if summary["failures"]:
+        lines += ["", "## Failures"]
+        lines += [f"- {failure['source']}: {failure['error']}" for failure in summary["failures"]]
+
+    return "\n".join(lines)
+
+
+def iter_tasks(source: str = None, from_instance: bool = False,
+               manager=None) -> Iterator[Tuple[str, Optional[str], Optional[Dict[str, Any]]]]:
+    """
+    列出待分析的工作流
+
+    Args:
+        source: 目录或备份归档路径
+        from_instance: 是否从 n8n 实例读取所有工作流
+        manager: N8nWorkflowManager 实例 (from_instance 时使用，默认新建)
+
+    Yields:
+        (来源, 文件路径, 工作流对象)
+    """
+    if from_instance:
+        if manager is None:
+            try:
+                from tools.n8n_workflow_manager import N8nWorkflowManager
+            except ModuleNotFoundError:  # 作为脚本直接运行
+                from n8n_workflow_manager import N8nWorkflowManager
+            manager = N8nWorkflowManager()
+        max_workers = int(get_config_value(manager.config, 'advanced.max_concurrent', 5))
+        for workflow in iter_instance_workflows(manager, max_workers):
+            yield f"instance:{workflow.get('id')}", None, workflow
+    elif source and is_archive(source):
+        try:
+            from tools.backup_archive import load_restore_point
+        except ModuleNotFoundError:  # 作为脚本直接运行
+            from backup_archive import load_restore_point
+        for workflow_id, workflow in load_restore_point(source).items():
+            yield f"{Path(source).name}:{workflow_id}", None, workflow
+    elif source and Path(source).is_dir():
+        for path in iter_workflow_files(source):
+            yield str(path), str(path), None
+    elif source and Path(source).is_file():
+        yield source, source, None
+    else:
+        raise FileNotFoundError(f"No such directory or archive: {source}")
+
+
+def analyze_fleet(tasks, output: str = None, max_workers: int = None, top: int = 10,
+                  full: bool = False, graph_backend: str = 'compact', cache_dir: str = None) -> Dict[str, Any]:
+    """
+    并行分析一批工作流
+
+    Args:
+        tasks: iter_tasks() 的结果
+        output: 逐个工作流结果的 JSON Lines 输出路径 (为空时不写出)
+        max_workers: 进程数 (默认 CPU 核数，1 表示在当前进程内分析)
+        top: 每个排行榜保留的工作流数
+        full: 是否在每行中包含完整的分析结果
+        graph_backend: 图实现 (compact | networkx)
+        cache_dir: 分析结果持久缓存目录 (为空时不使用)，内容未变的工作流直接读取缓存
+
+    Returns:
+        FleetReport.summary() 的结果，附加 duration 和 output
+    """
+    started = time.time()
+    tasks = list(tasks)
+    options = {"full": full, "graph_backend": graph_backend, "cache_dir": cache_dir}
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(tasks) or 1))
+    report = FleetReport(top)
+
+    out = None
+    if output:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        out = open(output, 'w', encoding='utf-8')
+
+    try:
+        if max_workers == 1:
+            _init_worker(options)
+            records = map(_analyze_task, tasks)
+            executor = None
+        else:
+            # 每个进程一次领取一批，减少进程间通信
+            chunksize = max(1, len(tasks) // (max_workers * 4))
+            executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                           initargs=(options,))
+            records = executor.map(_analyze_task, tasks, chunksize=chunksize)
+
+        try:
+            for record in records:
+                report.add(record)
+                if out:
+                    out.write(json.dumps(record, ensure_ascii=False, default=str))
+                    out.write('\n')
+        finally:
+            if executor:
+                executor.shutdown()
+    finally:
+        if out:
+            out.close()
+
+    summary = report.summary()
+    summary["duration"] = round(time.time() - started, 3)
+    summary["output"] = output
+    summary["workers"] = max_workers
+    logger.info(f"✅ Analyzed {summary['totals']['analyzed']}/{summary['totals']['workflows']} workflows "
+                f"in {summary['duration']}s with {max_workers} workers")
+    if summary['totals']['failed']:
+        logger.warning(f"⚠️ {summary['totals']['failed']} workflows could not be analyzed")
+    return summary
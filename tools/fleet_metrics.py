@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+n8n Fleet Metrics
+列式的工作流集合统计 (pandas / NumPy)
+
+所有工作流一次性载入为节点表和边表 (每行一个节点 / 一条去重后的边)，
+复杂度、节点类型分布、度数统计和异常值检测都按工作流分组向量化计算，
+不为每个工作流构建图或运行完整分析。指标的定义与 WorkflowAnalyzer 的
+basic_info / complexity 一致，适合对成千上万个工作流做概览；
+单个工作流的详细分析仍使用 analyze-dir。
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import json
+import time
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Tuple, Optional
+
+try:
+    from tools.fleet_analyzer import load_task
+    from tools.workflow_model import WorkflowModel
+except ModuleNotFoundError:  # 作为脚本直接运行
+    from fleet_analyzer import load_task
+    from workflow_model import WorkflowModel
+
+logger = logging.getLogger(__name__)
+
+# 异常值检测使用的指标
+OUTLIER_METRICS = ('nodes', 'connections', 'cyclomatic_complexity', 'cognitive_complexity',
+                   'max_node_connections')
+
+# 修正 z 分数 (基于中位数和 MAD) 超过此值视为异常值
+OUTLIER_THRESHOLD = 3.5
+
+# 认知复杂度：按节点类型关键字的分值 (同一组内只取第一个匹配，与 WorkflowAnalyzer 一致)
+COGNITIVE_WEIGHTS = (
+    (('if', 2), ('switch', 3), ('loop', 3)),
+    (('error', 1),),
+    (('code', 2), ('function', 2)),
+)
+
+
+def _pandas_module():
+    """可选依赖 pandas"""
+    try:
+        import pandas
+        return pandas
+    except ImportError:
+        return None
+
+
+def _connected_labels(np, count: int, sources, targets):
+    """
+    弱连通分量标签 (向量化的最小标签传播 + 指针跳跃)
+
+    每轮把每条边两端的标签都降为两者中较小的一个，再令 label = label[label]
+    压缩路径；收敛时同一分量内的标签相同。轮数约为分量直径的对数。
+    """
+    labels = np.arange(count, dtype=np.int64)
+    if not len(sources):
+        return labels
+    while True:
+        low = np.minimum(labels[sources], labels[targets])
+        updated = labels.copy()
+        np.minimum.at(updated, sources, low)
+        np.minimum.at(updated, targets, low)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+class FleetFrames:
+    """
+    工作流集合的列式表示
+
+    Attributes:
+        workflows: 每个工作流一行 (source, id, name, active, connections)
+        nodes: 每个节点一行 (workflow 为 workflows 的行号，key 为全局节点编号)
+        edges: 每条去重后的边一行 (source/target 为全局节点编号)
+        failures: 无法读取的来源 [{source, error}]
+    """
+
+    def __init__(self, tasks: Iterable[Tuple[str, Optional[str], Optional[Dict[str, Any]]]]):
+        """
+        载入工作流
+
+        Args:
+            tasks: fleet_analyzer.iter_tasks() 的结果
+
+        Raises:
+            RuntimeError: 未安装 pandas
+        """
+        pd = _pandas_module()
+        if pd is None:
+            raise RuntimeError("pandas is required for columnar fleet metrics (pip install pandas numpy)")
+        self.pd = pd
+        import numpy
+        self.np = numpy
+
+        workflow_rows: Dict[str, List[Any]] = {"source": [], "id": [], "name": [], "active": [], "connections": []}
+        node_workflow, node_key, node_type, node_unique = [], [], [], []
+        edge_source, edge_target = [], []
+        self.failures: List[Dict[str, Any]] = []
+
+        for task in tasks:
+            try:
+                workflow = load_task(task)
+                model = WorkflowModel(workflow)
+            except Exception as e:
+                self.failures.append({"source": task[0], "error": str(e)})
+                continue
+
+            row = len(workflow_rows["source"])
+            workflow_rows["source"].append(task[0])
+            workflow_rows["id"].append(workflow.get('id'))
+            workflow_rows["name"].append(workflow.get('name'))
+            workflow_rows["active"].append(bool(workflow.get('active', False)))
+            workflow_rows["connections"].append(len(model.connections))
+
+            # 重复ID的节点在图中只算一个 (最后一个的类型生效，与分析器的索引一致)
+            keys: Dict[str, int] = {}
+            for node in model.nodes:
+                node_id = model.node_id(node)
+                if node_id in keys:
+                    node_unique[keys[node_id]] = False
+                keys[node_id] = len(node_key)
+                node_workflow.append(row)
+                node_key.append(len(node_key))
+                node_type.append(node.get('type', '') or '')
+                node_unique.append(True)
+            for conn in model.connections:
+                edge_source.append(keys[conn.source])
+                edge_target.append(keys[conn.target])
+
+        np = numpy
+        self.workflows = pd.DataFrame(workflow_rows)
+        self.nodes = pd.DataFrame({
+            "workflow": np.asarray(node_workflow, dtype=np.int64),
+            "key": np.asarray(node_key, dtype=np.int64),
+            "type": pd.Series(node_type, dtype=object),
+            "unique": np.asarray(node_unique, dtype=bool),
+        })
+        pairs = np.unique(np.column_stack([np.asarray(edge_source, dtype=np.int64),
+                                           np.asarray(edge_target, dtype=np.int64)]).reshape(-1, 2), axis=0)
+        self.edges = pd.DataFrame({"source": pairs[:, 0], "target": pairs[:, 1]})
+        self._node_metrics = None
+
+    def __len__(self) -> int:
+        return len(self.workflows)
+
+    def node_metrics(self):
+        """
+        每个节点的类型和度数 (计算一次后缓存)
+
+        Returns:
+            DataFrame: workflow, key, type, base_type, unique, in_degree, out_degree, cognitive
+        """
+        if self._node_metrics is not None:
+            return self._node_metrics
+        np = self.np
+        nodes = self.nodes.copy()
+        count = len(nodes)
+
+        types = nodes["type"].astype(str)
+        base_type = types.str.split('.').str[-1]
+        nodes["base_type"] = base_type.where(types != '', 'unknown')
+
+        nodes["out_degree"] = np.bincount(self.edges["source"].to_numpy(), minlength=count)
+        nodes["in_degree"] = np.bincount(self.edges["target"].to_numpy(), minlength=count)
+
+        lowered = types.str.lower()
+        cognitive = np.zeros(count, dtype=np.int64)
+        for group in COGNITIVE_WEIGHTS:
+            conditions = [lowered.str.contains(keyword, regex=False).to_numpy() for keyword, _ in group]
+            cognitive += np.select(conditions, [weight for _, weight in group], 0)
+        nodes["cognitive"] = cognitive
+        self._node_metrics = nodes
+        return nodes
+
+    def workflow_metrics(self):
+        """
+        每个工作流的复杂度和度数统计 (全部为分组向量化计算)
+
+        Returns:
+            DataFrame: 每个工作流一行，复杂度定义与 WorkflowAnalyzer.analyze_complexity 相同
+        """
+        pd, np = self.pd, self.np
+        nodes = self.node_metrics()
+        graph_nodes = nodes[nodes["unique"]]
+
+        metrics = self.workflows.copy()
+        metrics["nodes"] = nodes.groupby("workflow").size().reindex(metrics.index, fill_value=0)
+
+        labels = _connected_labels(np, len(nodes), self.edges["source"].to_numpy(), self.edges["target"].to_numpy())
+        components = pd.Series(labels[graph_nodes["key"].to_numpy()], index=graph_nodes.index)
+        metrics["components"] = components.groupby(graph_nodes["workflow"]).nunique().reindex(
+            metrics.index, fill_value=0)
+
+        degree = graph_nodes["in_degree"] + graph_nodes["out_degree"]
+        flags = pd.DataFrame({
+            "workflow": graph_nodes["workflow"],
+            "degree": degree,
+            "entry_nodes": graph_nodes["in_degree"] == 0,
+            "exit_nodes": graph_nodes["out_degree"] == 0,
+            "branch_points": graph_nodes["out_degree"] > 1,
+            "merge_points": graph_nodes["in_degree"] > 1,
+            "isolated_nodes": degree == 0,
+            "cognitive": graph_nodes["cognitive"],
+        })
+        grouped = flags.groupby("workflow").agg(
+            max_node_connections=("degree", "max"),
+            mean_degree=("degree", "mean"),
+            entry_nodes=("entry_nodes", "sum"),
+            exit_nodes=("exit_nodes", "sum"),
+            branch_points=("branch_points", "sum"),
+            merge_points=("merge_points", "sum"),
+            isolated_nodes=("isolated_nodes", "sum"),
+            node_cognitive=("cognitive", "sum"),
+        ).reindex(metrics.index, fill_value=0)
+        metrics = metrics.join(grouped)
+
+        # 空工作流按一个连通分量计 (与分析器一致)
+        metrics["cyclomatic_complexity"] = (metrics["connections"] - metrics["nodes"]
+                                            + 2 * metrics["components"].clip(lower=1))
+        metrics["cognitive_complexity"] = metrics.pop("node_cognitive") + metrics["branch_points"]
+        metrics["complexity_level"] = pd.cut(
+            metrics["cyclomatic_complexity"], bins=[-np.inf, 5, 10, 20, np.inf],
+            labels=["Simple", "Moderate", "Complex", "Very Complex"]
+        ).astype(str)
+        metrics["average_connections"] = (metrics["connections"] / metrics["nodes"].where(metrics["nodes"] > 0)).fillna(0)
+        metrics["mean_degree"] = metrics["mean_degree"].astype(float).round(3)
+        for column in ("max_node_connections", "entry_nodes", "exit_nodes", "branch_points",
+                       "merge_points", "isolated_nodes"):
+            metrics[column] = metrics[column].astype(np.int64)
+        return metrics
+
+    def node_type_counts(self):
+        """
+        节点类型直方图
+
+        Returns:
+            (全体工作流的 {基础类型: 节点数} Series 降序, 工作流 x 基础类型的计数表)
+        """
+        nodes = self.node_metrics()
+        fleet = nodes["base_type"].value_counts()
+        per_workflow = nodes.groupby(["workflow", "base_type"]).size().unstack(fill_value=0)
+        return fleet, per_workflow
+
+    def degree_distribution(self):
+        """全体节点 (入度 + 出度) 的分布 {度数: 节点数}"""
+        nodes = self.node_metrics()
+        nodes = nodes[nodes["unique"]]
+        return (nodes["in_degree"] + nodes["out_degree"]).value_counts().sort_index()
+
+    def outliers(self, metrics=None, threshold: float = OUTLIER_THRESHOLD):
+        """
+        按修正 z 分数检测异常的工作流
+
+        z = 0.6745 * (x - 中位数) / MAD；MAD 为 0 时改用平均绝对偏差 (z = (x - 中位数) / (1.2533 * MeanAD))。
+
+        Args:
+            metrics: workflow_metrics() 的结果 (默认重新计算)
+            threshold: |z| 超过此值视为异常
+
+        Returns:
+            DataFrame: source, name, metric, value, median, score，按 |score| 降序
+        """
+        pd, np = self.pd, self.np
+        if metrics is None:
+            metrics = self.workflow_metrics()
+
+        frames = []
+        for metric in OUTLIER_METRICS:
+            values = metrics[metric].astype(float)
+            if values.empty:
+                continue
+            median = values.median()
+            deviation = (values - median).abs()
+            mad = deviation.median()
+            if mad > 0:
+                score = 0.6745 * (values - median) / mad
+            else:
+                mean_ad = deviation.mean()
+                if mean_ad == 0:
+                    continue
+                score = (values - median) / (1.2533 * mean_ad)
+            flagged = score.abs() > threshold
+            if flagged.any():
+                frames.append(pd.DataFrame({
+                    "source": metrics.loc[flagged, "source"],
+                    "name": metrics.loc[flagged, "name"],
+                    "metric": metric,
+                    "value": values[flagged],
+                    "median": median,
+                    "score": score[flagged].round(2),
+                }))
+
+        if not frames:
+            return pd.DataFrame(columns=["source", "name", "metric", "value", "median", "score"])
+        result = pd.concat(frames, ignore_index=True)
+        return result.iloc[np.argsort(-result["score"].abs().to_numpy(), kind='stable')]
+
+
+def summarize_metrics(frames: FleetFrames, metrics, top: int = 10) -> Dict[str, Any]:
+    """
+    汇总列式统计结果
+
+    Args:
+        frames: 载入的工作流集合
+        metrics: frames.workflow_metrics() 的结果
+        top: 各排行榜和异常值列表保留的条目数
+
+    Returns:
+        totals、complexity_levels、node_types、degree_distribution、metric_stats、most_complex、outliers、failures
+    """
+    fleet_types, _ = frames.node_type_counts()
+    outliers = frames.outliers(metrics)
+    stats = metrics[list(OUTLIER_METRICS) + ['mean_degree']].describe(percentiles=[0.5, 0.95]).round(2)
+
+    def records(frame) -> List[Dict[str, Any]]:
+        return json.loads(frame.to_json(orient='records', force_ascii=False))
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "totals": {
+            "workflows": len(metrics) + len(frames.failures),
+            "analyzed": len(metrics),
+            "failed": len(frames.failures),
+            "active": int(metrics["active"].sum()),
+            "nodes": int(metrics["nodes"].sum()),
+            "connections": int(metrics["connections"].sum()),
+        },
+        "average_nodes": round(float(metrics["nodes"].mean()), 2) if len(metrics) else 0,
+        "complexity_levels": {level: int(count) for level, count in metrics["complexity_level"].value_counts().items()},
+        "node_types": {node_type: int(count) for node_type, count in fleet_types.items()},
+        "degree_distribution": {int(degree): int(count) for degree, count in frames.degree_distribution().items()},
+        "metric_stats": json.loads(stats.to_json()),
+        "most_complex": records(metrics.nlargest(top, "cyclomatic_complexity")[
+            ["source", "id", "name", "cyclomatic_complexity"]]),
+        "outliers": records(outliers.head(top)),
+        "outlier_workflows": int(outliers["source"].nunique()),
+        "failures": list(frames.failures),
+    }
+
+
+def format_metrics_report(summary: Dict[str, Any], top_types: int = 15) -> str:
+    """
+    生成 Markdown 格式的列式统计报告
+
+    Args:
+        summary: summarize_metrics() 的结果
+        top_types: 列出的节点类型数
+
+    Returns:
+        报告文本
+    """
+    totals = summary["totals"]
+    lines = [
+        "# Workflow Fleet Metrics",
+        "",
+        f"Generated: {summary['generated_at']}",
+        "",
+        "## Totals",
+        f"- Workflows: {totals['workflows']} ({totals['analyzed']} loaded, {totals['failed']} failed)",
+        f"- Active: {totals['active']}",
+        f"- Nodes: {totals['nodes']} (average {summary['average_nodes']})",
+        f"- Connections: {totals['connections']}",
+        f"- Outlier workflows: {summary['outlier_workflows']}",
+        "",
+        "## Complexity Levels",
+    ]
+    lines += [f"- {level}: {count}" for level, count in summary["complexity_levels"].items()]
+
+    lines += ["", "## Metric Distribution", "",
+              "| Metric | Mean | Median | P95 | Max |", "|---|---|---|---|---|"]
+    for metric, stats in summary["metric_stats"].items():
+        lines.append(f"| {metric} | {stats['mean']} | {stats['50%']} | {stats['95%']} | {stats['max']} |")
+
+    lines += ["", "## Node Types"]
+    lines += [f"- {node_type}: {count}" for node_type, count in list(summary["node_types"].items())[:top_types]]
+
+    lines += ["", "## Degree Distribution (in + out)"]
+    lines += [f"- {degree}: {count} nodes" for degree, count in summary["degree_distribution"].items()]
+
+    if summary["most_complex"]:
+        lines += ["", "## Most Complex"]
+        lines += [f"- {entry['name'] or entry['id']} ({entry['source']}): {entry['cyclomatic_complexity']}"
+                  for entry in summary["most_complex"]]
+
+    if summary["outliers"]:
+        lines += ["", "## Outliers"]
+        lines += [f"- {entry['name'] or entry['source']} ({entry['source']}): {entry['metric']} = "
+                  f"{entry['value']:g} (median {entry['median']:g}, z {entry['score']})"
+                  for entry in summary["outliers"]]
+
+    if summary["failures"]:
+        lines += ["", "## Failures"]
+        lines += [f"- {failure['source']}: {failure['error']}" for failure in summary["failures"]]
+
+    return "\n".join(lines)
+
+
+def fleet_metrics(tasks, output: str = None, top: int = 10) -> Dict[str, Any]:
+    """
+    列式统计一批工作流
+
+    Args:
+        tasks: fleet_analyzer.iter_tasks() 的结果
+        output: 每个工作流指标的 JSON Lines 输出路径 (为空时不写出)
+        top: 各排行榜和异常值列表保留的条目数
+
+    Returns:
+        summarize_metrics() 的结果，附加 duration 和 output
+    """
+    started = time.time()
+    frames = FleetFrames(tasks)
+    loaded = time.time()
+    metrics = frames.workflow_metrics()
+    summary = summarize_metrics(frames, metrics, top)
+
+    if output:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        metrics.to_json(output, orient='records', lines=True, force_ascii=False)
+
+    summary["duration"] = round(time.time() - started, 3)
+    summary["load_duration"] = round(loaded - started, 3)
+    summary["output"] = output
+    logger.info(f"✅ Computed metrics for {len(frames)} workflows in {summary['duration']}s "
+                f"(loading {summary['load_duration']}s)")
+    if frames.failures:
+        logger.warning(f"⚠️ {len(frames.failures)} workflows could not be loaded")
+    return summary
@@ -7,17 +7,47 @@ Author: AI Terminal Team
 Version: 1.0.0
 """
 
+import copy
 import json
 import os
 import sys
+import threading
 import time
 import requests
 import argparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from itertools import islice
+from typing import Dict, List, Any, Optional, Iterator, Union
 from pathlib import Path
 import logging
 
+try:
+    from tools.api_client import (
+        load_agent_config, get_config_value, create_session, get_timeout,
+        RetryPolicy, request_with_retry, parse_timestamp
+    )
+    from tools.backup_archive import BackupArchiveWriter, BackupIndex, load_restore_point
+    from tools.workflow_cache import WorkflowCache
+    from tools.execution_tracker import ExecutionTracker
+    from tools.rate_limiter import get_rate_limiter
+    from tools.execution_export import (
+        EXPORT_WRITERS, ExportCheckpoint, detect_format, flatten_execution
+    )
+except ModuleNotFoundError:  # 作为脚本直接运行
+    from api_client import (
+        load_agent_config, get_config_value, create_session, get_timeout,
+        RetryPolicy, request_with_retry, parse_timestamp
+    )
+    from backup_archive import BackupArchiveWriter, BackupIndex, load_restore_point
+    from workflow_cache import WorkflowCache
+    from execution_tracker import ExecutionTracker
+    from rate_limiter import get_rate_limiter
+    from execution_export import (
+        EXPORT_WRITERS, ExportCheckpoint, detect_format, flatten_execution
+    )
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -25,18 +55,184 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 引用其他工作流的节点类型
+SUBWORKFLOW_NODE_TYPES = {
+    'n8n-nodes-base.executeWorkflow',
+    '@n8n/n8n-nodes-langchain.toolWorkflow'
+}
+
+
+def _subworkflow_params(workflow: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """遍历引用数据库中工作流的节点参数"""
+    for node in workflow.get('nodes', []):
+        if node.get('type') not in SUBWORKFLOW_NODE_TYPES:
+            continue
+        params = node.get('parameters', {})
+        if params.get('source', 'database') == 'database' and params.get('workflowId'):
+            yield params
+
+
+def get_subworkflow_refs(workflow: Dict[str, Any]) -> List[str]:
+    """
+    获取工作流通过 Execute Workflow 节点引用的子工作流ID
+
+    Args:
+        workflow: 工作流对象
+
+    Returns:
+        子工作流ID列表 (表达式引用无法静态解析，会被忽略)
+    """
+    refs = []
+    for params in _subworkflow_params(workflow):
+        value = params['workflowId']
+        if isinstance(value, dict):
+            value = value.get('value')
+        if isinstance(value, (str, int)) and not str(value).startswith('='):
+            refs.append(str(value))
+    return refs
+
+
+def remap_subworkflow_refs(workflow: Dict[str, Any], id_map: Dict[str, str]) -> List[str]:
+    """
+    将工作流中的子工作流引用替换为新ID
+
+    Args:
+        workflow: 工作流对象 (原地修改)
+        id_map: {旧ID: 新ID}
+
+    Returns:
+        未能替换的引用
+    """
+    unresolved = []
+    for params in _subworkflow_params(workflow):
+        value = params['workflowId']
+        old_id = str(value.get('value')) if isinstance(value, dict) else str(value)
+        if old_id.startswith('='):
+            continue
+        if old_id not in id_map:
+            unresolved.append(old_id)
+        elif isinstance(value, dict):
+            value['value'] = id_map[old_id]
+            value.pop('cachedResultUrl', None)
+        else:
+            params['workflowId'] = id_map[old_id]
+    return unresolved
+
+
+# 服务端维护的字段，不参与差异比较
+READONLY_WORKFLOW_FIELDS = {'id', 'createdAt', 'updatedAt', 'versionId'}
+
+
+def apply_workflow_changes(workflow: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将变更应用到工作流副本
+
+    Args:
+        workflow: 当前工作流 (不会被修改)
+        changes: 变更 (nodes / connections / add_node / remove_node / 其他顶层字段)
+
+    Returns:
+        变更后的工作流
+    """
+    updated = copy.deepcopy(workflow)
+    for key, value in changes.items():
+        if key == "nodes" and isinstance(value, list):
+            # 添加或更新节点
+            updated["nodes"] = value
+        elif key == "connections":
+            # 更新连接
+            updated["connections"] = value
+        elif key == "add_node":
+            # 添加单个节点
+            updated.setdefault("nodes", []).append(value)
+        elif key == "remove_node":
+            # 移除节点
+            updated["nodes"] = [n for n in updated.get("nodes", []) if n["id"] != value]
+        else:
+            updated[key] = value
+    return updated
+
+
+def _diff_keyed(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, List[str]]:
+    return {
+        "added": [k for k in new if k not in old],
+        "removed": [k for k in old if k not in new],
+        "modified": [k for k in new if k in old and new[k] != old[k]]
+    }
+
+
+def diff_workflows(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    计算两个工作流版本的结构差异
+
+    Args:
+        old: 原工作流
+        new: 新工作流
+
+    Returns:
+        {"fields": 有变化的顶层字段,
+         "nodes": {"added", "removed", "modified"} (按节点ID),
+         "connections": {"added", "removed", "modified"} (按源节点名称)}
+    """
+    fields = [
+        key for key in set(old) | set(new)
+        if key not in READONLY_WORKFLOW_FIELDS and old.get(key) != new.get(key)
+    ]
+
+    def by_id(nodes):
+        return {n.get('id') or n.get('name'): n for n in nodes or []}
+
+    return {
+        "fields": sorted(fields),
+        "nodes": _diff_keyed(by_id(old.get('nodes')), by_id(new.get('nodes'))),
+        "connections": _diff_keyed(old.get('connections') or {}, new.get('connections') or {})
+    }
+
+
+def load_workflow_source(source: str) -> Dict[str, Dict[str, Any]]:
+    """
+    从目录、JSON文件或备份归档加载工作流
+
+    Args:
+        source: 目录 / .json 文件 / backup-all 归档
+
+    Returns:
+        {工作流ID: 工作流对象}，没有ID的工作流以文件名为键
+    """
+    path = Path(source)
+    if path.is_dir():
+        files = sorted(path.glob('*.json'))
+    elif path.suffix == '.json':
+        files = [path]
+    else:
+        return load_restore_point(str(path))
+
+    workflows = {}
+    for file in files:
+        try:
+            with open(file, 'r', encoding='utf-8') as f:
+                workflow = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Skipping {file}: {e}")
+            continue
+        if isinstance(workflow, dict) and 'nodes' in workflow:
+            workflows[str(workflow.get('id') or file.stem)] = workflow
+    return workflows
+
 
 class N8nWorkflowManager:
     """n8n工作流管理器"""
 
-    def __init__(self, base_url: str = None, api_key: str = None):
+    def __init__(self, base_url: str = None, api_key: str = None, config: Dict[str, Any] = None):
         """
         初始化工作流管理器
 
         Args:
             base_url: n8n实例URL (默认从环境变量读取)
             api_key: API密钥 (默认从环境变量读取)
+            config: agent配置 (默认读取 config/agent_config.yaml)
         """
+        self.config = config if config is not None else load_agent_config()
         self.base_url = base_url or os.getenv('N8N_BASE_URL', 'http://localhost:5678')
         self.api_key = api_key or os.getenv('N8N_API_KEY', '')
 
@@ -60,12 +256,131 @@ class N8nWorkflowManager:
 
         self.api_url = f"{self.base_url}/api/v1"
 
+        # 所有API调用共享同一个连接池会话
+        self.timeout = get_timeout(self.config)
+        self.session, self._adapter = create_session(self.config, self.headers)
+
+        # 重试策略 (n8n.retry) 与统计
+        self.retry_policy = RetryPolicy(self.config)
+        self.retry_stats = {"requests": 0, "retried_requests": 0, "retries": 0}
+        # 线程池并发请求时统计需要加锁，上一次请求的重试次数按线程记录
+        self._retry_lock = threading.Lock()
+        self._retry_local = threading.local()
+
+        # 进程内共享的限速和并发上限 (security.rate_limit.*, advanced.max_concurrent)
+        self.rate_limiter = get_rate_limiter(self.config)
+
+        # 分页大小 (n8n API 单页上限为250)
+        self.page_size = int(get_config_value(self.config, 'n8n.page_size', 100))
+
+        self._tracker: Optional[ExecutionTracker] = None
+
+        # 工作流定义缓存 (workflow.optimization.*)
+        self.cache = None
+        if get_config_value(self.config, 'workflow.optimization.enable_caching', True):
+            data_path = get_config_value(self.config, 'storage.data_path', './data')
+            self.cache = WorkflowCache(
+                ttl=float(get_config_value(self.config, 'workflow.optimization.cache_ttl', 3600)),
+                max_entries=int(get_config_value(self.config, 'workflow.optimization.cache_size', 128)),
+                cache_dir=get_config_value(self.config, 'workflow.optimization.cache_dir',
+                                           str(Path(data_path) / 'workflow_cache'))
+            )
+
+    def close(self):
+        """停止执行跟踪并关闭连接池"""
+        if self._tracker:
+            self._tracker.stop()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        获取连接池复用统计
+
+        Returns:
+            每个主机的新建连接数、请求数和复用次数
+        """
+        return self._adapter.pool_stats()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        获取工作流缓存命中统计
+
+        Returns:
+            命中/未命中/失效次数，未启用缓存时返回空字典
+        """
+        return self.cache.get_stats() if self.cache else {}
+
+    @property
+    def last_retry_count(self) -> int:
+        """当前线程上一次请求的重试次数"""
+        return getattr(self._retry_local, 'count', 0)
+
+    def get_retry_stats(self) -> Dict[str, int]:
+        """
+        获取重试统计
+
+        Returns:
+            请求总数、发生重试的请求数和重试总次数
+        """
+        with self._retry_lock:
+            return dict(self.retry_stats)
+
+    def get_rate_limit_stats(self) -> Dict[str, Any]:
+        """
+        获取限流统计
+
+        Returns:
+            被限速次数、累计等待时间、429退避次数和当前并发数
+        """
+        return self.rate_limiter.get_stats()
+
+    def _request(self, method: str, path: str, retry_unsafe: bool = None,
+                 **kwargs) -> requests.Response:
+        """
+        通过共享会话发送API请求
+
+        幂等请求 (GET/PATCH/PUT/DELETE) 按 n8n.retry 策略自动重试，
+        POST 需要 retry_unsafe=True 或配置 n8n.retry.retry_post 才会重试。
+        每次尝试都经过共享的流量控制器。
+
+        Args:
+            method: HTTP方法
+            path: API路径 (相对于 /api/v1)
+            retry_unsafe: 是否允许重试非幂等请求
+            **kwargs: 传递给 requests 的参数
+
+        Returns:
+            HTTP响应
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        self._retry_local.count = 0
+        with self._retry_lock:
+            self.retry_stats["requests"] += 1
+
+        response = request_with_retry(
+            self.session, method, f"{self.api_url}{path}",
+            self.retry_policy, retry_unsafe=retry_unsafe, limiter=self.rate_limiter, **kwargs
+        )
+
+        self._retry_local.count = response.retries
+        if response.retries:
+            with self._retry_lock:
+                self.retry_stats["retried_requests"] += 1
+                self.retry_stats["retries"] += response.retries
+        return response
+
     def test_connection(self) -> bool:
         """测试n8n连接"""
         try:
-            response = requests.get(
-                f"{self.api_url}/workflows",
-                headers=self.headers,
+            response = self._request(
+                "GET",
+                "/workflows",
                 timeout=5
             )
             if response.status_code == 200:
@@ -78,6 +393,43 @@ class N8nWorkflowManager:
             logger.error(f"❌ Connection error: {e}")
             return False
 
+    def get_workflow(self, workflow_id: str, use_cache: bool = True,
+                     updated_at: str = None) -> Dict[str, Any]:
+        """
+        获取工作流
+
+        启用缓存时先读取本地缓存；缓存以最近一次列表调用 (或 updated_at 参数)
+        返回的 updatedAt 校验，不一致或超过TTL时重新获取。
+
+        Args:
+            workflow_id: 工作流ID
+            use_cache: 是否使用缓存
+            updated_at: 已知的最新 updatedAt
+
+        Returns:
+            工作流对象
+        """
+        if use_cache and self.cache:
+            cached = self.cache.get(workflow_id, updated_at)
+            if cached is not None:
+                return cached
+
+        try:
+            response = self._request("GET", f"/workflows/{workflow_id}")
+
+            if response.status_code == 200:
+                workflow = response.json()
+                if self.cache:
+                    self.cache.put(workflow)
+                return workflow
+            else:
+                logger.error(f"❌ Failed to get workflow {workflow_id}: {response.text}")
+                return {"error": response.text, "status_code": response.status_code}
+
+        except Exception as e:
+            logger.error(f"❌ Error getting workflow {workflow_id}: {e}")
+            return {"error": str(e)}
+
     def create_workflow(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """
         创建新工作流
@@ -105,9 +457,9 @@ class N8nWorkflowManager:
             }
 
             # 发送创建请求
-            response = requests.post(
-                f"{self.api_url}/workflows",
-                headers=self.headers,
+            response = self._request(
+                "POST",
+                "/workflows",
                 json=workflow_data
             )
 
@@ -137,12 +489,15 @@ class N8nWorkflowManager:
             workflow_id = workflow if isinstance(workflow, str) else workflow.get('id')
 
             # 激活工作流
-            response = requests.patch(
-                f"{self.api_url}/workflows/{workflow_id}",
-                headers=self.headers,
+            response = self._request(
+                "PATCH",
+                f"/workflows/{workflow_id}",
                 json={"active": True}
             )
 
+            if self.cache:
+                self.cache.invalidate(workflow_id)
+
             if response.status_code == 200:
                 logger.info(f"✅ Workflow {workflow_id} deployed successfully")
                 return True
@@ -154,56 +509,249 @@ class N8nWorkflowManager:
             logger.error(f"❌ Error deploying workflow: {e}")
             return False
 
-    def update_workflow(self, workflow_id: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+    def deactivate_workflow(self, workflow_id: str) -> bool:
         """
-        更新工作流
+        停用工作流
 
         Args:
             workflow_id: 工作流ID
-            changes: 要更新的内容
 
         Returns:
-            更新后的工作流
+            是否成功停用
         """
         try:
-            # 获取现有工作流
-            response = requests.get(
-                f"{self.api_url}/workflows/{workflow_id}",
-                headers=self.headers
+            response = self._request(
+                "PATCH",
+                f"/workflows/{workflow_id}",
+                json={"active": False}
             )
 
-            if response.status_code != 200:
-                return {"error": f"Workflow not found: {workflow_id}"}
+            if self.cache:
+                self.cache.invalidate(workflow_id)
+
+            if response.status_code == 200:
+                logger.info(f"✅ Workflow {workflow_id} deactivated")
+                return True
+            else:
+                logger.error(f"❌ Failed to deactivate workflow: {response.text}")
+                return False
+
+        except Exception as e:
+            logger.error(f"❌ Error deactivating workflow: {e}")
+            return False
+
+    def verify_webhooks(self, workflow: Dict[str, Any]) -> List[str]:
+        """
+        检查已激活工作流的生产Webhook是否已注册
+
+        对每个Webhook节点的生产地址发送 OPTIONS 请求 (不会触发执行)，
+        n8n对未注册的Webhook返回404。带路径参数的Webhook无法探测，跳过。
 
-            workflow = response.json()
-
-            # 应用更改
-            for key, value in changes.items():
-                if key == "nodes" and isinstance(value, list):
-                    # 添加或更新节点
-                    workflow["nodes"] = value
-                elif key == "connections":
-                    # 更新连接
-                    workflow["connections"] = value
-                elif key == "add_node":
-                    # 添加单个节点
-                    workflow["nodes"].append(value)
-                elif key == "remove_node":
-                    # 移除节点
-                    workflow["nodes"] = [n for n in workflow["nodes"] if n["id"] != value]
+        Args:
+            workflow: 工作流对象
+
+        Returns:
+            未注册的Webhook路径列表
+        """
+        missing = []
+        for node in workflow.get('nodes', []):
+            if node.get('type') != 'n8n-nodes-base.webhook' or node.get('disabled'):
+                continue
+            path = str(node.get('parameters', {}).get('path', '')).strip('/')
+            if not path or ':' in path or path.startswith('='):
+                continue
+            try:
+                with self.rate_limiter.slot():
+                    response = self.session.options(f"{self.base_url}/webhook/{path}", timeout=self.timeout)
+                if response.status_code == 404:
+                    missing.append(path)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not verify webhook {path}: {e}")
+                missing.append(path)
+        return missing
+
+    def deploy_many(self, workflow_ids: List[str], wave_size: int = None, wave_pause: float = None,
+                    failure_threshold: float = None, verify: bool = True,
+                    max_workers: int = None) -> Dict[str, Any]:
+        """
+        分批并发激活工作流
+
+        每一批 (wave) 内并发激活并校验Webhook注册；某一批失败比例超过阈值时，
+        回滚该批中本次激活的工作流并停止后续批次。
+
+        Args:
+            workflow_ids: 工作流ID列表
+            wave_size: 每批数量 (默认 workflow.deploy.wave_size)
+            wave_pause: 批次间隔秒数 (默认 workflow.deploy.wave_pause)
+            failure_threshold: 触发回滚的失败比例 (默认 workflow.deploy.failure_threshold)
+            verify: 是否校验Webhook注册
+            max_workers: 每批内的并发数 (默认 advanced.max_concurrent)
+
+        Returns:
+            部署报告：每个工作流的结果、回滚列表和吞吐量；每个工作流只计入一种状态
+            (activated / skipped / failed / unverified / rolled_back)，failed 包括未回滚的 unverified
+        """
+        wave_size = wave_size or int(get_config_value(self.config, 'workflow.deploy.wave_size', 20))
+        if wave_pause is None:
+            wave_pause = float(get_config_value(self.config, 'workflow.deploy.wave_pause', 2))
+        if failure_threshold is None:
+            failure_threshold = float(get_config_value(self.config, 'workflow.deploy.failure_threshold', 0.2))
+        max_workers = max_workers or int(get_config_value(self.config, 'advanced.max_concurrent', 5))
+
+        start = time.time()
+        results = []
+        rolled_back = []
+        aborted = False
+
+        def deploy_one(workflow_id):
+            task_start = time.time()
+            result = {"id": workflow_id, "status": "failed", "error": None}
+
+            workflow = self.get_workflow(workflow_id, use_cache=False)
+            if workflow.get('error'):
+                result["error"] = workflow['error']
+            elif workflow.get('active'):
+                result["status"] = "skipped"
+            elif not self.deploy_workflow(workflow_id):
+                result["error"] = "activation failed"
+            else:
+                missing = self.verify_webhooks(workflow) if verify else []
+                if missing:
+                    result["status"] = "unverified"
+                    result["error"] = f"webhooks not registered: {missing}"
                 else:
-                    workflow[key] = value
+                    result["status"] = "activated"
+
+            result["duration"] = round(time.time() - task_start, 3)
+            return result
+
+        waves = [workflow_ids[i:i + wave_size] for i in range(0, len(workflow_ids), wave_size)]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for number, wave in enumerate(waves, 1):
+                wave_results = list(executor.map(deploy_one, wave))
+                results.extend(wave_results)
+
+                failures = [r for r in wave_results if r["status"] in ("failed", "unverified")]
+                logger.info(f"Wave {number}/{len(waves)}: "
+                            f"{len(wave) - len(failures)}/{len(wave)} ok")
+
+                if wave and len(failures) / len(wave) > failure_threshold:
+                    # 回滚本批中本次激活的工作流
+                    to_revert = [r["id"] for r in wave_results if r["status"] in ("activated", "unverified")]
+                    logger.error(f"❌ Wave {number} failure rate {len(failures)}/{len(wave)} "
+                                 f"exceeds {failure_threshold:.0%}, rolling back {len(to_revert)} workflows")
+                    for workflow_id, ok in zip(to_revert, executor.map(self.deactivate_workflow, to_revert)):
+                        if ok:
+                            rolled_back.append(workflow_id)
+                    # 回滚的工作流 (包括未通过校验的) 只计入 rolled_back，校验失败原因保留在 error 中
+                    for r in wave_results:
+                        if r["id"] in rolled_back and r["status"] in ("activated", "unverified"):
+                            r["status"] = "rolled_back"
+                    aborted = True
+                    break
+
+                if number < len(waves) and wave_pause > 0:
+                    time.sleep(wave_pause)
+
+        duration = time.time() - start
+        counts = defaultdict(int)
+        for r in results:
+            counts[r["status"]] += 1
+
+        report = {
+            "total": len(workflow_ids),
+            "processed": len(results),
+            "activated": counts["activated"],
+            "skipped": counts["skipped"],
+            "failed": counts["failed"] + counts["unverified"],
+            "rolled_back": rolled_back,
+            "aborted": aborted,
+            "waves": len(waves),
+            "duration": round(duration, 3),
+            "throughput": round(len(results) / duration, 2) if duration > 0 else 0,
+            "results": results
+        }
+        logger.info(f"✅ Deployed {report['activated']} workflows "
+                    f"({report['skipped']} already active, {report['failed']} failed) "
+                    f"in {report['duration']}s, {report['throughput']} workflows/s")
+        return report
+
+    def update_workflow(self, workflow_id: str, changes: Dict[str, Any],
+                        base: Dict[str, Any] = None, expected_version: str = None) -> Dict[str, Any]:
+        """
+        更新工作流
+
+        只发送有变化的顶层字段；没有任何变化时不发送写请求。
+
+        提供 expected_version (或 base) 时做条件写入：写入前重新读取服务器上的
+        工作流，versionId/updatedAt 与期望的版本不一致时拒绝更新。n8n 公共API
+        没有写入前置条件，重新读取与写入之间的并发修改仍无法发现，只能尽力而为。
+
+        Args:
+            workflow_id: 工作流ID
+            changes: 要更新的内容
+            base: 调用方已持有的当前工作流 (提供时在其基础上应用更改，期望版本默认为它的版本；
+                否则绕过缓存读取最新版本)
+            expected_version: 期望的当前版本 (versionId 或 updatedAt)，不一致时拒绝更新
+
+        Returns:
+            更新后的工作流；版本不一致时包含 error、conflict=True 和 current_version
+        """
+        try:
+            # 获取现有工作流 (读-改-写必须基于服务器上的最新版本，不能使用缓存)
+            workflow = base if base is not None else self.get_workflow(workflow_id, use_cache=False)
+            if workflow.get('error'):
+                return {"error": f"Workflow not found: {workflow_id}"}
+            if not expected_version and base is not None:
+                expected_version = base.get('versionId') or base.get('updatedAt')
+
+            # 应用更改并计算差异
+            updated = apply_workflow_changes(workflow, changes)
+            diff = diff_workflows(workflow, updated)
+
+            if not diff["fields"]:
+                logger.info(f"Workflow {workflow_id} unchanged, skipping update")
+                return workflow
+
+            if expected_version:
+                # 调用方的副本可能已经过时：写入前重新读取服务器上的版本
+                latest = self.get_workflow(workflow_id, use_cache=False) if base is not None else workflow
+                if latest.get('error'):
+                    return {"error": f"Workflow not found: {workflow_id}"}
+                versions = {latest.get('versionId'), latest.get('updatedAt')} - {None}
+                if versions and expected_version not in versions:
+                    current_version = latest.get('versionId') or latest.get('updatedAt')
+                    logger.error(f"❌ Workflow {workflow_id} changed remotely "
+                                 f"(expected {expected_version}, found {current_version})")
+                    return {"error": "Version conflict", "conflict": True,
+                            "current_version": current_version}
+
+            payload = {key: updated.get(key) for key in diff["fields"]}
+
+            logger.debug(f"Updating {workflow_id}: fields={diff['fields']} "
+                         f"nodes={diff['nodes']} connections={diff['connections']}")
 
             # 更新工作流
-            response = requests.patch(
-                f"{self.api_url}/workflows/{workflow_id}",
-                headers=self.headers,
-                json=workflow
+            response = self._request(
+                "PATCH",
+                f"/workflows/{workflow_id}",
+                json=payload
             )
 
+            if self.cache:
+                self.cache.invalidate(workflow_id)
+
             if response.status_code == 200:
-                logger.info(f"✅ Workflow {workflow_id} updated successfully")
-                return response.json()
+                logger.info(f"✅ Workflow {workflow_id} updated successfully "
+                            f"({', '.join(diff['fields'])})")
+                result = response.json()
+                if self.cache and result.get('nodes') is not None:
+                    self.cache.put(result)
+                return result
+            elif response.status_code in [409, 412]:
+                logger.error(f"❌ Workflow {workflow_id} was modified concurrently: {response.text}")
+                return {"error": response.text, "conflict": True}
             else:
                 logger.error(f"❌ Failed to update workflow: {response.text}")
                 return {"error": response.text}
@@ -223,11 +771,14 @@ class N8nWorkflowManager:
             是否成功删除
         """
         try:
-            response = requests.delete(
-                f"{self.api_url}/workflows/{workflow_id}",
-                headers=self.headers
+            response = self._request(
+                "DELETE",
+                f"/workflows/{workflow_id}"
             )
 
+            if self.cache:
+                self.cache.invalidate(workflow_id)
+
             if response.status_code in [200, 204]:
                 logger.info(f"✅ Workflow {workflow_id} deleted successfully")
                 return True
@@ -252,17 +803,12 @@ class N8nWorkflowManager:
         """
         try:
             # 获取工作流
-            response = requests.get(
-                f"{self.api_url}/workflows/{workflow_id}",
-                headers=self.headers
-            )
+            workflow = self.get_workflow(workflow_id)
 
-            if response.status_code != 200:
+            if workflow.get('error'):
                 logger.error(f"❌ Failed to get workflow for backup")
                 return ""
 
-            workflow = response.json()
-
             # 创建备份目录
             Path(backup_dir).mkdir(parents=True, exist_ok=True)
 
@@ -281,6 +827,130 @@ class N8nWorkflowManager:
             logger.error(f"❌ Error backing up workflow: {e}")
             return ""
 
+    def backup_all(self, backup_dir: str = None, compression: str = None,
+                   max_workers: int = None, active_only: bool = False,
+                   incremental: bool = False) -> Dict[str, Any]:
+        """
+        将所有工作流备份到单个压缩归档
+
+        工作流列表按页流式读取，完整内容由线程池并发获取后按完成顺序写入归档；
+        内容以sha256寻址，相同内容只存一份，清单记录哈希与耗时。
+
+        增量模式下读取备份目录中的索引 (backup_index.json)，列表条目的
+        updatedAt 未变化的工作流不再获取完整内容，清单中直接引用上次
+        存放该内容的归档。
+
+        Args:
+            backup_dir: 备份目录 (默认 storage.backup_path)
+            compression: gz | xz | zst | none (默认 storage.backup.format，compress=false 时为 none)
+            max_workers: 并发数 (默认 advanced.max_concurrent)
+            active_only: 是否只备份激活的工作流
+            incremental: 是否只获取有变更的工作流
+
+        Returns:
+            归档清单，path 字段为归档路径；工作流列表读取中途失败或清单数量与列表条目数
+            不一致时 complete 为 False、error 为原因，且不更新索引。
+            归档写入失败时删除未完成的归档并返回 {"error": ...}
+        """
+        backup_dir = backup_dir or get_config_value(self.config, 'storage.backup_path', './backups')
+        if compression is None:
+            compress = get_config_value(self.config, 'storage.backup.compress', True)
+            compression = get_config_value(self.config, 'storage.backup.format', 'gz') if compress else 'none'
+        max_workers = max_workers or int(get_config_value(self.config, 'advanced.max_concurrent', 5))
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        index = BackupIndex(backup_dir)
+        failed = []
+        skipped = 0
+        listed = 0
+        listing_error = None
+
+        def fetch(entry):
+            start = time.time()
+            workflow = self.get_workflow(entry['id'], updated_at=entry.get('updatedAt'))
+            return entry, workflow, time.time() - start
+
+        def drain(futures):
+            for future in futures:
+                entry, workflow, elapsed = future.result()
+                record = index.workflows.get(str(entry['id'])) if incremental else None
+                if record and not (Path(backup_dir) / record["archive"]).exists():
+                    record = None
+
+                if workflow.get('error'):
+                    failed.append({"id": entry['id'], "error": workflow['error']})
+                    if record:
+                        # 获取失败时保留上一次的内容 (及其updatedAt)，保证恢复点完整
+                        writer.add_reference({**entry, "updatedAt": record["updatedAt"]},
+                                             record["sha256"], record["size"],
+                                             archive=record["archive"], stale=True)
+                    continue
+
+                writer.add_workflow(workflow, fetch_time=round(elapsed, 3))
+
+        try:
+            prefix = "n8n_backup_incr" if incremental else "n8n_backup"
+            with BackupArchiveWriter(f"{backup_dir}/{prefix}_{timestamp}", compression) as writer:
+                writer.manifest["base_url"] = self.base_url
+                writer.manifest["mode"] = "incremental" if incremental else "full"
+                if incremental:
+                    writer.manifest["base_archive"] = index.last_archive
+
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    pending = set()
+                    try:
+                        for entry in self.iter_workflows(active_only, prefetch=True, raise_errors=True):
+                            listed += 1
+                            record = index.lookup(entry) if incremental else None
+                            if record:
+                                writer.add_reference(entry, record["sha256"], record["size"],
+                                                     archive=record["archive"])
+                                skipped += 1
+                                continue
+
+                            pending.add(executor.submit(fetch, entry))
+                            # 限制在途请求数量，保证内存占用有界
+                            if len(pending) >= max_workers * 2:
+                                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                                drain(done)
+                    except RuntimeError as e:
+                        # 列表中途失败：已获取的内容照常写入，但归档标记为不完整
+                        listing_error = str(e)
+                    drain(pending)
+
+                # 清单 + 获取失败且无旧内容的工作流应与列表条目一一对应；
+                # 翻页期间有增删时列表可能重复或遗漏条目，此时同样视为不完整
+                archived = set(writer.manifest["workflows"])
+                accounted = len(archived) + len({str(f["id"]) for f in failed} - archived)
+                if listing_error is None and accounted != listed:
+                    listing_error = f"Listed {listed} workflows but accounted for {accounted}"
+
+                writer.manifest["listed"] = listed
+                writer.manifest["failed"] = failed
+                writer.manifest["stats"]["unchanged"] = skipped
+                writer.manifest["complete"] = listing_error is None
+                if listing_error:
+                    writer.manifest["error"] = listing_error
+
+            manifest = writer.manifest
+            manifest["path"] = writer.path
+            stats = manifest["stats"]
+            if not manifest["complete"]:
+                # 不完整的归档不进入索引，下一次增量备份仍以上一次完整备份为基准
+                logger.error(f"❌ Backup incomplete, {stats['workflows']} workflows written to {writer.path}: "
+                             f"{listing_error}")
+                return manifest
+
+            index.update(manifest, Path(writer.path).name)
+            logger.info(f"✅ Backed up {stats['workflows']} workflows "
+                        f"({stats['unique_blobs']} written, {skipped} unchanged, {len(failed)} failed) "
+                        f"to {writer.path} in {stats['duration']}s")
+            return manifest
+
+        except Exception as e:
+            logger.error(f"❌ Error backing up workflows: {e}")
+            return {"error": str(e)}
+
     def restore_workflow(self, backup_file: str) -> Dict[str, Any]:
         """
         从备份恢复工作流
@@ -309,48 +979,263 @@ class N8nWorkflowManager:
             logger.error(f"❌ Error restoring workflow: {e}")
             return {"error": str(e)}
 
-    def list_workflows(self, active_only: bool = False) -> List[Dict[str, Any]]:
+    def _iter_pages(self, path: str, params: Dict[str, Any] = None,
+                    page_size: int = None, prefetch: bool = False) -> Iterator[List[Dict[str, Any]]]:
         """
-        列出所有工作流
+        按 nextCursor 逐页读取列表接口
 
         Args:
-            active_only: 是否只列出激活的工作流
+            path: API路径
+            params: 查询参数
+            page_size: 每页数量 (默认 n8n.page_size)
+            prefetch: 是否在调用方处理当前页时并发预取下一页
 
-        Returns:
-            工作流列表
+        Yields:
+            每页的数据列表
+
+        Raises:
+            RuntimeError: 接口返回非200状态码
         """
-        try:
-            response = requests.get(
-                f"{self.api_url}/workflows",
-                headers=self.headers
-            )
+        for data, _ in self._iter_cursor_pages(path, params, page_size, prefetch):
+            yield data
 
-            if response.status_code == 200:
-                workflows = response.json().get('data', [])
+    def _iter_cursor_pages(self, path: str, params: Dict[str, Any] = None,
+                           page_size: int = None, prefetch: bool = False,
+                           cursor: str = None) -> Iterator[tuple]:
+        """
+        按 nextCursor 逐页读取列表接口，同时返回下一页的游标
 
-                if active_only:
-                    workflows = [w for w in workflows if w.get('active')]
+        Args:
+            path: API路径
+            params: 查询参数
+            page_size: 每页数量 (默认 n8n.page_size)
+            prefetch: 是否在调用方处理当前页时并发预取下一页
+            cursor: 起始游标 (为空时从第一页开始)
 
-                logger.info(f"Found {len(workflows)} workflows")
-                return workflows
-            else:
-                logger.error(f"❌ Failed to list workflows: {response.text}")
-                return []
+        Yields:
+            (数据列表, 下一页游标)，最后一页的游标为 None
 
+        Raises:
+            RuntimeError: 接口返回非200状态码
+        """
+        params = dict(params or {})
+        params['limit'] = min(page_size or self.page_size, 250)
+
+        def fetch(cursor):
+            page_params = dict(params)
+            if cursor:
+                page_params['cursor'] = cursor
+            response = self._request("GET", path, params=page_params)
+            if response.status_code != 200:
+                raise RuntimeError(f"{response.status_code} {response.text}")
+            body = response.json()
+            return body.get('data', []), body.get('nextCursor')
+
+        if not prefetch:
+            while True:
+                data, cursor = fetch(cursor)
+                yield data, cursor
+                if not cursor:
+                    return
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(fetch, cursor)
+            while future:
+                data, cursor = future.result()
+                future = executor.submit(fetch, cursor) if cursor else None
+                yield data, cursor
+
+    def iter_workflows(self, active_only: bool = False, page_size: int = None,
+                       prefetch: bool = False, raise_errors: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        逐个返回所有工作流（自动翻页）
+
+        Args:
+            active_only: 是否只返回激活的工作流
+            page_size: 每页数量
+            prefetch: 是否预取下一页
+            raise_errors: 列表读取失败时是否抛出异常 (否则只记录日志并提前结束，
+                调用方无法区分失败与列表结束)
+
+        Yields:
+            工作流对象
+
+        Raises:
+            RuntimeError: raise_errors 为真且某一页读取失败
+        """
+        params = {"active": "true"} if active_only else {}
+        try:
+            for page in self._iter_pages("/workflows", params, page_size, prefetch):
+                for workflow in page:
+                    if self.cache:
+                        self.cache.note_version(workflow.get('id'), workflow.get('updatedAt'))
+                    if active_only and not workflow.get('active'):
+                        continue
+                    yield workflow
         except Exception as e:
             logger.error(f"❌ Error listing workflows: {e}")
-            return []
+            if raise_errors:
+                raise RuntimeError(f"Error listing workflows: {e}") from e
 
-    def execute_workflow(self, workflow_id: str, data: Dict[str, Any] = None) -> Dict[str, Any]:
+    def restore_all(self, source: str, activate: bool = False, max_workers: int = None,
+                    name_suffix: str = None) -> Dict[str, Any]:
+        """
+        按依赖顺序并发恢复/导入一批工作流
+
+        根据 Execute Workflow 节点的引用构建依赖图，被引用的子工作流先创建，
+        依赖全部完成的工作流立即提交到线程池；创建时把引用改写为新ID。
+        循环依赖的工作流在最后创建，创建完成后再更新其引用。依赖的子工作流
+        创建失败的工作流同样在最后创建，但不激活，结果中记录未恢复的子工作流。
+
+        Args:
+            source: 目录 / .json 文件 / backup-all 归档
+            activate: 是否在创建后激活
+            max_workers: 并发数 (默认 advanced.max_concurrent)
+            name_suffix: 名称后缀 (如 _restored_20240101)
+
+        Returns:
+            {"id_map": {旧ID: 新ID}, "results": [...每个工作流的结果和耗时], "duration": 总耗时}
+        """
+        start = time.time()
+        max_workers = max_workers or int(get_config_value(self.config, 'advanced.max_concurrent', 5))
+
+        try:
+            workflows = load_workflow_source(source)
+        except Exception as e:
+            logger.error(f"❌ Error loading workflows from {source}: {e}")
+            return {"error": str(e)}
+
+        deps = {
+            wid: {ref for ref in get_subworkflow_refs(wf) if ref in workflows and ref != wid}
+            for wid, wf in workflows.items()
+        }
+        dependents = defaultdict(set)
+        for wid, refs in deps.items():
+            for ref in refs:
+                dependents[ref].add(wid)
+        remaining = {wid: len(refs) for wid, refs in deps.items()}
+
+        id_map: Dict[str, str] = {}
+        results: Dict[str, Dict[str, Any]] = {}
+        needs_patch = []
+
+        def restore_one(old_id):
+            task_start = time.time()
+            workflow = copy.deepcopy(workflows[old_id])
+            workflow.pop('id', None)
+            workflow['active'] = False
+            unresolved = [ref for ref in remap_subworkflow_refs(workflow, id_map) if ref in workflows]
+            if name_suffix:
+                workflow['name'] = f"{workflow.get('name', 'Workflow')}{name_suffix}"
+
+            created = self.create_workflow(workflow)
+            if activate and not created.get('error') and not unresolved:
+                self.deploy_workflow(created)
+            return old_id, created, unresolved, time.time() - task_start
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            submitted = set()
+
+            def submit(wid):
+                submitted.add(wid)
+                return executor.submit(restore_one, wid)
+
+            pending = {submit(wid) for wid, count in remaining.items() if count == 0}
+
+            while pending or len(submitted) < len(workflows):
+                if not pending:
+                    # 剩余工作流要么 (间接) 依赖创建失败的工作流，要么相互之间存在循环依赖
+                    waiting = [wid for wid in workflows if wid not in submitted]
+                    blocked = {wid for wid, result in results.items() if result["error"]}
+                    changed = True
+                    while changed:
+                        changed = False
+                        for wid in waiting:
+                            if wid not in blocked and deps[wid] & blocked:
+                                blocked.add(wid)
+                                changed = True
+                    dependent_on_failed = [wid for wid in waiting if wid in blocked]
+                    cyclic = [wid for wid in waiting if wid not in blocked]
+                    if dependent_on_failed:
+                        logger.warning(f"⚠️ Sub-workflows failed to restore, creating dependents "
+                                       f"with unresolved references: {dependent_on_failed}")
+                    if cyclic:
+                        logger.warning(f"⚠️ Circular sub-workflow references: {cyclic}")
+                    pending = {submit(wid) for wid in waiting}
+                    continue
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    old_id, created, unresolved, elapsed = future.result()
+                    results[old_id] = {
+                        "old_id": old_id,
+                        "new_id": created.get('id'),
+                        "name": created.get('name', workflows[old_id].get('name')),
+                        "duration": round(elapsed, 3),
+                        "error": created.get('error')
+                    }
+                    if created.get('error'):
+                        continue
+
+                    id_map[old_id] = created['id']
+                    if unresolved:
+                        needs_patch.append(old_id)
+                    for dependent in dependents[old_id]:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0 and dependent not in submitted:
+                            pending.add(submit(dependent))
+
+        # 循环依赖：所有工作流创建后再更新引用
+        for old_id in needs_patch:
+            workflow = copy.deepcopy(workflows[old_id])
+            remap_subworkflow_refs(workflow, id_map)
+            updated = self.update_workflow(id_map[old_id], {"nodes": workflow.get('nodes', [])})
+            missing = sorted(ref for ref in deps[old_id] if ref not in id_map)
+            if updated.get('error'):
+                results[old_id]["error"] = f"Failed to remap references: {updated['error']}"
+            elif missing:
+                # 依赖的子工作流创建失败，引用仍指向旧ID，不激活
+                results[old_id]["error"] = f"Sub-workflows not restored: {missing}"
+            elif activate:
+                self.deploy_workflow(id_map[old_id])
+
+        failed = sum(1 for r in results.values() if r["error"])
+        duration = time.time() - start
+        logger.info(f"✅ Restored {len(results) - failed}/{len(workflows)} workflows in {duration:.2f}s")
+
+        return {
+            "id_map": id_map,
+            "results": [results[wid] for wid in workflows if wid in results],
+            "duration": round(duration, 3)
+        }
+
+    def list_workflows(self, active_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        列出所有工作流
+
+        Args:
+            active_only: 是否只列出激活的工作流
+
+        Returns:
+            工作流列表
+        """
+        workflows = list(self.iter_workflows(active_only))
+        logger.info(f"Found {len(workflows)} workflows")
+        return workflows
+
+    def execute_workflow(self, workflow_id: str, data: Dict[str, Any] = None,
+                         wait: bool = False, timeout: float = None) -> Dict[str, Any]:
         """
         手动执行工作流
 
         Args:
             workflow_id: 工作流ID
             data: 输入数据
+            wait: 是否等待执行完成
+            timeout: 等待完成的最长秒数 (默认 advanced.execution_timeout)
 
         Returns:
-            执行结果
+            执行结果；wait=True 时为完成后的执行记录
         """
         try:
             execution_data = {
@@ -362,15 +1247,21 @@ class N8nWorkflowManager:
             if data:
                 execution_data["data"] = data
 
-            response = requests.post(
-                f"{self.api_url}/workflows/{workflow_id}/execute",
-                headers=self.headers,
+            response = self._request(
+                "POST",
+                f"/workflows/{workflow_id}/execute",
                 json=execution_data
             )
 
             if response.status_code == 200:
                 result = response.json()
-                logger.info(f"✅ Workflow executed successfully: {result.get('id')}")
+                execution_id = result.get('executionId') or result.get('id') or \
+                    (result.get('data') or {}).get('executionId')
+                logger.info(f"✅ Workflow executed successfully: {execution_id}")
+
+                if wait and execution_id:
+                    timeout = timeout or float(get_config_value(self.config, 'advanced.execution_timeout', 300))
+                    return self.get_execution_tracker().wait(execution_id, timeout, workflow_id)
                 return result
             else:
                 logger.error(f"❌ Failed to execute workflow: {response.text}")
@@ -380,38 +1271,211 @@ class N8nWorkflowManager:
             logger.error(f"❌ Error executing workflow: {e}")
             return {"error": str(e)}
 
-    def get_workflow_executions(self, workflow_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+    def get_execution(self, execution_id: str, include_data: bool = False) -> Dict[str, Any]:
         """
-        获取工作流执行历史
+        获取单个执行记录
 
         Args:
-            workflow_id: 工作流ID
-            limit: 返回数量限制
+            execution_id: 执行ID
+            include_data: 是否包含执行数据
 
         Returns:
-            执行历史列表
+            执行记录
         """
         try:
-            response = requests.get(
-                f"{self.api_url}/executions",
-                headers=self.headers,
-                params={
-                    "workflowId": workflow_id,
-                    "limit": limit
-                }
+            response = self._request(
+                "GET",
+                f"/executions/{execution_id}",
+                params={"includeData": "true"} if include_data else None
             )
 
             if response.status_code == 200:
-                executions = response.json().get('data', [])
-                logger.info(f"Found {len(executions)} executions for workflow {workflow_id}")
-                return executions
+                return response.json()
             else:
-                logger.error(f"❌ Failed to get executions: {response.text}")
-                return []
+                logger.error(f"❌ Failed to get execution {execution_id}: {response.text}")
+                return {"error": response.text, "status_code": response.status_code}
 
+        except Exception as e:
+            logger.error(f"❌ Error getting execution {execution_id}: {e}")
+            return {"error": str(e)}
+
+    def get_execution_tracker(self) -> ExecutionTracker:
+        """
+        获取共享的执行跟踪器 (首次调用时创建)
+
+        轮询间隔读取 n8n.executions.poll_initial / poll_max (毫秒) 和 poll_backoff。
+
+        Returns:
+            执行跟踪器
+        """
+        if self._tracker is None:
+            self._tracker = ExecutionTracker(
+                self,
+                initial_interval=float(get_config_value(self.config, 'n8n.executions.poll_initial', 250)) / 1000,
+                max_interval=float(get_config_value(self.config, 'n8n.executions.poll_max', 5000)) / 1000,
+                backoff=float(get_config_value(self.config, 'n8n.executions.poll_backoff', 1.5))
+            )
+        return self._tracker
+
+    def iter_executions(self, workflow_id: str = None, since: Union[str, datetime] = None,
+                        status: str = None, include_data: bool = False,
+                        page_size: int = None, prefetch: bool = False,
+                        raise_errors: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        逐个返回执行记录（自动翻页，按时间倒序）
+
+        Args:
+            workflow_id: 工作流ID (为空时返回所有工作流的执行)
+            since: 只返回此时间之后开始的执行
+            status: 执行状态过滤 (success, error, waiting)
+            include_data: 是否包含执行数据
+            page_size: 每页数量
+            prefetch: 是否预取下一页
+            raise_errors: 列表读取失败时是否抛出异常 (否则只记录日志并提前结束)
+
+        Yields:
+            执行记录
+
+        Raises:
+            RuntimeError: raise_errors 为真且某一页读取失败
+        """
+        params = {}
+        if workflow_id:
+            params["workflowId"] = workflow_id
+        if status:
+            params["status"] = status
+        if include_data:
+            params["includeData"] = "true"
+        since = parse_timestamp(since)
+
+        try:
+            for page in self._iter_pages("/executions", params, page_size, prefetch):
+                for execution in page:
+                    started = parse_timestamp(execution.get('startedAt'))
+                    # 执行记录按时间倒序返回，遇到更早的记录即可停止翻页
+                    if since and started and started < since:
+                        return
+                    yield execution
         except Exception as e:
             logger.error(f"❌ Error getting executions: {e}")
-            return []
+            if raise_errors:
+                raise RuntimeError(f"Error getting executions: {e}") from e
+
+    def get_workflow_executions(self, workflow_id: str, limit: int = 10,
+                                raise_errors: bool = False) -> List[Dict[str, Any]]:
+        """
+        获取工作流执行历史
+
+        Args:
+            workflow_id: 工作流ID
+            limit: 返回数量限制
+            raise_errors: 列表读取失败时是否抛出异常 (否则返回已读取的部分)
+
+        Returns:
+            执行历史列表
+
+        Raises:
+            RuntimeError: raise_errors 为真且列表读取失败
+        """
+        executions = list(islice(
+            self.iter_executions(workflow_id, page_size=min(limit, self.page_size), raise_errors=raise_errors),
+            limit
+        ))
+        logger.info(f"Found {len(executions)} executions for workflow {workflow_id}")
+        return executions
+
+    def export_executions(self, output: str, export_format: str = None, workflow_id: str = None,
+                          status: str = None, since: Union[str, datetime] = None,
+                          include_data: bool = False, keep_data: bool = False,
+                          page_size: int = None, resume: bool = False) -> Dict[str, Any]:
+        """
+        将执行记录逐页流式导出为 NDJSON 或 Parquet
+
+        每页写入后记录断点 (下一页游标和输出位置)，内存占用只与页大小有关；
+        resume=True 时从断点继续，截掉上次中断时未提交的输出。
+        include_data=True 时每个节点的运行次数、耗时和输出条目数展开为列。
+
+        Args:
+            output: 输出路径 (NDJSON 为文件，Parquet 为分片目录)
+            export_format: ndjson | parquet (默认按扩展名推断)
+            workflow_id: 只导出该工作流的执行
+            status: 执行状态过滤
+            since: 只导出此时间之后开始的执行
+            include_data: 是否获取执行数据 (节点耗时列需要)
+            keep_data: NDJSON 中是否保留原始执行数据
+            page_size: 每页数量
+            resume: 是否从断点继续
+
+        Returns:
+            导出统计 (exported, pages, complete, duration)
+        """
+        export_format = export_format or detect_format(output)
+        page_size = page_size or self.page_size
+        since_ts = parse_timestamp(since)
+        query = {
+            "workflowId": workflow_id, "status": status, "includeData": include_data,
+            "since": since_ts.isoformat() if since_ts else None, "format": export_format
+        }
+
+        checkpoint = ExportCheckpoint(output)
+        state = checkpoint.load(query) if resume else None
+        if state and state.get("complete"):
+            logger.info(f"✅ Export {output} already complete ({state['exported']} executions)")
+            return {"exported": 0, "pages": 0, "complete": True, "duration": 0, "total": state["exported"]}
+        state = state or {"query": query, "cursor": None, "position": 0, "exported": 0, "complete": False}
+
+        params = {}
+        if workflow_id:
+            params["workflowId"] = workflow_id
+        if status:
+            params["status"] = status
+        if include_data:
+            params["includeData"] = "true"
+
+        start = time.time()
+        already_exported = state["exported"]
+        stats = {"exported": 0, "pages": 0, "complete": False}
+        try:
+            writer = EXPORT_WRITERS[export_format](output, state["position"])
+        except Exception as e:
+            logger.error(f"❌ Cannot export executions: {e}")
+            return {"error": str(e)}
+
+        if state["cursor"]:
+            logger.info(f"Resuming export at execution {already_exported}")
+
+        try:
+            for executions, cursor in self._iter_cursor_pages("/executions", params, page_size,
+                                                              prefetch=True, cursor=state["cursor"]):
+                rows = []
+                for execution in executions:
+                    started = parse_timestamp(execution.get('startedAt'))
+                    # 执行记录按时间倒序返回，遇到更早的记录即可结束
+                    if since_ts and started and started < since_ts:
+                        cursor = None
+                        break
+                    rows.append(flatten_execution(execution, keep_data))
+
+                writer.write_rows(rows)
+                stats["exported"] += len(rows)
+                stats["pages"] += 1
+                checkpoint.save(query=query, cursor=cursor, position=writer.position,
+                                exported=already_exported + stats["exported"], complete=not cursor)
+                if not cursor:
+                    stats["complete"] = True
+                    break
+
+        except Exception as e:
+            logger.error(f"❌ Export interrupted after {stats['exported']} executions: {e}")
+            stats["error"] = str(e)
+        finally:
+            writer.close()
+
+        stats["total"] = already_exported + stats["exported"]
+        stats["duration"] = round(time.time() - start, 3)
+        if stats["complete"]:
+            logger.info(f"✅ Exported {stats['exported']} executions to {output} in {stats['duration']}s")
+        return stats
 
     def import_workflow(self, file_path: str, activate: bool = False) -> Dict[str, Any]:
         """
@@ -451,17 +1515,12 @@ class N8nWorkflowManager:
         """
         try:
             # 获取工作流
-            response = requests.get(
-                f"{self.api_url}/workflows/{workflow_id}",
-                headers=self.headers
-            )
+            workflow = self.get_workflow(workflow_id)
 
-            if response.status_code != 200:
+            if workflow.get('error'):
                 logger.error(f"❌ Failed to get workflow for export")
                 return ""
 
-            workflow = response.json()
-
             # 生成输出路径
             if not output_path:
                 output_path = f"workflow_{workflow_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -485,6 +1544,9 @@ def main():
                         help='n8n base URL')
     parser.add_argument('--api-key', default=os.getenv('N8N_API_KEY', ''),
                         help='n8n API key')
+    parser.add_argument('--agent-config', dest='agent_config', help='Agent config file (default: config/agent_config.yaml)')
+    parser.add_argument('--pool-stats', action='store_true',
+                        help='Print connection pool reuse, retry and rate limit stats after the command')
 
     subparsers = parser.add_subparsers(dest='command', help='Commands')
 
@@ -502,7 +1564,15 @@ def main():
 
     # deploy command
     deploy_parser = subparsers.add_parser('deploy', help='Deploy (activate) workflow')
-    deploy_parser.add_argument('workflow_id', help='Workflow ID')
+    deploy_parser.add_argument('workflow_id', nargs='?', help='Workflow ID')
+    deploy_parser.add_argument('--all', action='store_true', help='Deploy all inactive workflows')
+    deploy_parser.add_argument('--tag', help='Deploy workflows with this tag')
+    deploy_parser.add_argument('--ids-file', help='File with one workflow ID per line')
+    deploy_parser.add_argument('--wave-size', type=int, help='Workflows per rollout wave')
+    deploy_parser.add_argument('--wave-pause', type=float, help='Seconds to pause between waves')
+    deploy_parser.add_argument('--failure-threshold', type=float,
+                               help='Failure ratio in a wave that triggers rollback')
+    deploy_parser.add_argument('--no-verify', action='store_true', help='Skip webhook registration check')
 
     # update command
     update_parser = subparsers.add_parser('update', help='Update workflow')
@@ -518,14 +1588,54 @@ def main():
     backup_parser.add_argument('workflow_id', help='Workflow ID')
     backup_parser.add_argument('--dir', default='./backups', help='Backup directory')
 
+    # backup-all command
+    backup_all_parser = subparsers.add_parser('backup-all', help='Backup all workflows into one archive')
+    backup_all_parser.add_argument('--dir', help='Backup directory (default: storage.backup_path)')
+    backup_all_parser.add_argument('--compression', choices=['gz', 'xz', 'zst', 'none'],
+                                   help='Archive compression (default: storage.backup.format)')
+    backup_all_parser.add_argument('--workers', type=int, help='Concurrent fetches')
+    backup_all_parser.add_argument('--active', action='store_true', help='Only back up active workflows')
+    backup_all_parser.add_argument('--incremental', action='store_true',
+                                   help='Only fetch workflows changed since the last backup')
+
+    # export-executions command
+    export_exec_parser = subparsers.add_parser('export-executions',
+                                               help='Stream executions to NDJSON or Parquet')
+    export_exec_parser.add_argument('output', help='Output file (.ndjson) or directory (.parquet)')
+    export_exec_parser.add_argument('--format', choices=['ndjson', 'parquet'],
+                                    help='Output format (default: from the output extension)')
+    export_exec_parser.add_argument('--workflow', help='Only export executions of this workflow')
+    export_exec_parser.add_argument('--status', help='Execution status filter')
+    export_exec_parser.add_argument('--since', help='Only export executions started after this ISO time')
+    export_exec_parser.add_argument('--include-data', action='store_true',
+                                    help='Fetch execution data and add per-node timing columns')
+    export_exec_parser.add_argument('--keep-data', action='store_true',
+                                    help='Keep the raw execution data in each row')
+    export_exec_parser.add_argument('--page-size', type=int, help='Executions per page')
+    export_exec_parser.add_argument('--resume', action='store_true', help='Continue from the last checkpoint')
+
     # restore command
     restore_parser = subparsers.add_parser('restore', help='Restore workflow')
     restore_parser.add_argument('backup_file', help='Backup file path')
 
+    # restore-all command
+    restore_all_parser = subparsers.add_parser('restore-all', help='Restore all workflows from a backup')
+    restore_all_parser.add_argument('source', help='Backup archive, directory or JSON file')
+    restore_all_parser.add_argument('--activate', action='store_true', help='Activate after restore')
+    restore_all_parser.add_argument('--workers', type=int, help='Concurrent restores')
+
+    # import-dir command
+    import_dir_parser = subparsers.add_parser('import-dir', help='Import all workflows in a directory')
+    import_dir_parser.add_argument('source', help='Directory, backup archive or JSON file')
+    import_dir_parser.add_argument('--activate', action='store_true', help='Activate after import')
+    import_dir_parser.add_argument('--workers', type=int, help='Concurrent imports')
+
     # execute command
     execute_parser = subparsers.add_parser('execute', help='Execute workflow')
     execute_parser.add_argument('workflow_id', help='Workflow ID')
     execute_parser.add_argument('--data', help='Input data JSON file')
+    execute_parser.add_argument('--wait', action='store_true', help='Wait for the execution to finish')
+    execute_parser.add_argument('--timeout', type=float, help='Seconds to wait for completion')
 
     # import command
     import_parser = subparsers.add_parser('import', help='Import workflow')
@@ -540,7 +1650,8 @@ def main():
     args = parser.parse_args()
 
     # 初始化管理器
-    manager = N8nWorkflowManager(args.base_url, args.api_key)
+    manager = N8nWorkflowManager(args.base_url, args.api_key,
+                                 load_agent_config(args.agent_config) if args.agent_config else None)
 
     # 执行命令
     if args.command == 'test':
@@ -560,7 +1671,31 @@ def main():
             manager.deploy_workflow(workflow)
 
     elif args.command == 'deploy':
-        manager.deploy_workflow(args.workflow_id)
+        if args.all or args.tag or args.ids_file:
+            if args.ids_file:
+                with open(args.ids_file, 'r') as f:
+                    workflow_ids = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+            else:
+                try:
+                    workflow_ids = [
+                        w['id'] for w in manager.iter_workflows(raise_errors=True)
+                        if not w.get('active') and (
+                            not args.tag or args.tag in [t.get('name') for t in w.get('tags') or []]
+                        )
+                    ]
+                except RuntimeError:
+                    # 列表不完整时不部署，避免只激活部分工作流
+                    sys.exit(1)
+            report = manager.deploy_many(workflow_ids, args.wave_size, args.wave_pause,
+                                         args.failure_threshold, not args.no_verify)
+            print(f"Activated {report['activated']}/{report['total']} "
+                  f"(skipped {report['skipped']}, failed {report['failed']}, "
+                  f"rolled back {len(report['rolled_back'])}) in {report['waves']} waves, "
+                  f"{report['duration']}s, {report['throughput']} workflows/s")
+        elif args.workflow_id:
+            manager.deploy_workflow(args.workflow_id)
+        else:
+            deploy_parser.print_help()
 
     elif args.command == 'update':
         with open(args.changes, 'r') as f:
@@ -573,15 +1708,47 @@ def main():
     elif args.command == 'backup':
         manager.backup_workflow(args.workflow_id, args.dir)
 
+    elif args.command == 'backup-all':
+        manifest = manager.backup_all(args.dir, args.compression, args.workers,
+                                      args.active, args.incremental)
+        if manifest.get('path'):
+            stats = manifest['stats']
+            print(f"{manifest['path']}: {stats['workflows']} workflows, "
+                  f"{stats['unique_blobs']} blobs, {stats['unchanged']} unchanged, {stats['raw_bytes']} -> {stats['archive_bytes']} bytes, "
+                  f"{stats['duration']}s{'' if manifest['complete'] else ' - incomplete'}")
+        if manifest.get('error'):
+            sys.exit(1)
+
+    elif args.command == 'export-executions':
+        stats = manager.export_executions(args.output, args.format, args.workflow, args.status,
+                                          args.since, args.include_data, args.keep_data,
+                                          args.page_size, args.resume)
+        if 'total' in stats:
+            print(f"{args.output}: {stats['total']} executions "
+                  f"({stats['exported']} this run, {stats['pages']} pages, {stats['duration']}s)"
+                  f"{'' if stats['complete'] else ' - incomplete, rerun with --resume'}")
+        if stats.get('error'):
+            sys.exit(1)
+
     elif args.command == 'restore':
         manager.restore_workflow(args.backup_file)
 
+    elif args.command in ('restore-all', 'import-dir'):
+        suffix = f"_restored_{datetime.now().strftime('%Y%m%d_%H%M%S')}" \
+            if args.command == 'restore-all' else None
+        report = manager.restore_all(args.source, args.activate, args.workers, suffix)
+        for r in report.get('results', []):
+            status = "❌" if r['error'] else "✅"
+            print(f"{status} {r['old_id']} -> {r['new_id']} {r['name']} ({r['duration']:.2f}s)")
+
     elif args.command == 'execute':
         data = None
         if args.data:
             with open(args.data, 'r') as f:
                 data = json.load(f)
-        manager.execute_workflow(args.workflow_id, data)
+        result = manager.execute_workflow(args.workflow_id, data, args.wait, args.timeout)
+        if args.wait:
+            print(json.dumps(result, indent=2, ensure_ascii=False, default=str))
 
     elif args.command == 'import':
         manager.import_workflow(args.file, args.activate)
@@ -592,6 +1759,23 @@ def main():
     else:
         parser.print_help()
 
+    if args.pool_stats:
+        for host, stats in manager.get_pool_stats().items():
+            print(f"{host}: {stats['requests']} requests, "
+                  f"{stats['connections']} connections, {stats['reused']} reused")
+        retry_stats = manager.get_retry_stats()
+        print(f"retries: {retry_stats['retries']} "
+              f"({retry_stats['retried_requests']}/{retry_stats['requests']} requests retried)")
+        limit_stats = manager.get_rate_limit_stats()
+        print(f"rate limit: {limit_stats['throttled']}/{limit_stats['requests']} requests throttled, "
+              f"{limit_stats['waited']}s waited, {limit_stats['paused']} 429 pauses")
+        cache_stats = manager.get_cache_stats()
+        if cache_stats:
+            print(f"cache: {cache_stats['hits']} hits, {cache_stats['disk_hits']} disk hits, "
+                  f"{cache_stats['misses']} misses, {cache_stats['stale']} stale")
+
+    manager.close()
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
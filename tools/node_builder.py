@@ -13,6 +13,11 @@ from typing import Dict, List, Any, Tuple, Optional
 from datetime import datetime
 import logging
 
+try:
+    from tools.workflow_model import WorkflowModel
+except ModuleNotFoundError:  # 作为脚本直接运行
+    from workflow_model import WorkflowModel
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
@@ -71,6 +76,7 @@ class NodeBuilder:
         """初始化节点构建器"""
         self.nodes = []
         self.connections = {}
+        self._model: Optional[WorkflowModel] = None
         self.node_counter = 0
         self.position_x = 250
         self.position_y = 300
@@ -128,9 +134,11 @@ class NodeBuilder:
         """
         连接两个节点
 
+        n8n 的连接以节点名称为键，传入节点ID时会转换为对应的名称。
+
         Args:
-            source_id: 源节点ID
-            target_id: 目标节点ID
+            source_id: 源节点ID或名称
+            target_id: 目标节点ID或名称
             source_output: 源输出名称
             target_input: 目标输入名称
             output_index: 输出索引
@@ -140,6 +148,9 @@ class NodeBuilder:
             是否成功连接
         """
         try:
+            source_id = self._node_name(source_id)
+            target_id = self._node_name(target_id)
+
             # 初始化源节点连接
             if source_id not in self.connections:
                 self.connections[source_id] = {}
@@ -167,6 +178,14 @@ class NodeBuilder:
             logger.error(f"❌ Failed to connect nodes: {e}")
             return False
 
+    def _node_name(self, key: str) -> str:
+        """将节点ID或名称解析为节点名称 (未知节点原样返回)"""
+        if self._model is None or self._model.nodes is not self.nodes or \
+                len(self._model.by_id) != len(self.nodes) or self._model.resolve(key) is None:
+            self._model = WorkflowModel({"nodes": self.nodes})
+        node = self._model.resolve(key)
+        return node.get('name', key) if node else key
+
     def configure_node(self, node_id: str, parameters: Dict[str, Any]) -> bool:
         """
         配置节点参数
@@ -464,18 +483,25 @@ class NodeBuilder:
 
         # 检查连接
         if workflow.get('connections'):
-            # 检查所有连接的节点是否存在
-            node_ids = {node['id'] for node in workflow['nodes']}
+            model = WorkflowModel(workflow)
 
-            for source_id, outputs in workflow['connections'].items():
-                if source_id not in node_ids:
-                    validation["errors"].append(f"Connection from non-existent node: {source_id}")
+            for name in model.duplicate_names:
+                validation["valid"] = False
+                validation["errors"].append(f"Duplicate node name: {name}")
 
-                for output_type, connections_list in outputs.items():
-                    for connections in connections_list:
-                        for conn in connections:
-                            if conn['node'] not in node_ids:
-                                validation["errors"].append(f"Connection to non-existent node: {conn['node']}")
+            # 检查所有连接的节点是否存在
+            for source, target in model.dangling:
+                validation["valid"] = False
+                if target is None:
+                    validation["errors"].append(f"Connection from non-existent node: {source}")
+                else:
+                    validation["errors"].append(f"Connection to non-existent node: {target}")
+
+            for source in model.id_keyed:
+                validation["warnings"].append(
+                    f"Connection keyed by node id '{source}', n8n expects the node name "
+                    f"'{model.by_id[source].get('name')}'"
+                )
 
         return validation
 
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+n8n Rate Limiter
+客户端限流：令牌桶限速 + 并发上限，进程内共享，可通过文件锁跨进程协调
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional
+
+try:
+    from tools.api_client import load_agent_config, get_config_value
+except ModuleNotFoundError:  # 作为脚本直接运行
+    from api_client import load_agent_config, get_config_value
+
+try:
+    import fcntl
+except ImportError:  # Windows: 只做进程内协调
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def _file_lock(path: Path, blocking: bool = True) -> Iterator[Optional[Any]]:
+    """
+    对文件加排他锁
+
+    Yields:
+        已加锁的文件对象；非阻塞模式下未获得锁时为 None
+    """
+    f = open(path, 'a+')
+    try:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield None
+            return
+        try:
+            yield f
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+    finally:
+        f.close()
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    以 rate 个/秒补充令牌，最多积累 capacity 个。reserve() 立即扣除令牌
+    并返回调用方需要等待的秒数 (令牌可以透支)，因此同步和异步代码都能使用。
+    指定 state_file 时桶状态保存在文件中，由文件锁保护，多个进程共享同一个桶。
+    """
+
+    def __init__(self, rate: float, capacity: float, state_file: str = None):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量 (允许的突发请求数)
+            state_file: 跨进程共享的状态文件 (为空时只在进程内共享)
+        """
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.state_file = Path(state_file) if state_file and fcntl else None
+        self._tokens = self.capacity
+        self._updated = time.time()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+        if state_file and not fcntl:
+            logger.warning("⚠️ File locking not available, rate limit is per process")
+        if self.state_file:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        预订令牌
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            获得令牌前需要等待的秒数
+        """
+        with self._lock:
+            if self.state_file:
+                with _file_lock(self.state_file) as f:
+                    self._load(f)
+                    wait = self._take(tokens)
+                    self._save(f)
+                return wait
+            return self._take(tokens)
+
+    def pause(self, seconds: float):
+        """
+        在一段时间内暂停发放令牌 (如收到 429 Retry-After)
+
+        Args:
+            seconds: 暂停秒数
+        """
+        with self._lock:
+            if self.state_file:
+                with _file_lock(self.state_file) as f:
+                    self._load(f)
+                    self._paused_until = max(self._paused_until, time.time() + seconds)
+                    self._save(f)
+            else:
+                self._paused_until = max(self._paused_until, time.time() + seconds)
+
+    def _take(self, tokens: float) -> float:
+        now = time.time()
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+        self._tokens -= tokens
+
+        wait = max(self._paused_until - now, 0.0)
+        if self._tokens < 0:
+            wait = max(wait, -self._tokens / self.rate)
+        return wait
+
+    def _load(self, f):
+        f.seek(0)
+        try:
+            state = json.loads(f.read() or '{}')
+        except ValueError:
+            state = {}
+        self._tokens = state.get('tokens', self.capacity)
+        self._updated = state.get('updated', time.time())
+        self._paused_until = state.get('paused_until', 0.0)
+
+    def _save(self, f):
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps({
+            'tokens': self._tokens,
+            'updated': self._updated,
+            'paused_until': self._paused_until
+        }))
+        f.flush()
+
+
+class ConcurrencyGovernor:
+    """
+    并发上限
+
+    进程内用信号量限制同时进行的请求数；指定 lock_dir 时每个并发槽对应
+    一个锁文件，所有进程合计不超过 max_concurrent。
+    """
+
+    def __init__(self, max_concurrent: int, lock_dir: str = None, poll_interval: float = 0.05):
+        """
+        初始化并发控制
+
+        Args:
+            max_concurrent: 最大并发请求数
+            lock_dir: 跨进程槽位锁文件目录 (为空时只在进程内限制)
+            poll_interval: 跨进程等待空闲槽位时的检查间隔 (秒)
+        """
+        self.max_concurrent = max(int(max_concurrent), 1)
+        self.lock_dir = Path(lock_dir) if lock_dir and fcntl else None
+        self.poll_interval = poll_interval
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrent)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+        if self.lock_dir:
+            self.lock_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def in_flight(self) -> int:
+        """当前进程内进行中的请求数"""
+        return self._in_flight
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """占用一个并发槽位，退出时释放"""
+        self._semaphore.acquire()
+        try:
+            with self._lock:
+                self._in_flight += 1
+            if self.lock_dir:
+                with self._process_slot():
+                    yield
+            else:
+                yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._semaphore.release()
+
+    @contextmanager
+    def _process_slot(self) -> Iterator[None]:
+        while True:
+            for i in range(self.max_concurrent):
+                with _file_lock(self.lock_dir / f"slot-{i}.lock", blocking=False) as f:
+                    if f is not None:
+                        yield
+                        return
+            time.sleep(self.poll_interval)
+
+
+class RateLimiter:
+    """
+    n8n API 流量控制：令牌桶限速 + 并发上限
+
+    配置:
+        security.rate_limit.enabled: 是否启用限速 (默认关闭，只限制并发)
+        security.rate_limit.max_requests / window: 每个窗口 (毫秒) 允许的请求数
+        security.rate_limit.burst: 允许的突发请求数
+        security.rate_limit.lock_dir: 跨进程协调目录 (为空时只在进程内共享)
+        advanced.max_concurrent: 最大并发请求数
+    """
+
+    def __init__(self, max_requests: float = 100, window: float = 60.0, burst: float = None,
+                 max_concurrent: int = 5, lock_dir: str = None, enabled: bool = True):
+        """
+        初始化流量控制
+
+        Args:
+            max_requests: 每个窗口允许的请求数
+            window: 窗口长度 (秒)
+            burst: 桶容量 (默认 max_requests 的 1/10，至少为 1)
+            max_concurrent: 最大并发请求数
+            lock_dir: 跨进程协调目录
+            enabled: 是否启用限速 (并发上限始终生效)
+        """
+        self.enabled = enabled
+        self.rate = max_requests / window
+        self.bucket = TokenBucket(
+            self.rate,
+            burst if burst else max(max_requests / 10, 1),
+            str(Path(lock_dir) / 'token_bucket.json') if lock_dir else None
+        )
+        self.governor = ConcurrencyGovernor(
+            max_concurrent,
+            str(Path(lock_dir) / 'slots') if lock_dir else None
+        )
+        self.stats = {"requests": 0, "throttled": 0, "waited": 0.0, "paused": 0}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'RateLimiter':
+        """
+        根据agent配置创建
+
+        Args:
+            config: agent配置
+
+        Returns:
+            流量控制器
+        """
+        lock_dir = get_config_value(config, 'security.rate_limit.lock_dir') or None
+        return cls(
+            max_requests=float(get_config_value(config, 'security.rate_limit.max_requests', 100)),
+            window=float(get_config_value(config, 'security.rate_limit.window', 60000)) / 1000,
+            burst=get_config_value(config, 'security.rate_limit.burst'),
+            max_concurrent=int(get_config_value(config, 'advanced.max_concurrent', 5)),
+            lock_dir=os.path.expanduser(lock_dir) if lock_dir else None,
+            enabled=bool(get_config_value(config, 'security.rate_limit.enabled', False))
+        )
+
+    def reserve(self) -> float:
+        """
+        预订一次请求的令牌
+
+        Returns:
+            发送请求前需要等待的秒数
+        """
+        wait = self.bucket.reserve() if self.enabled else 0.0
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            if wait > 0:
+                self.stats["throttled"] += 1
+                self.stats["waited"] += wait
+        return wait
+
+    def acquire(self, sleep=time.sleep):
+        """阻塞直到可以发送下一个请求"""
+        wait = self.reserve()
+        if wait > 0:
+            sleep(wait)
+
+    async def acquire_async(self):
+        """
+        在异步代码中等待可以发送下一个请求
+
+        预订令牌要获取线程锁 (跨进程时还有文件锁)，在线程池中进行，不阻塞事件循环。
+        """
+        import asyncio
+        wait = await asyncio.get_running_loop().run_in_executor(None, self.reserve)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    @contextmanager
+    def slot(self, sleep=time.sleep) -> Iterator[None]:
+        """
+        占用并发槽位并等待令牌，用于包裹一次HTTP请求
+
+            with limiter.slot():
+                response = session.get(url)
+        """
+        with self.governor.slot():
+            self.acquire(sleep)
+            yield
+
+    def pause(self, seconds: float):
+        """
+        服务端返回 429 时让所有共享此限速器的调用方一起退避
+
+        Args:
+            seconds: 退避秒数
+        """
+        if self.enabled and seconds > 0:
+            self.bucket.pause(seconds)
+            with self._stats_lock:
+                self.stats["paused"] += 1
+
+    async def pause_async(self, seconds: float):
+        """在异步代码中调用 pause()，加锁在线程池中进行，不阻塞事件循环"""
+        import asyncio
+        await asyncio.get_running_loop().run_in_executor(None, self.pause, seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取限流统计
+
+        Returns:
+            请求数、被限速次数、累计等待秒数、429退避次数、当前并发数
+        """
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["waited"] = round(stats["waited"], 3)
+        stats["rate"] = round(self.rate, 3) if self.enabled else None
+        stats["max_concurrent"] = self.governor.max_concurrent
+        stats["in_flight"] = self.governor.in_flight
+        return stats
+
+
+_limiters: Dict[tuple, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(config: Dict[str, Any] = None) -> RateLimiter:
+    """
+    获取进程内共享的流量控制器，相同配置的调用方共用同一个令牌桶和并发上限
+
+    Args:
+        config: agent配置 (默认加载 agent_config.yaml)
+
+    Returns:
+        流量控制器
+    """
+    config = config if config is not None else load_agent_config()
+    key = (
+        get_config_value(config, 'security.rate_limit.enabled', False),
+        get_config_value(config, 'security.rate_limit.max_requests', 100),
+        get_config_value(config, 'security.rate_limit.window', 60000),
+        get_config_value(config, 'security.rate_limit.burst'),
+        get_config_value(config, 'security.rate_limit.lock_dir'),
+        get_config_value(config, 'advanced.max_concurrent', 5),
+    )
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = RateLimiter.from_config(config)
+        return _limiters[key]
@@ -19,6 +19,13 @@ import logging
 import asyncio
 import aiohttp
 
+try:
+    from tools.execution_tracker import adaptive_intervals
+    from tools.rate_limiter import get_rate_limiter
+except ModuleNotFoundError:  # 作为脚本直接运行
+    from execution_tracker import adaptive_intervals
+    from rate_limiter import get_rate_limiter
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -47,6 +54,9 @@ class WorkflowTestRunner:
         if self.api_key:
             self.headers['Authorization'] = f'Bearer {self.api_key}'
 
+        # 与工作流管理器共享的限速和并发上限
+        self.rate_limiter = get_rate_limiter()
+
         self.results = []
         self.start_time = None
         self.end_time = None
@@ -96,18 +106,20 @@ class WorkflowTestRunner:
             url = f"{self.base_url}{endpoint}"
             headers = {**self.headers, **test_case["input"].get("headers", {})}
 
-            # 发送请求
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=headers,
-                json=test_case["input"].get("body"),
-                timeout=test_case.get("timeout", 30)
-            )
+            # 发送请求 (限速等待不计入响应时间)
+            with self.rate_limiter.slot():
+                request_start = time.time()
+                response = requests.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    json=test_case["input"].get("body"),
+                    timeout=test_case.get("timeout", 30)
+                )
 
             # 记录响应
             result["status_code"] = response.status_code
-            result["response_time"] = time.time() - start_time
+            result["response_time"] = time.time() - request_start
 
             if response.content:
                 try:
@@ -282,13 +294,19 @@ class WorkflowTestRunner:
 
         return value
 
-    def wait_for_completion(self, task_id: str, max_wait: int = 60) -> Dict:
+    def wait_for_completion(self, task_id: str, max_wait: int = 60,
+                            initial_interval: float = 0.25, max_interval: float = 5.0) -> Dict:
         """
         等待异步任务完成
 
+        轮询间隔从 initial_interval 开始按1.5倍增长，最长 max_interval，
+        短任务无需等待固定的轮询周期，长任务也不会频繁请求接口。
+
         Args:
             task_id: 任务ID
             max_wait: 最大等待时间（秒）
+            initial_interval: 初始轮询间隔（秒）
+            max_interval: 最大轮询间隔（秒）
 
         Returns:
             任务结果
@@ -297,14 +315,16 @@ class WorkflowTestRunner:
             return {"error": "No task ID provided"}
 
         start = time.time()
+        intervals = adaptive_intervals(initial_interval, max_interval)
 
         while time.time() - start < max_wait:
             try:
                 # 查询任务状态
-                response = requests.get(
-                    f"{self.base_url}/api/tasks/{task_id}",
-                    headers=self.headers
-                )
+                with self.rate_limiter.slot():
+                    response = requests.get(
+                        f"{self.base_url}/api/tasks/{task_id}",
+                        headers=self.headers
+                    )
 
                 if response.status_code == 200:
                     data = response.json()
@@ -314,7 +334,7 @@ class WorkflowTestRunner:
             except:
                 pass
 
-            time.sleep(2)
+            time.sleep(min(next(intervals), max(max_wait - (time.time() - start), 0)))
 
         return {"error": "Timeout waiting for task completion"}
 
@@ -9,12 +9,27 @@ Version: 1.0.0
 
 import json
 import os
+import heapq
+import sys
+from collections import OrderedDict
 from typing import Dict, List, Any, Tuple, Optional
 from datetime import datetime
-import networkx as nx
 import logging
 from pathlib import Path
 
+try:
+    from tools.cost_model import CostModel, StaticCostModel, MeasuredCostModel
+    from tools.analysis_cache import AnalysisCache
+    from tools.workflow_model import Connection, WorkflowModel, WorkflowDigest, canonical_hash
+    from tools.workflow_graph import GRAPH_BACKENDS, ReachabilityIndex, build_graph, find_cycles
+    from tools.data_flow import analyze_data_flow, node_expressions, node_references
+except ModuleNotFoundError:  # 作为脚本直接运行
+    from cost_model import CostModel, StaticCostModel, MeasuredCostModel
+    from analysis_cache import AnalysisCache
+    from workflow_model import Connection, WorkflowModel, WorkflowDigest, canonical_hash
+    from workflow_graph import GRAPH_BACKENDS, ReachabilityIndex, build_graph, find_cycles
+    from data_flow import analyze_data_flow, node_expressions, node_references
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
@@ -22,14 +37,272 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# 实测 p95 超过此值 (毫秒) 的节点视为性能问题
+SLOW_NODE_MS = 1000
+
+# 连接验证最多报告的环数和列举环的时间上限 (秒)
+MAX_REPORTED_CYCLES = 20
+CYCLE_TIME_BUDGET = 1.0
+
+# 最多报告的可并行节点组数
+MAX_PARALLEL_GROUPS = 20
+
+# 不同输出互斥的分支节点类型 (同一次执行只走其中一个输出)
+EXCLUSIVE_BRANCH_TYPES = ('if', 'switch')
+
+# 按工作流内容摘要缓存的分析结果数 (0 表示不缓存)
+ANALYSIS_MEMO_SIZE = 32
+
+# 分析结果版本：分析逻辑或结果格式变化时递增，使持久缓存 (AnalysisCache) 中的旧结果失效
+ANALYSIS_VERSION = '4'
+
+# 各项分析：(结果键, 方法, 依赖的工作流部分)
+# topology: 节点增删和连接  nodes: 节点内容  meta: 节点和连接以外的顶层字段
+ANALYSES = (
+    ('basic_info', 'analyze_basic_info', ('topology', 'nodes', 'meta')),
+    ('structure', 'analyze_structure', ('topology',)),
+    ('complexity', 'analyze_complexity', ('topology', 'nodes')),
+    ('critical_path', '_get_critical_path', ('topology', 'nodes')),
+    ('performance', 'analyze_performance', ('topology', 'nodes')),
+    ('bottlenecks', 'find_bottlenecks', ('topology', 'nodes')),
+    ('optimizations', 'suggest_optimizations', ('topology', 'nodes')),
+    ('validation', 'validate_connections', ('topology', 'nodes')),
+    ('security', 'analyze_security', ('nodes',)),
+    ('best_practices', 'check_best_practices', ('nodes', 'meta')),
+    ('data_flow', '_get_data_flow', ('topology', 'nodes')),
+)
+
+
+def _popcount(x: int) -> int:
+    """整数中置位的个数 (int.bit_count 需要 Python 3.10)"""
+    return bin(x).count('1')
+
+
+class AnalysisIndex:
+    """
+    分析用的预计算索引
+
+    构建图时对节点做一次遍历，生成各项分析共享的查询表，避免每项检查
+    都重新扫描节点、重复序列化参数或统计连接。增量分析时按变化的节点和边
+    原地更新 (apply_change)。
+    """
+
+    def __init__(self, model: WorkflowModel, graph):
+        """
+        建立索引
+
+        Args:
+            model: 工作流模型
+            graph: 以节点ID为键的有向图 (CompactGraph 或 NetworkXGraph)
+        """
+        self.model = model
+        self.node_ids: List[str] = []
+        self.type_lower: Dict[str, str] = {}
+        self.text_lower: Dict[str, str] = {}
+        self.params_lower: Dict[str, str] = {}
+        self.base_type_counts: Dict[str, int] = {}
+        self.with_credentials = set()
+        self._base_types: Dict[str, str] = {}
+
+        for node in model.nodes:
+            node_id = model.node_id(node)
+            self.node_ids.append(node_id)
+            self._index_node(node_id, node)
+
+        self.edge_count = len(model.connections)
+        self.in_degree: Dict[str, int] = dict(graph.in_degree()) if graph is not None else {}
+        self.out_degree: Dict[str, int] = dict(graph.out_degree()) if graph is not None else {}
+        self.is_acyclic: bool = graph.is_directed_acyclic_graph() if graph is not None else True
+        self._type_matches: Dict[str, List[str]] = {}
+
+    def _index_node(self, node_id: str, node: Dict[str, Any]):
+        node_type = node.get('type', '')
+        base_type = node_type.split('.')[-1] if '.' in node_type else node_type or 'unknown'
+
+        self.type_lower[node_id] = node_type.lower()
+        self.text_lower[node_id] = str(node).lower()
+        self.params_lower[node_id] = json.dumps(node.get('parameters', {})).lower()
+        self._base_types[node_id] = base_type
+        self.base_type_counts[base_type] = self.base_type_counts.get(base_type, 0) + 1
+        if 'credentials' in node:
+            self.with_credentials.add(node_id)
+
+    def _unindex_node(self, node_id: str):
+        base_type = self._base_types.pop(node_id)
+        self.base_type_counts[base_type] -= 1
+        if not self.base_type_counts[base_type]:
+            del self.base_type_counts[base_type]
+        del self.type_lower[node_id], self.text_lower[node_id], self.params_lower[node_id]
+        self.with_credentials.discard(node_id)
+
+    def apply_change(self, model: WorkflowModel, change: Dict[str, Any], graph):
+        """
+        按 WorkflowModel.apply_delta 的结果更新索引 (图应已更新)
+
+        Args:
+            model: 变化后的模型
+            change: apply_delta 的返回值
+            graph: 变化后的图
+        """
+        self.model = model
+        for source, target in change['edges_removed']:
+            self.out_degree[source] -= 1
+            self.in_degree[target] -= 1
+        for node_id in change['removed']:
+            self._unindex_node(node_id)
+            self.node_ids.remove(node_id)
+            del self.in_degree[node_id], self.out_degree[node_id]
+        for node_id in change['updated']:
+            self._unindex_node(node_id)
+            self._index_node(node_id, model.by_id[node_id])
+        for node_id in change['added']:
+            self.node_ids.append(node_id)
+            self._index_node(node_id, model.by_id[node_id])
+            self.in_degree[node_id] = self.out_degree[node_id] = 0
+        for source, target in change['edges_added']:
+            self.out_degree[source] += 1
+            self.in_degree[target] += 1
+
+        self.edge_count = len(model.connections)
+        if change['sources'] or change['added'] or change['removed']:
+            self.is_acyclic = graph.is_directed_acyclic_graph()
+        self._type_matches = {}
+
+    def nodes_with_type(self, keyword: str) -> List[str]:
+        """类型 (小写) 包含关键字的节点ID，按关键字缓存"""
+        if keyword not in self._type_matches:
+            self._type_matches[keyword] = [
+                node_id for node_id in self.node_ids if keyword in self.type_lower[node_id]
+            ]
+        return self._type_matches[keyword]
+
+    def has_type(self, keyword: str) -> bool:
+        """是否存在类型包含关键字的节点"""
+        return bool(self.nodes_with_type(keyword))
+
+    def has_text(self, keyword: str) -> bool:
+        """是否存在内容 (小写) 包含关键字的节点"""
+        return any(keyword in text for text in self.text_lower.values())
+
+    def degree(self, node_id: str) -> int:
+        return self.in_degree.get(node_id, 0) + self.out_degree.get(node_id, 0)
+
+
 class WorkflowAnalyzer:
     """工作流分析器"""
 
-    def __init__(self):
-        """初始化分析器"""
+    def __init__(self, node_timings: Dict[str, Any] = None, cost_model: CostModel = None,
+                 graph_backend: str = 'compact', cache_dir: str = None):
+        """
+        初始化分析器
+
+        Args:
+            node_timings: 节点实测耗时 (ExecutionProfiler.summary() 的结果或其 nodes 字段)，
+                提供时性能、关键路径和瓶颈分析使用实测数据代替估算
+            cost_model: 关键路径使用的耗时模型 (默认有实测数据时为 MeasuredCostModel，
+                否则为 StaticCostModel)
+            graph_backend: 图实现 (compact: 内置 CSR 数组 | networkx)
+            cache_dir: 持久缓存目录，内容未变的工作流直接读取上次的分析结果 (为空时不使用)
+        """
         self.workflow = None
-        self.graph = None
+        self._model: Optional[WorkflowModel] = None
+        self._index: Optional[AnalysisIndex] = None
+        self._graph = None
+        self._graph_workflow = None
+        self.graph_backend = graph_backend
+        self.max_cycles = MAX_REPORTED_CYCLES
+        self.cycle_time_budget = CYCLE_TIME_BUDGET
         self.analysis_results = {}
+        self.node_timings = {}
+        self.cost_model = cost_model
+        self._static_cost_model = None
+        self._critical_path = None
+        self._parallel_groups = None
+        self._data_flow = None
+        self._node_references: Dict[str, tuple] = {}
+        self._node_costs: Dict[str, float] = {}
+        self._component_paths: Dict[frozenset, Dict[str, Any]] = {}
+        self._costs_for = None
+        self.memo_size = ANALYSIS_MEMO_SIZE
+        self._memo: OrderedDict = OrderedDict()
+        self._digest: Optional[WorkflowDigest] = None
+        self._digest_workflow = None
+        self._results_workflow = None
+        self.result_cache = AnalysisCache(cache_dir) if cache_dir else None
+        self.last_cache_hit = False
+        if node_timings:
+            self.set_node_timings(node_timings)
+
+    def set_node_timings(self, node_timings: Dict[str, Any]):
+        """
+        设置节点实测耗时
+
+        Args:
+            node_timings: ExecutionProfiler.summary() 的结果或 {节点名: 耗时统计}
+        """
+        self.node_timings = node_timings.get('nodes', node_timings) if node_timings else {}
+        self._critical_path = None
+        self._parallel_groups = None
+        self._node_costs = {}
+        self._component_paths = {}
+        self._memo.clear()
+        self._results_workflow = None
+
+    @property
+    def model(self) -> Optional[WorkflowModel]:
+        """当前工作流的模型 (按需建立，见 _sync_graph)"""
+        self._sync_graph()
+        return self._model
+
+    @property
+    def graph(self):
+        """当前工作流的图 (按需建立，见 _sync_graph)"""
+        self._sync_graph()
+        return self._graph
+
+    @property
+    def index(self) -> Optional[AnalysisIndex]:
+        """当前工作流的分析索引 (按需建立，见 _sync_graph)"""
+        self._sync_graph()
+        return self._index
+
+    def _sync_graph(self):
+        """
+        模型、图和索引不属于当前工作流时重新建立
+
+        分析结果来自内存或持久缓存时不会建立图结构：新建的分析器此时还没有图，
+        之前的图也可能属于另一个工作流；在第一次使用时按当前工作流重建
+        (同时清空关键路径等派生结果)。
+        """
+        if self.workflow is not None and self._graph_workflow is not self.workflow:
+            self.build_graph()
+
+    def get_cost_model(self) -> CostModel:
+        """
+        获取关键路径分析使用的耗时模型
+
+        Returns:
+            显式指定的模型；否则有实测数据时为 MeasuredCostModel，没有时为 StaticCostModel
+        """
+        if self.cost_model:
+            return self.cost_model
+        if self._static_cost_model is None:
+            self._static_cost_model = StaticCostModel()
+        if self.node_timings:
+            return MeasuredCostModel(self.node_timings, fallback=self._static_cost_model)
+        return self._static_cost_model
+
+    def _find_node(self, node_key: str) -> Optional[Dict[str, Any]]:
+        """按ID或名称查找节点"""
+        if self.model is None:
+            return None
+        return self.model.resolve(node_key)
+
+    def _node_timing(self, node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """节点的实测耗时统计 (runData 以节点名为键)"""
+        if not node:
+            return None
+        return self.node_timings.get(node.get('name')) or self.node_timings.get(node.get('id'))
 
     def load_workflow(self, workflow_path: str) -> bool:
         """
@@ -66,77 +339,222 @@ class WorkflowAnalyzer:
         if not self.workflow:
             return {"error": "No workflow loaded"}
 
+        # 工作流可能被原地修改：每次都重新计算内容摘要，内容变化时图结构也按需重建
+        previous = self._digest.hexdigest() if self._digest_workflow is self.workflow else None
+        self._digest_workflow = None
+        fingerprint = self._fingerprint()
+        if fingerprint is None or fingerprint != previous:
+            self._graph_workflow = None
+
+        # 内容相同的工作流直接返回缓存的结果 (先查内存，再查持久缓存)
+        cached = self._recall(fingerprint)
+        cache_key = None
+        if cached is None and self.result_cache:
+            cache_key = self.result_cache.make_key(canonical_hash(self.workflow), ANALYSIS_VERSION,
+                                                   self._cache_settings())
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                cached = self._restore_results(cached)
+                self._remember(fingerprint, cached)
+        self.last_cache_hit = cached is not None
+        if cached is not None:
+            logger.info("Workflow unchanged, reusing previous analysis")
+            self.analysis_results = cached
+            self._results_workflow = self.workflow
+            return cached
+
         logger.info("Starting workflow analysis...")
 
         # 构建图结构
         self.build_graph()
 
         # 执行各种分析
-        self.analysis_results = {
-            "basic_info": self.analyze_basic_info(),
-            "structure": self.analyze_structure(),
-            "complexity": self.analyze_complexity(),
-            "performance": self.analyze_performance(),
-            "bottlenecks": self.find_bottlenecks(),
-            "optimizations": self.suggest_optimizations(),
-            "validation": self.validate_connections(),
-            "security": self.analyze_security(),
-            "best_practices": self.check_best_practices()
-        }
+        self.analysis_results = {name: getattr(self, method)() for name, method, _ in ANALYSES}
+        self._results_workflow = self.workflow
+        self._remember(fingerprint, self.analysis_results)
+        if cache_key:
+            self.result_cache.put(cache_key, self.analysis_results)
 
         return self.analysis_results
 
+    def analyze_delta(self, delta: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        增量重新分析：在上次分析的基础上应用工作流的变化
+
+        图和度数表原地更新，只重新运行依赖变化部分的分析 (见 ANALYSES)；
+        关键路径只重新计算包含变化节点的弱连通分量。变化后的工作流是新对象，
+        传入 analyze_workflow 的原工作流不会被修改。结果同样按内容摘要缓存。
+
+        Args:
+            delta: 节点和连接的增量，格式见 WorkflowModel.apply_delta，例如
+                {"update_nodes": [node], "add_connections": [{"source": "A", "target": "B"}]}
+
+        Returns:
+            分析结果 (与对变化后的工作流调用 analyze_workflow 相同，等长路径的取舍和列表顺序可能不同)
+        """
+        if not self.workflow:
+            return {"error": "No workflow loaded"}
+        if self._results_workflow is not self.workflow:
+            self.analyze_workflow()
+
+        # 上次的结果来自缓存时 self.model 按需重新建立图结构 (见 _sync_graph)
+        model = self.model.copy()
+        try:
+            change = model.apply_delta(delta)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.error(f"❌ Invalid workflow delta: {e}")
+            return {"error": f"Invalid workflow delta: {e}"}
+
+        if change['rebuild']:
+            logger.info("Workflow delta renames or replaces nodes, running full analysis")
+            return self.analyze_workflow(model.workflow)
+
+        digest = self._digest.copy() if self.memo_size > 0 and self._digest_workflow is self.workflow else None
+
+        # 更新图、索引和内容摘要
+        for source, target in change['edges_removed']:
+            self.graph.remove_edge(source, target)
+        for node_id in change['removed']:
+            self.graph.remove_node(node_id)
+        for node_id in change['added']:
+            self.graph.add_node(node_id)
+        for source, target in change['edges_added']:
+            self.graph.add_edge(source, target)
+        self.index.apply_change(model, change, self.graph)
+        self._model = model
+        self.workflow = self._graph_workflow = model.workflow
+
+        if digest is None:
+            fingerprint = self._fingerprint()
+        else:
+            for node_id in change['removed']:
+                digest.set_node(node_id, None)
+            for node_id in change['updated'] + change['added']:
+                digest.set_node(node_id, model.by_id[node_id])
+            for source_key in change['sources']:
+                digest.set_connections(source_key, model.workflow['connections'].get(source_key))
+            if change['meta']:
+                digest.set_meta(model.workflow)
+            self._digest, self._digest_workflow = digest, self.workflow
+            fingerprint = digest.hexdigest()
+
+        # 受影响的部分
+        aspects = set()
+        if change['sources'] or change['added'] or change['removed']:
+            aspects.add('topology')
+            self._parallel_groups = None
+        if change['added'] or change['updated'] or change['removed']:
+            aspects.add('nodes')
+        if aspects:
+            self._data_flow = None
+        if change['meta']:
+            aspects.add('meta')
+        touched = set(change['updated'] + change['added'] + change['removed'])
+        for edge in change['edges_added'] | change['edges_removed']:
+            touched.update(edge)
+        if touched:
+            self._critical_path = None
+            self._parallel_groups = None
+            for node_id in touched:
+                self._node_costs.pop(node_id, None)
+            self._component_paths = {members: part for members, part in self._component_paths.items()
+                                     if members.isdisjoint(touched)}
+
+        results = self._recall(fingerprint)
+        if results is None:
+            results = dict(self.analysis_results)
+            rerun = [(name, method) for name, method, depends in ANALYSES if aspects.intersection(depends)]
+            for name, method in rerun:
+                results[name] = getattr(self, method)()
+            logger.info(f"Incremental analysis: re-ran {len(rerun)} of {len(ANALYSES)} analyses")
+            self._remember(fingerprint, results)
+
+        self.analysis_results = results
+        self._results_workflow = self.workflow
+        return results
+
+    def _cache_settings(self) -> Dict[str, Any]:
+        """影响分析结果的设置，作为持久缓存键的一部分"""
+        model = self.get_cost_model()
+        static = getattr(model, 'fallback', model)
+        return {
+            "graph_backend": self.graph_backend,
+            "max_cycles": self.max_cycles,
+            "cycle_time_budget": self.cycle_time_budget,
+            "cost_model": type(model).__name__,
+            "cost_stat": getattr(model, 'stat', None),
+            "type_costs": getattr(static, 'type_costs', None),
+            "node_timings": self.node_timings,
+        }
+
+    @staticmethod
+    def _restore_results(results: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON 中保存为列表的连通分量恢复为集合，与直接分析的结果类型一致"""
+        structure = results.get('structure')
+        if structure and 'components' in structure:
+            structure['components'] = [set(component) for component in structure['components']]
+        return results
+
+    def _fingerprint(self) -> Optional[str]:
+        """当前工作流的内容摘要 (不缓存结果时为 None)"""
+        if self.memo_size <= 0:
+            return None
+        if self._digest_workflow is not self.workflow:
+            self._digest = WorkflowDigest(self.workflow)
+            self._digest_workflow = self.workflow
+        return self._digest.hexdigest()
+
+    def _memo_key(self, fingerprint: str) -> tuple:
+        return (fingerprint, self.graph_backend, self.cost_model, self.max_cycles, self.cycle_time_budget)
+
+    def _recall(self, fingerprint: Optional[str]) -> Optional[Dict[str, Any]]:
+        if fingerprint is None:
+            return None
+        key = self._memo_key(fingerprint)
+        if key not in self._memo:
+            return None
+        self._memo.move_to_end(key)
+        return self._memo[key]
+
+    def _remember(self, fingerprint: Optional[str], results: Dict[str, Any]):
+        if fingerprint is None:
+            return
+        self._memo[self._memo_key(fingerprint)] = results
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
     def build_graph(self):
-        """构建工作流的图结构"""
-        self.graph = nx.DiGraph()
+        """
+        构建工作流的图结构
 
-        # 添加节点
-        for node in self.workflow.get('nodes', []):
-            self.graph.add_node(
-                node['id'],
-                data=node,
-                type=node.get('type', ''),
-                name=node.get('name', '')
-            )
+        图节点为节点ID；connections 中以名称 (或旧版的ID) 引用的节点
+        通过 WorkflowModel 的索引解析为ID。
+        """
+        self._graph_workflow = self.workflow
+        self._model = WorkflowModel(self.workflow)
+        self._graph = build_graph(
+            self._model.by_id,
+            ((conn.source, conn.target) for conn in self._model.connections),
+            self.graph_backend
+        )
+        self._critical_path = None
+        self._parallel_groups = None
+        self._data_flow = None
+        self._node_costs = {}
+        self._component_paths = {}
 
-        # 添加边（连接）
-        for source_id, outputs in self.workflow.get('connections', {}).items():
-            for output_type, connections_list in outputs.items():
-                for connections in connections_list:
-                    for conn in connections:
-                        target_id = conn['node']
-                        self.graph.add_edge(
-                            source_id,
-                            target_id,
-                            output_type=output_type,
-                            input_type=conn.get('type', 'main')
-                        )
+        self._index = AnalysisIndex(self._model, self._graph)
 
     def analyze_basic_info(self) -> Dict[str, Any]:
         """分析基本信息"""
-        nodes = self.workflow.get('nodes', [])
-
-        # 统计节点类型
-        node_types = {}
-        for node in nodes:
-            node_type = node.get('type', 'unknown')
-            base_type = node_type.split('.')[-1] if '.' in node_type else node_type
-            node_types[base_type] = node_types.get(base_type, 0) + 1
-
         return {
             "name": self.workflow.get('name', 'Unnamed'),
-            "node_count": len(nodes),
-            "connection_count": sum(
-                len(conns) for outputs in self.workflow.get('connections', {}).values()
-                for conns_list in outputs.values()
-                for conns in conns_list
-            ),
-            "node_types": node_types,
+            "node_count": len(self.index.node_ids),
+            "connection_count": self.index.edge_count,
+            "node_types": dict(self.index.base_type_counts),
             "is_active": self.workflow.get('active', False),
-            "has_trigger": any('trigger' in node.get('type', '').lower()
-                             for node in nodes),
-            "has_error_handling": any('error' in node.get('type', '').lower()
-                                    for node in nodes)
+            "has_trigger": self.index.has_type('trigger'),
+            "has_error_handling": self.index.has_type('error')
         }
 
     def analyze_structure(self) -> Dict[str, Any]:
@@ -144,28 +562,27 @@ class WorkflowAnalyzer:
         if not self.graph:
             return {}
 
+        in_degree, out_degree = self.index.in_degree, self.index.out_degree
+
         # 找出入口和出口节点
-        entry_nodes = [n for n in self.graph.nodes()
-                      if self.graph.in_degree(n) == 0]
-        exit_nodes = [n for n in self.graph.nodes()
-                     if self.graph.out_degree(n) == 0]
+        entry_nodes = [n for n, d in in_degree.items() if d == 0]
+        exit_nodes = [n for n, d in out_degree.items() if d == 0]
 
         # 检查是否有环
-        has_cycles = not nx.is_directed_acyclic_graph(self.graph)
+        has_cycles = not self.index.is_acyclic
 
         # 计算最长路径
         longest_path = []
         if not has_cycles:
             try:
-                longest_path = nx.dag_longest_path(self.graph)
+                longest_path = self.graph.dag_longest_path()
             except:
                 pass
 
         # 分析分支
-        branch_points = [n for n in self.graph.nodes()
-                        if self.graph.out_degree(n) > 1]
-        merge_points = [n for n in self.graph.nodes()
-                       if self.graph.in_degree(n) > 1]
+        branch_points = [n for n, d in out_degree.items() if d > 1]
+        merge_points = [n for n, d in in_degree.items() if d > 1]
+        components = self.graph.weakly_connected_components()
 
         return {
             "entry_nodes": entry_nodes,
@@ -175,25 +592,18 @@ class WorkflowAnalyzer:
             "longest_path": longest_path,
             "branch_points": branch_points,
             "merge_points": merge_points,
-            "is_connected": nx.is_weakly_connected(self.graph),
-            "components": list(nx.weakly_connected_components(self.graph))
+            "is_connected": len(components) == 1,
+            "components": components
         }
 
     def analyze_complexity(self) -> Dict[str, Any]:
         """分析工作流复杂度"""
-        nodes = self.workflow.get('nodes', [])
-        connections = self.workflow.get('connections', {})
-
         # 计算循环复杂度 (类似McCabe复杂度)
         # V(G) = E - N + 2P
         # E = 边数, N = 节点数, P = 连通分量数
-        edge_count = sum(
-            len(conns) for outputs in connections.values()
-            for conns_list in outputs.values()
-            for conns in conns_list
-        )
-        node_count = len(nodes)
-        components = len(list(nx.weakly_connected_components(self.graph))) if self.graph else 1
+        edge_count = self.index.edge_count
+        node_count = len(self.index.node_ids)
+        components = self.graph.number_weakly_connected_components() if self.graph else 1
 
         cyclomatic_complexity = edge_count - node_count + 2 * components
 
@@ -211,40 +621,35 @@ class WorkflowAnalyzer:
             "node_count": node_count,
             "average_connections": edge_count / node_count if node_count > 0 else 0,
             "max_node_connections": max(
-                self.graph.degree(n) for n in self.graph.nodes()
-            ) if self.graph and self.graph.nodes() else 0
+                (self.index.degree(n) for n in self.index.node_ids), default=0
+            )
         }
 
     def calculate_cognitive_complexity(self) -> int:
         """计算认知复杂度"""
         complexity = 0
 
-        for node in self.workflow.get('nodes', []):
-            node_type = node.get('type', '')
-
+        for node_type in self.index.type_lower.values():
             # 条件节点增加复杂度
-            if 'if' in node_type.lower():
+            if 'if' in node_type:
                 complexity += 2
-            elif 'switch' in node_type.lower():
+            elif 'switch' in node_type:
                 complexity += 3
-            elif 'loop' in node_type.lower():
+            elif 'loop' in node_type:
                 complexity += 3
 
             # 错误处理增加复杂度
-            if 'error' in node_type.lower():
+            if 'error' in node_type:
                 complexity += 1
 
             # 复杂的数据处理
-            if 'code' in node_type.lower():
+            if 'code' in node_type:
                 complexity += 2
-            elif 'function' in node_type.lower():
+            elif 'function' in node_type:
                 complexity += 2
 
         # 分支增加复杂度
-        if self.graph:
-            branch_points = [n for n in self.graph.nodes()
-                           if self.graph.out_degree(n) > 1]
-            complexity += len(branch_points)
+        complexity += sum(1 for d in self.index.out_degree.values() if d > 1)
 
         return complexity
 
@@ -262,10 +667,24 @@ class WorkflowAnalyzer:
     def analyze_performance(self) -> Dict[str, Any]:
         """分析性能特征"""
         performance_issues = []
-        estimated_time = 0
+        measured_nodes = 0
 
-        for node in self.workflow.get('nodes', []):
+        for node in self.model.nodes:
             node_type = node.get('type', '')
+            lowered = self.index.type_lower[self.model.node_id(node)]
+
+            # 有实测数据时使用实测耗时
+            timing = self._node_timing(node)
+            if timing:
+                measured_nodes += 1
+                if timing['p95'] >= SLOW_NODE_MS:
+                    performance_issues.append({
+                        "node": node['id'],
+                        "issue": f"Measured p95 {timing['p95']:.0f}ms (p50 {timing['p50']:.0f}ms, "
+                                 f"max {timing['max']:.0f}ms)",
+                        "severity": "high" if timing['p95'] >= 5 * SLOW_NODE_MS else "medium"
+                    })
+                continue
 
             # 检查潜在的性能问题
             if 'httpRequest' in node_type:
@@ -274,46 +693,169 @@ class WorkflowAnalyzer:
                     "issue": "External API call - potential latency",
                     "severity": "medium"
                 })
-                estimated_time += 2  # 估计2秒
 
-            elif 'database' in node_type.lower():
+            elif 'database' in lowered:
                 performance_issues.append({
                     "node": node['id'],
                     "issue": "Database operation - check query optimization",
                     "severity": "medium"
                 })
-                estimated_time += 1
 
-            elif 'loop' in node_type.lower():
+            elif 'loop' in lowered:
                 performance_issues.append({
                     "node": node['id'],
                     "issue": "Loop operation - potential performance bottleneck",
                     "severity": "high"
                 })
-                estimated_time += 5
 
-            elif 'wait' in node_type.lower():
+            elif 'wait' in lowered:
                 wait_time = node.get('parameters', {}).get('amount', 1)
                 performance_issues.append({
                     "node": node['id'],
                     "issue": f"Wait operation - {wait_time}s delay",
                     "severity": "low"
                 })
-                estimated_time += wait_time
 
         # 检查并行化机会
-        parallelization_opportunities = self.find_parallelization_opportunities()
+        parallelization_opportunities = self._get_parallel_groups()
+
+        # 按耗时模型估算端到端耗时：并行分支取关键路径，串行为所有节点之和
+        critical = self._get_critical_path()
 
         return {
-            "estimated_execution_time": f"{estimated_time}s",
+            "estimated_execution_time": f"{round(critical.get('latency_ms', 0) / 1000, 3)}s",
+            "sequential_execution_time": f"{round(critical.get('sequential_ms', 0) / 1000, 3)}s",
+            "timing_source": "measured" if measured_nodes else "estimated",
+            "measured_nodes": measured_nodes,
             "performance_issues": performance_issues,
             "parallelization_opportunities": parallelization_opportunities,
-            "has_batch_processing": any('batch' in n.get('type', '').lower()
-                                       for n in self.workflow.get('nodes', [])),
-            "has_caching": any('cache' in str(n)
-                             for n in self.workflow.get('nodes', []))
+            "has_batch_processing": self.index.has_type('batch'),
+            "has_caching": self.index.has_text('cache')
         }
 
+    def _get_critical_path(self) -> Dict[str, Any]:
+        """关键路径分析结果 (图或耗时模型变化前只计算一次)"""
+        self._sync_graph()
+        if self._critical_path is None:
+            self._critical_path = self.analyze_critical_path()
+        return self._critical_path
+
+    def analyze_critical_path(self) -> Dict[str, Any]:
+        """
+        按耗时模型计算加权关键路径
+
+        每个节点的最早完成时间 = 自身耗时 + 前驱最早完成时间 (含连接耗时) 的最大值，
+        并行分支只取最慢的一条；最晚完成时间从出口反向计算，两者之差为节点的
+        松弛时间 (不影响整体耗时的可延迟量)，关键路径上的节点松弛为0。
+        各弱连通分量分别计算并缓存，增量分析时只重新计算包含变化节点的分量。
+
+        Returns:
+            path: 关键路径 (节点键列表)
+            latency_ms: 预计端到端耗时 (并行分支)
+            sequential_ms: 所有节点耗时之和 (分支串行执行时)
+            node_costs / slack_ms: {节点键: 毫秒}
+            cost_source: 耗时来源 (static | measured | ...)
+        """
+        model = self.get_cost_model()
+        result = {"path": [], "latency_ms": 0.0, "sequential_ms": 0.0,
+                  "node_costs": {}, "slack_ms": {}, "cost_source": model.source}
+
+        if not self.graph:
+            return result
+
+        if self._costs_for is not self.cost_model:
+            self._node_costs, self._component_paths = {}, {}
+            self._costs_for = self.cost_model
+
+        nodes = {key: self._find_node(key) or {'id': key, 'name': key} for key in self.graph.nodes()}
+        costs = {}
+        for key, node in nodes.items():
+            cost = self._node_costs.get(key)
+            if cost is None:
+                cost = self._node_costs[key] = model.node_cost(node)
+            costs[key] = cost
+        result["node_costs"] = costs
+        result["sequential_ms"] = sum(costs.values())
+
+        if not self.index.is_acyclic:
+            result["error"] = "Workflow contains cycles"
+            return result
+
+        order = self.graph.topological_sort()
+        if not order:
+            return result
+
+        # 各分量的节点按全局拓扑序排列，只计算没有缓存的分量
+        components = [frozenset(members) for members in self.graph.weakly_connected_components()]
+        missing = [members for members in components if members not in self._component_paths]
+        if missing:
+            component_of = {key: n for n, members in enumerate(missing) for key in members}
+            ordered = [[] for _ in missing]
+            for key in order:
+                if key in component_of:
+                    ordered[component_of[key]].append(key)
+            for members, keys in zip(missing, ordered):
+                self._component_paths[members] = self._component_critical_path(keys, nodes, costs, model)
+        parts = [self._component_paths[members] for members in components]
+        self._component_paths = dict(zip(components, parts))
+
+        # 合并：整体耗时取最慢的分量，其余分量的松弛时间加上与整体的差
+        latency = max(part["latency"] for part in parts)
+        position = {key: i for i, key in enumerate(order)}
+        critical = min((part for part in parts if part["latency"] == latency),
+                       key=lambda part: position[part["path"][-1]])
+        slack = {}
+        for part in parts:
+            shift = latency - part["latency"]
+            for key, value in part["slack"].items():
+                slack[key] = round(max(value + shift, 0.0), 3)
+
+        result.update({
+            "path": list(critical["path"]),
+            "latency_ms": round(latency, 3),
+            "slack_ms": {key: slack[key] for key in order},
+        })
+        return result
+
+    def _component_critical_path(self, order: List[str], nodes: Dict[str, Dict[str, Any]],
+                                 costs: Dict[str, float], model: CostModel) -> Dict[str, Any]:
+        """一个弱连通分量 (节点按拓扑序) 的关键路径、耗时和未取整的松弛时间"""
+        def edge_cost(source, target):
+            return model.edge_cost(nodes[source], nodes[target])
+
+        graph = self.graph
+        # 正向：最早完成时间
+        finish = {}
+        best_pred = {}
+        for key in order:
+            start = 0.0
+            for pred in graph.predecessors(key):
+                arrival = finish[pred] + edge_cost(pred, key)
+                if key not in best_pred or arrival > start:
+                    start = arrival
+                    best_pred[key] = pred
+            finish[key] = start + costs[key]
+        latency = max(finish.values())
+
+        # 反向：最晚完成时间
+        latest = {}
+        for key in reversed(order):
+            successors = list(graph.successors(key))
+            if successors:
+                latest[key] = min(latest[succ] - costs[succ] - edge_cost(key, succ) for succ in successors)
+            else:
+                latest[key] = latency
+
+        # 从最晚结束的节点回溯关键路径
+        key = max(finish, key=finish.get)
+        path = [key]
+        while key in best_pred:
+            key = best_pred[key]
+            path.append(key)
+
+        return {"path": list(reversed(path)), "latency": latency,
+                "slack": {key: latest[key] - finish[key] for key in order}}
+
     def find_bottlenecks(self) -> List[Dict[str, Any]]:
         """查找瓶颈"""
         bottlenecks = []
@@ -321,29 +863,28 @@ class WorkflowAnalyzer:
         if not self.graph:
             return bottlenecks
 
-        # 查找关键路径上的节点
-        if nx.is_directed_acyclic_graph(self.graph):
-            try:
-                critical_path = nx.dag_longest_path(self.graph)
-                for node_id in critical_path:
-                    node = next((n for n in self.workflow.get('nodes', [])
-                               if n['id'] == node_id), None)
-                    if node:
-                        node_type = node.get('type', '')
-                        if any(slow in node_type.lower()
-                              for slow in ['http', 'database', 'loop', 'wait']):
-                            bottlenecks.append({
-                                "node_id": node_id,
-                                "node_name": node.get('name', ''),
-                                "type": "performance",
-                                "reason": "Slow operation on critical path"
-                            })
-            except:
-                pass
+        # 查找关键路径上耗时占比高的节点
+        critical = self._get_critical_path()
+        latency = critical.get('latency_ms', 0)
+        for key in critical.get('path', []):
+            cost = critical['node_costs'].get(key, 0)
+            share = cost / latency if latency else 0
+            if share < 0.2:
+                continue
+            node = self._find_node(key) or {'id': key, 'name': key}
+            bottlenecks.append({
+                "node_id": node.get('id'),
+                "node_name": node.get('name', ''),
+                "type": "performance",
+                "reason": f"Slow operation on critical path: {share:.0%} of projected latency "
+                          f"({cost:.0f}ms {critical['cost_source']})",
+                "cost_ms": cost,
+                "share": round(share, 3)
+            })
 
         # 查找高度连接的节点（可能成为瓶颈）
-        for node_id in self.graph.nodes():
-            degree = self.graph.degree(node_id)
+        for node_id in self.index.node_ids:
+            degree = self.index.degree(node_id)
             if degree > 5:
                 bottlenecks.append({
                     "node_id": node_id,
@@ -358,35 +899,54 @@ class WorkflowAnalyzer:
         optimizations = []
 
         # 检查是否可以添加批处理
-        if not any('batch' in n.get('type', '').lower()
-                  for n in self.workflow.get('nodes', [])):
-            loop_nodes = [n for n in self.workflow.get('nodes', [])
-                         if 'loop' in n.get('type', '').lower()]
+        if not self.index.has_type('batch'):
+            loop_nodes = self.index.nodes_with_type('loop')
             if loop_nodes:
                 optimizations.append({
                     "type": "batch_processing",
                     "suggestion": "Consider using Split In Batches node for better performance",
-                    "nodes": [n['id'] for n in loop_nodes]
+                    "nodes": list(loop_nodes)
                 })
 
         # 检查并行化机会
-        parallel_ops = self.find_parallelization_opportunities()
+        parallel_ops = self._get_parallel_groups()
         if parallel_ops:
             optimizations.append({
                 "type": "parallelization",
-                "suggestion": "These operations can run in parallel",
-                "nodes": parallel_ops
+                "suggestion": "These independent operations on the critical path can run in parallel",
+                "nodes": [group['nodes'] for group in parallel_ops],
+                "saved_ms": [group['saved_ms'] for group in parallel_ops]
             })
 
         # 检查错误处理
-        if not any('error' in n.get('type', '').lower()
-                  for n in self.workflow.get('nodes', [])):
+        if not self.index.has_type('error'):
             optimizations.append({
                 "type": "error_handling",
                 "suggestion": "Add error handling nodes for better reliability",
                 "priority": "high"
             })
 
+        # 检查表达式的数据流：远距离读取大量数据、未使用的字段和重复计算
+        data_flow = self._get_data_flow()
+        if data_flow['far_upstream']:
+            optimizations.append({
+                "type": "memory",
+                "suggestion": "Pass only the needed fields instead of reading whole items from far upstream nodes",
+                "nodes": sorted({ref['node'] for ref in data_flow['far_upstream']})
+            })
+        if data_flow['unused_fields']:
+            optimizations.append({
+                "type": "memory",
+                "suggestion": "Remove fields that no downstream node reads",
+                "fields": [f"{entry['node']}.{entry['field']}" for entry in data_flow['unused_fields']]
+            })
+        if data_flow['redundant']:
+            optimizations.append({
+                "type": "recomputation",
+                "suggestion": "Compute repeated expressions once (e.g. in a Set node) and reference the result",
+                "nodes": [entry['nodes'] for entry in data_flow['redundant']]
+            })
+
         # 检查缓存机会
         repeated_api_calls = self.find_repeated_operations()
         if repeated_api_calls:
@@ -398,45 +958,210 @@ class WorkflowAnalyzer:
 
         return optimizations
 
-    def find_parallelization_opportunities(self) -> List[List[str]]:
-        """查找可并行化的操作"""
-        parallel_groups = []
+    def _get_parallel_groups(self) -> List[Dict[str, Any]]:
+        """并行化分析结果 (性能分析和优化建议共用，图或耗时变化前只计算一次)"""
+        self._sync_graph()
+        if self._parallel_groups is None:
+            self._parallel_groups = self.find_parallelization_opportunities()
+        return self._parallel_groups
+
+    def _get_data_flow(self) -> Dict[str, Any]:
+        """数据流分析结果 (优化建议和分析结果共用，节点或连接变化前只计算一次)"""
+        self._sync_graph()
+        if self._data_flow is None:
+            self._data_flow = self.analyze_data_flow()
+        return self._data_flow
+
+    def analyze_data_flow(self) -> Dict[str, Any]:
+        """
+        分析表达式的数据依赖 (见 data_flow.analyze_data_flow)
 
-        if not self.graph:
-            return parallel_groups
-
-        # 查找可以并行执行的节点组
-        for node in self.graph.nodes():
-            siblings = []
-            # 获取所有前驱节点
-            predecessors = list(self.graph.predecessors(node))
-            if predecessors:
-                for pred in predecessors:
-                    # 获取前驱节点的所有后继节点
-                    successors = list(self.graph.successors(pred))
-                    if len(successors) > 1:
-                        # 这些节点可以并行执行
-                        siblings = successors
-                        if len(siblings) > 1 and siblings not in parallel_groups:
-                            parallel_groups.append(siblings)
-
-        return parallel_groups
+        各节点参数中的引用和表达式按节点对象缓存，增量分析时只重新解析变化的节点。
+        """
+        references, expressions, cache = {}, {}, {}
+        for node in self.model.nodes:
+            node_id = self.model.node_id(node)
+            cached = self._node_references.get(node_id)
+            if cached is None or cached[0] is not node:
+                cached = (node, node_references(node), node_expressions(node))
+            cache[node_id] = cached
+            references[node_id], expressions[node_id] = cached[1], cached[2]
+        self._node_references = cache
+        return analyze_data_flow(self.model, self.graph, references, expressions)
+
+    def _exclusive_branches(self, reach: ReachabilityIndex, order: List[str], executed: int) -> List[int]:
+        """
+        互斥分支上的节点
+
+        沿拓扑序计算每个节点必经的分支输出 (IF/Switch 节点及输出序号)：所有到达它的
+        连接都经过的输出。两个节点分别必经同一分支节点的不同输出时不会在同一次执行中
+        同时运行。
+
+        Args:
+            reach: 可达性索引
+            order: 拓扑序
+            executed: 参与计算的节点位集
+
+        Returns:
+            按位编号的列表，第 i 项为与第 i 个节点互斥的节点位集
+        """
+        branches = {
+            node_id for node_id in self.index.node_ids
+            if self.index.type_lower[node_id].split('.')[-1] in EXCLUSIVE_BRANCH_TYPES
+        }
+        incoming: Dict[str, List[Connection]] = {}
+        for conn in self.model.connections:
+            incoming.setdefault(conn.target, []).append(conn)
+
+        # 每个 (分支节点, 输出序号) 占一位
+        tokens: Dict[Tuple[str, int], int] = {}
+        passed: Dict[str, int] = {}
+        for key in order:
+            if not executed >> reach.position[key] & 1:
+                continue
+            mask = None
+            for conn in incoming.get(key, []):
+                if conn.source not in passed:
+                    continue
+                through = passed[conn.source]
+                if conn.source in branches and conn.output_type == 'main':
+                    token = tokens.setdefault((conn.source, conn.output_index), len(tokens))
+                    through |= 1 << token
+                mask = through if mask is None else mask & through
+            passed[key] = mask or 0
+
+        exclusive = [0] * len(reach.order)
+        if not tokens:
+            return exclusive
+        members = [0] * len(tokens)
+        for key, mask in passed.items():
+            while mask:
+                token = (mask & -mask).bit_length() - 1
+                members[token] |= 1 << reach.position[key]
+                mask &= mask - 1
+        outputs: Dict[str, int] = {}
+        for (branch, _), token in tokens.items():
+            outputs[branch] = outputs.get(branch, 0) | members[token]
+        others = [outputs[branch] & ~members[token] for (branch, _), token in tokens.items()]
+
+        by_tokens: Dict[int, int] = {}
+        for key, mask in passed.items():
+            if mask not in by_tokens:
+                excluded, rest = 0, mask
+                while rest:
+                    token = (rest & -rest).bit_length() - 1
+                    excluded |= others[token]
+                    rest &= rest - 1
+                by_tokens[mask] = excluded
+            exclusive[reach.position[key]] = by_tokens[mask]
+        return exclusive
+
+    def find_parallelization_opportunities(self) -> List[Dict[str, Any]]:
+        """
+        查找关键路径上可以并行执行的节点组
+
+        n8n 逐个执行节点，互不可达 (没有依赖关系) 的节点才能同时执行。用可达性索引
+        为关键路径上的每个节点取一个包含它的极大独立节点组 (反链)：关键路径入口可达
+        (同一次执行) 且与它互不可达的节点按耗时从高到低加入。组内节点两两独立，因此
+        不会把相互依赖的分支报告为可并行，也能发现不共享分支点的独立链上的节点。
+        IF/Switch 不同输出上的节点不会同时执行，不计入同一组。
+
+        Returns:
+            节点组列表 (按节省时间从高到低，最多 MAX_PARALLEL_GROUPS 组)，每组包含
+            nodes (按拓扑序), critical_node (所在的关键路径节点), sequential_ms (依次执行),
+            concurrent_ms (同时执行，即组内最大耗时), saved_ms (两者之差)
+        """
+        groups = []
+
+        if not self.graph or not self.index.is_acyclic:
+            return groups
+
+        critical = self._get_critical_path()
+        path = critical.get('path', [])
+        if not path:
+            return groups
+        costs = critical['node_costs']
+
+        # 只在关键路径所在的弱连通分量内建立索引；节点按耗时从高到低 (相同时按节点键)
+        # 编号，位集中最低的一位就是耗时最高的候选节点
+        component = next(members for members in self.graph.weakly_connected_components() if path[0] in members)
+        order = [key for key in self.graph.topological_sort() if key in component]
+        reach = ReachabilityIndex(self.graph, order, sorted(order, key=lambda key: (-costs[key], str(key))))
+        related = [reach.related(key) for key in reach.order]
+        entry = reach.position[path[0]]
+        executed = reach.descendants[entry] | (1 << entry)
+        exclusive = self._exclusive_branches(reach, order, executed)
+        independent = [~(mask | excluded) for mask, excluded in zip(related, exclusive)]
+        position = {key: i for i, key in enumerate(order)}
+
+        # 节省时间的上界：与节点独立的候选节点耗时之和 (同耗时的节点编号连续，按段统计位数)。
+        # 按上界从高到低计算各节点的组，上界低于已找到的第 MAX_PARALLEL_GROUPS 大的节省时间
+        # 后停止 (结果与逐个计算相同)
+        bands = {}
+        for i, key in enumerate(reach.order):
+            bands[costs[key]] = bands.get(costs[key], 0) | (1 << i)
+        step = {key: n for n, key in enumerate(path)}
+        bounds = []
+        for anchor in path:
+            free = executed & independent[reach.position[anchor]]
+            bound = sum(cost * _popcount(free & mask) for cost, mask in bands.items())
+            if free:
+                best = costs[reach.order[(free & -free).bit_length() - 1]]
+                bound += costs[anchor] - max(costs[anchor], best)
+            bounds.append((bound, anchor, free))
+        bounds.sort(key=lambda item: (-item[0], step[item[1]]))
+
+        found: Dict[frozenset, Dict[str, Any]] = {}
+        top: List[float] = []
+        for bound, anchor, remaining in bounds:
+            if not remaining or (len(top) == MAX_PARALLEL_GROUPS and round(bound, 3) < top[0]):
+                break
+            members = [reach.position[anchor]]
+            total = highest = costs[anchor]
+            while remaining:
+                i = (remaining & -remaining).bit_length() - 1
+                members.append(i)
+                remaining &= independent[i]
+                cost = costs[reach.order[i]]
+                total, highest = total + cost, max(highest, cost)
+                # 定期检查：加上剩余候选也进不了前 MAX_PARALLEL_GROUPS 组时放弃
+                if len(members) % 64 == 0 and len(top) == MAX_PARALLEL_GROUPS:
+                    rest = sum(cost * _popcount(remaining & mask) for cost, mask in bands.items())
+                    if round(total + rest - highest, 3) < top[0]:
+                        break
+            if remaining:
+                continue
+            key_set = frozenset(members)
+            if key_set in found:
+                if step[anchor] < step[found[key_set]['critical_node']]:
+                    found[key_set]['critical_node'] = anchor
+                continue
+            if total - highest <= 0:
+                continue
+            found[key_set] = {
+                "nodes": sorted((reach.order[i] for i in members), key=position.get),
+                "critical_node": anchor,
+                "sequential_ms": round(total, 3),
+                "concurrent_ms": round(highest, 3),
+                "saved_ms": round(total - highest, 3)
+            }
+            heapq.heappush(top, found[key_set]['saved_ms'])
+            if len(top) > MAX_PARALLEL_GROUPS:
+                heapq.heappop(top)
+
+        groups = sorted(found.values(), key=lambda group: (-group['saved_ms'], step[group['critical_node']]))
+        return groups[:MAX_PARALLEL_GROUPS]
 
     def find_repeated_operations(self) -> List[str]:
         """查找重复的操作"""
         repeated = []
         node_types = {}
 
-        for node in self.workflow.get('nodes', []):
-            node_type = node.get('type', '')
-            if 'http' in node_type.lower():
-                # 检查是否有相同的URL
-                url = node.get('parameters', {}).get('url', '')
-                if url:
-                    if url in node_types:
-                        node_types[url].append(node['id'])
-                    else:
-                        node_types[url] = [node['id']]
+        for node_id in self.index.nodes_with_type('http'):
+            # 检查是否有相同的URL
+            url = self.model.by_id[node_id].get('parameters', {}).get('url', '')
+            if url:
+                node_types.setdefault(url, []).append(node_id)
 
         # 找出重复的
         for url, nodes in node_types.items():
@@ -455,7 +1180,7 @@ class WorkflowAnalyzer:
 
         # 检查断开的节点
         if self.graph:
-            isolated_nodes = list(nx.isolates(self.graph))
+            isolated_nodes = self.graph.isolates()
             if isolated_nodes:
                 validation_results["warnings"].append({
                     "type": "isolated_nodes",
@@ -463,29 +1188,38 @@ class WorkflowAnalyzer:
                     "message": "These nodes are not connected to the workflow"
                 })
 
-        # 检查必需的连接
-        for node in self.workflow.get('nodes', []):
-            node_type = node.get('type', '')
-            node_id = node['id']
+        # 检查指向不存在节点的连接
+        if self.model:
+            for source, target in self.model.dangling:
+                validation_results["errors"].append({
+                    "type": "dangling_connection",
+                    "node": source,
+                    "message": f"Connection to non-existent node: {target}" if target
+                               else f"Connection from non-existent node: {source}"
+                })
+                validation_results["valid"] = False
 
+        # 检查必需的连接
+        for node_id in self.index.nodes_with_type('respondtowebhook'):
             # Webhook响应节点必须有输入
-            if 'respondToWebhook' in node_type:
-                if self.graph and self.graph.in_degree(node_id) == 0:
-                    validation_results["errors"].append({
-                        "type": "missing_input",
-                        "node": node_id,
-                        "message": "Respond to Webhook node needs input"
-                    })
-                    validation_results["valid"] = False
+            if self.index.in_degree.get(node_id, 0) == 0:
+                validation_results["errors"].append({
+                    "type": "missing_input",
+                    "node": node_id,
+                    "message": "Respond to Webhook node needs input"
+                })
+                validation_results["valid"] = False
 
-        # 检查循环引用
-        if self.graph and not nx.is_directed_acyclic_graph(self.graph):
-            cycles = list(nx.simple_cycles(self.graph))
-            if cycles:
+        # 检查循环引用 (按强连通分量报告，只列举有限个代表性的环)
+        if self.graph and not self.index.is_acyclic:
+            report = find_cycles(self.graph, self.max_cycles, self.cycle_time_budget)
+            if report["components"]:
                 validation_results["warnings"].append({
                     "type": "cycles",
-                    "cycles": cycles,
-                    "message": "Workflow contains cycles"
+                    "components": report["components"],
+                    "cycles": report["cycles"],
+                    "truncated": report["truncated"],
+                    "message": f"Workflow contains cycles in {len(report['components'])} strongly connected component(s)"
                 })
 
         return validation_results
@@ -494,13 +1228,14 @@ class WorkflowAnalyzer:
         """分析安全性"""
         security_issues = []
 
-        for node in self.workflow.get('nodes', []):
-            node_type = node.get('type', '')
+        for node in self.model.nodes:
+            node_id = self.model.node_id(node)
+            node_type = self.index.type_lower[node_id]
             params = node.get('parameters', {})
 
             # 检查硬编码的凭证
-            params_str = json.dumps(params)
-            if any(sensitive in params_str.lower()
+            params_str = self.index.params_lower[node_id]
+            if any(sensitive in params_str
                   for sensitive in ['password', 'api_key', 'secret', 'token']):
                 security_issues.append({
                     "node": node['id'],
@@ -509,7 +1244,7 @@ class WorkflowAnalyzer:
                 })
 
             # 检查SQL注入风险
-            if 'database' in node_type.lower():
+            if 'database' in node_type:
                 query = params.get('query', '')
                 if '{{' in query and 'prepare' not in params:
                     security_issues.append({
@@ -520,7 +1255,7 @@ class WorkflowAnalyzer:
                     })
 
             # 检查不安全的HTTP
-            if 'http' in node_type.lower():
+            if 'http' in node_type:
                 url = params.get('url', '')
                 if url.startswith('http://'):
                     security_issues.append({
@@ -532,10 +1267,8 @@ class WorkflowAnalyzer:
 
         return {
             "issues": security_issues,
-            "has_authentication": any('auth' in str(n).lower()
-                                    for n in self.workflow.get('nodes', [])),
-            "uses_credentials": any('credentials' in n
-                                  for n in self.workflow.get('nodes', []))
+            "has_authentication": self.index.has_text('auth'),
+            "uses_credentials": bool(self.index.with_credentials)
         }
 
     def check_best_practices(self) -> List[Dict[str, str]]:
@@ -559,16 +1292,14 @@ class WorkflowAnalyzer:
             })
 
         # 检查错误处理
-        if not any('error' in n.get('type', '').lower()
-                  for n in self.workflow.get('nodes', [])):
+        if not self.index.has_type('error'):
             recommendations.append({
                 "issue": "No error handling",
                 "suggestion": "Add error handling for reliability"
             })
 
         # 检查日志记录
-        if not any('log' in str(n).lower()
-                  for n in self.workflow.get('nodes', [])):
+        if not self.index.has_text('log'):
             recommendations.append({
                 "issue": "No logging",
                 "suggestion": "Consider adding logging for debugging"
@@ -602,11 +1333,21 @@ Generated: {datetime.now().isoformat()}
 - **Level**: {self.analysis_results.get('complexity', {}).get('complexity_level', 'Unknown')}
 
 ## Performance Analysis
-- **Estimated Execution Time**: {self.analysis_results.get('performance', {}).get('estimated_execution_time', 'Unknown')}
+- **Estimated Execution Time**: {self.analysis_results.get('performance', {}).get('estimated_execution_time', 'Unknown')} ({self.analysis_results.get('performance', {}).get('timing_source', 'estimated')})
+- **Sequential Execution Time**: {self.analysis_results.get('performance', {}).get('sequential_execution_time', 'Unknown')}
 - **Performance Issues**: {len(self.analysis_results.get('performance', {}).get('performance_issues', []))}
 
-## Bottlenecks
+## Critical Path
+- **Path**: {' -> '.join(str(n) for n in self.analysis_results.get('critical_path', {}).get('path', []))}
+- **Projected Latency**: {self.analysis_results.get('critical_path', {}).get('latency_ms', 0)}ms ({self.analysis_results.get('critical_path', {}).get('cost_source', '')} costs)
+
+## Parallelization
 """
+        for group in self.analysis_results.get('performance', {}).get('parallelization_opportunities', []):
+            report += (f"- {', '.join(str(n) for n in group.get('nodes', []))}: saves ~{group.get('saved_ms', 0)}ms "
+                       f"({group.get('sequential_ms', 0)}ms sequential -> {group.get('concurrent_ms', 0)}ms concurrent)\n")
+
+        report += "\n## Bottlenecks\n"
         for bottleneck in self.analysis_results.get('bottlenecks', []):
             report += f"- {bottleneck.get('node_id', '')}: {bottleneck.get('reason', '')}\n"
 
@@ -614,6 +1355,19 @@ Generated: {datetime.now().isoformat()}
         for opt in self.analysis_results.get('optimizations', []):
             report += f"- **{opt.get('type', '')}**: {opt.get('suggestion', '')}\n"
 
+        data_flow = self.analysis_results.get('data_flow', {})
+        report += "\n## Data Flow\n"
+        report += f"- **Expression References**: {data_flow.get('references', 0)}\n"
+        for ref in data_flow.get('far_upstream', []):
+            report += (f"- **{ref.get('severity', '')}**: {ref.get('node', '')} reads {ref.get('payload', '')} "
+                       f"of {ref.get('source', '')} ({ref.get('distance', 0)} hops upstream)\n")
+        for ref in data_flow.get('not_upstream', []):
+            report += f"- **error**: {ref.get('node', '')} references {ref.get('references', '')}: {ref.get('reason', '')}\n"
+        for entry in data_flow.get('unused_fields', []):
+            report += f"- Unused field `{entry.get('field', '')}` set in {entry.get('node', '')}\n"
+        for entry in data_flow.get('redundant', []):
+            report += f"- `{entry.get('expression', '')}` computed in {', '.join(entry.get('nodes', []))}\n"
+
         report += "\n## Security Analysis\n"
         security = self.analysis_results.get('security', {})
         for issue in security.get('issues', []):
@@ -628,25 +1382,158 @@ Generated: {datetime.now().isoformat()}
         return report
 
 
+def default_cache_dir() -> Optional[str]:
+    """
+    命令行使用的持久缓存目录
+
+    Returns:
+        workflow.optimization.analysis_cache_dir (默认 <storage.data_path>/analysis_cache)；
+        workflow.optimization.enable_caching 关闭时为 None
+    """
+    try:
+        from tools.api_client import load_agent_config, get_config_value
+    except ModuleNotFoundError:  # 作为脚本直接运行
+        from api_client import load_agent_config, get_config_value
+
+    config = load_agent_config()
+    if not get_config_value(config, 'workflow.optimization.enable_caching', True):
+        return None
+    data_path = get_config_value(config, 'storage.data_path', './data')
+    return get_config_value(config, 'workflow.optimization.analysis_cache_dir',
+                            str(Path(data_path) / 'analysis_cache'))
+
+
+def analyze_dir_main(argv: List[str]):
+    """analyze-dir 子命令：批量分析目录、备份归档或 n8n 实例中的所有工作流"""
+    import argparse
+    try:
+        from tools.fleet_analyzer import iter_tasks, analyze_fleet, format_fleet_report
+    except ModuleNotFoundError:  # 作为脚本直接运行
+        from fleet_analyzer import iter_tasks, analyze_fleet, format_fleet_report
+
+    parser = argparse.ArgumentParser(prog='workflow_analyzer.py analyze-dir',
+                                     description='Analyze every workflow in a directory, backup archive or n8n instance')
+    parser.add_argument('source', nargs='?', help='Directory of workflow JSON files or backup archive')
+    parser.add_argument('--from-instance', action='store_true', help='Analyze all workflows on the n8n instance')
+    parser.add_argument('--output', default='fleet_analysis.jsonl', help='Per-workflow results (JSON Lines)')
+    parser.add_argument('--report', help='Write the fleet report to this file (.json for JSON, otherwise Markdown)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--top', type=int, default=10, help='Workflows listed per ranking')
+    parser.add_argument('--full', action='store_true', help='Include the full analysis in each JSON line')
+    parser.add_argument('--graph-backend', choices=GRAPH_BACKENDS, default='compact',
+                        help='Graph implementation (networkx must be installed for networkx)')
+    parser.add_argument('--cache-dir', help='Analysis result cache directory (default from config)')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-analyze, do not read or write the cache')
+    parser.add_argument('--columnar', action='store_true',
+                        help='Compute fleet-wide complexity, node type, degree and outlier metrics with pandas '
+                             'instead of running the full analysis per workflow')
+
+    args = parser.parse_args(argv)
+    if not args.source and not args.from_instance:
+        parser.error('a source directory/archive or --from-instance is required')
+
+    cache_dir = None if args.no_cache else args.cache_dir or default_cache_dir()
+    try:
+        tasks = iter_tasks(args.source, args.from_instance)
+        if args.columnar:
+            try:
+                from tools.fleet_metrics import fleet_metrics, format_metrics_report
+            except ModuleNotFoundError:  # 作为脚本直接运行
+                from fleet_metrics import fleet_metrics, format_metrics_report
+            summary = fleet_metrics(tasks, args.output, args.top)
+            format_fleet_report = format_metrics_report
+        else:
+            summary = analyze_fleet(tasks, args.output, args.workers, args.top, args.full, args.graph_backend,
+                                    cache_dir)
+    except (FileNotFoundError, RuntimeError) as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+
+    if args.report and args.report.endswith('.json'):
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+    else:
+        report = format_fleet_report(summary)
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                f.write(report)
+        else:
+            print(report)
+
+    if args.report:
+        logger.info(f"Fleet report saved to: {args.report}")
+    logger.info(f"Per-workflow results saved to: {args.output}")
+
+
 def main():
     """命令行接口"""
     import argparse
 
-    parser = argparse.ArgumentParser(description='n8n Workflow Analyzer')
+    if len(sys.argv) > 1 and sys.argv[1] == 'analyze-dir':
+        return analyze_dir_main(sys.argv[2:])
+
+    parser = argparse.ArgumentParser(description='n8n Workflow Analyzer',
+                                     epilog='Batch mode: workflow_analyzer.py analyze-dir <dir|archive|--from-instance>')
     parser.add_argument('workflow_file', help='Workflow JSON file to analyze')
     parser.add_argument('--output', help='Output file for report')
     parser.add_argument('--format', choices=['text', 'json'],
                       default='text', help='Report format')
+    parser.add_argument('--timings', help='Node timing profile JSON (from execution_profiler.py)')
+    parser.add_argument('--profile', type=int, metavar='N',
+                      help='Profile the last N executions of this workflow from n8n')
+    parser.add_argument('--workflow-id',
+                      help='Workflow ID whose executions are profiled (default: the "id" in the workflow file)')
+    parser.add_argument('--cost-stat', choices=['p50', 'p95', 'p99', 'max', 'mean'], default='p50',
+                      help='Measured statistic used as node cost for the critical path')
+    parser.add_argument('--graph-backend', choices=GRAPH_BACKENDS, default='compact',
+                      help='Graph implementation (networkx must be installed for networkx)')
+    parser.add_argument('--max-cycles', type=int, default=MAX_REPORTED_CYCLES,
+                      help='Maximum number of example cycles to report')
+    parser.add_argument('--cycle-budget', type=float, default=CYCLE_TIME_BUDGET,
+                      help='Time budget in seconds for enumerating cycles')
+    parser.add_argument('--cache-dir', help='Analysis result cache directory (default from config)')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-analyze, do not read or write the cache')
 
     args = parser.parse_args()
 
     # 创建分析器
-    analyzer = WorkflowAnalyzer()
+    cache_dir = None if args.no_cache else args.cache_dir or default_cache_dir()
+    analyzer = WorkflowAnalyzer(graph_backend=args.graph_backend, cache_dir=cache_dir)
+    analyzer.max_cycles = args.max_cycles
+    analyzer.cycle_time_budget = args.cycle_budget
 
     # 加载工作流
     if not analyzer.load_workflow(args.workflow_file):
         return
 
+    # 加载节点实测耗时
+    if args.timings:
+        with open(args.timings, 'r', encoding='utf-8') as f:
+            analyzer.set_node_timings(json.load(f))
+    elif args.profile:
+        workflow_id = args.workflow_id or analyzer.workflow.get('id')
+        if not workflow_id:
+            parser.error('--profile needs a workflow ID: the workflow file has no "id", pass --workflow-id')
+        try:
+            from tools.n8n_workflow_manager import N8nWorkflowManager
+            from tools.execution_profiler import ExecutionProfiler
+        except ModuleNotFoundError:  # 作为脚本直接运行
+            from n8n_workflow_manager import N8nWorkflowManager
+            from execution_profiler import ExecutionProfiler
+
+        manager = N8nWorkflowManager()
+        try:
+            profile = ExecutionProfiler(manager).profile(workflow_id, args.profile)
+        except RuntimeError:
+            # 执行列表不完整，不用部分样本的耗时分析
+            sys.exit(1)
+        finally:
+            manager.close()
+        analyzer.set_node_timings(profile)
+
+    if analyzer.node_timings and args.cost_stat != 'p50':
+        analyzer.cost_model = MeasuredCostModel(analyzer.node_timings, stat=args.cost_stat)
+
     # 分析工作流
     results = analyzer.analyze_workflow()
 
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+n8n Workflow Cache
+工作流定义的本地缓存 (内存LRU + 磁盘)
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import os
+import copy
+import json
+import time
+import threading
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowCache:
+    """
+    按工作流ID缓存完整定义
+
+    缓存条目在超过TTL或与列表接口返回的 updatedAt 不一致时失效；
+    内存中按LRU保留最近使用的条目，磁盘缓存跨进程复用。磁盘条目可能由其他进程
+    在更早的时候写入，没有可校验的 updatedAt (未调用过列表接口也没有传入) 时不使用。
+    """
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 128, cache_dir: str = None):
+        """
+        初始化缓存
+
+        Args:
+            ttl: 缓存有效期 (秒)
+            max_entries: 内存中最多保留的工作流数量
+            cache_dir: 磁盘缓存目录 (为空时只使用内存)
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "stale": 0}
+
+    def _disk_path(self, workflow_id: str) -> Path:
+        return self.cache_dir / f"{workflow_id}.json"
+
+    def _is_valid(self, entry: Dict[str, Any], workflow_id: str, updated_at: str = None,
+                  from_disk: bool = False) -> bool:
+        if time.time() - entry["cached_at"] > self.ttl:
+            return False
+        known = updated_at or self._versions.get(workflow_id)
+        if not known:
+            return not from_disk
+        return entry["workflow"].get('updatedAt') == known
+
+    def get(self, workflow_id: str, updated_at: str = None) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存
+
+        Args:
+            workflow_id: 工作流ID
+            updated_at: 已知的最新 updatedAt (为空时使用最近一次列表调用记录的值)
+
+        Returns:
+            工作流副本，未命中、已失效或磁盘条目无法校验版本时返回 None
+        """
+        workflow_id = str(workflow_id)
+        with self._lock:
+            entry = self._memory.get(workflow_id)
+            source = "hits"
+
+            if entry is None and self.cache_dir:
+                entry = self._read_disk(workflow_id)
+                source = "disk_hits"
+
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            if not self._is_valid(entry, workflow_id, updated_at, from_disk=source == "disk_hits"):
+                self.stats["stale"] += 1
+                self._memory.pop(workflow_id, None)
+                return None
+
+            self.stats[source] += 1
+            self._memory[workflow_id] = entry
+            self._memory.move_to_end(workflow_id)
+            self._evict()
+            return copy.deepcopy(entry["workflow"])
+
+    def put(self, workflow: Dict[str, Any]):
+        """
+        写入缓存
+
+        Args:
+            workflow: 完整工作流对象 (必须包含 id)
+        """
+        workflow_id = str(workflow.get('id', ''))
+        if not workflow_id or workflow.get('error'):
+            return
+
+        entry = {"cached_at": time.time(), "workflow": copy.deepcopy(workflow)}
+        with self._lock:
+            self._memory[workflow_id] = entry
+            self._memory.move_to_end(workflow_id)
+            if workflow.get('updatedAt'):
+                self._versions[workflow_id] = workflow['updatedAt']
+            self._evict()
+
+        if self.cache_dir:
+            self._write_disk(workflow_id, entry)
+
+    def note_version(self, workflow_id: str, updated_at: str):
+        """
+        记录列表接口返回的 updatedAt，用于后续校验
+
+        Args:
+            workflow_id: 工作流ID
+            updated_at: 更新时间
+        """
+        if updated_at:
+            with self._lock:
+                self._versions[str(workflow_id)] = updated_at
+
+    def invalidate(self, workflow_id: str):
+        """删除工作流的缓存"""
+        workflow_id = str(workflow_id)
+        with self._lock:
+            self._memory.pop(workflow_id, None)
+            self._versions.pop(workflow_id, None)
+        if self.cache_dir:
+            try:
+                self._disk_path(workflow_id).unlink()
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            ids = list(self._memory)
+            self._memory.clear()
+            self._versions.clear()
+        if self.cache_dir and self.cache_dir.exists():
+            for path in self.cache_dir.glob('*.json'):
+                path.unlink()
+        logger.info(f"Cleared workflow cache ({len(ids)} in memory)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取命中统计
+
+        Returns:
+            命中/未命中/失效次数和命中率
+        """
+        stats = dict(self.stats)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"] + stats["stale"]
+        stats["entries"] = len(self._memory)
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0
+        return stats
+
+    def _evict(self):
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        path = self._disk_path(workflow_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+    def _write_disk(self, workflow_id: str, entry: Dict[str, Any]):
+        path = self._disk_path(workflow_id)
+        tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, separators=(',', ':'), ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.debug(f"Failed to write cache entry {path}: {e}")
@@ -0,0 +1,765 @@
+#!/usr/bin/env python3
+"""
+n8n Workflow Graph
+工作流分析用的有向图
+
+    CompactGraph   内置实现：节点编号为整数，邻接关系存为 CSR 数组 (偏移 + 目标)
+    NetworkXGraph  networkx 后端 (可选依赖)
+
+两者提供相同的接口，节点键为节点ID。算法只覆盖分析器用到的部分：度数、
+无环判断、拓扑排序、最长路径、弱/强连通分量和孤立节点；find_cycles 在强连通
+分量内有限地列举环，ReachabilityIndex 用位集回答两个节点之间是否有依赖。
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import sys
+import time
+import random
+import argparse
+from array import array
+from typing import Dict, List, Any, Iterable, Iterator, Set, Tuple
+
+GRAPH_BACKENDS = ('compact', 'networkx')
+
+
+def _networkx_module():
+    """可选依赖 networkx"""
+    try:
+        import networkx
+        return networkx
+    except ImportError:
+        return None
+
+
+class CompactGraph:
+    """
+    CSR 邻接数组表示的有向图
+
+    节点按加入顺序编号，出边和入边各存为一对数组：
+    offsets[i]..offsets[i+1] 是节点 i 的邻居在 targets 中的区间。
+    重复的边只保留一条，邻居顺序与边的加入顺序一致 (与 networkx.DiGraph 相同)。
+
+    增删节点和边时不重建数组：变化节点的邻接关系记录在补丁表中 (覆盖 CSR 中的
+    区间)，删除的节点只做标记；补丁超过节点数的 1/4 时整体重建 (compact)。
+    拓扑序和连通分量计算一次后缓存，图变化时失效。
+    """
+
+    def __init__(self, nodes: Iterable[str], edges: Iterable[Tuple[str, str]]):
+        """
+        建立图
+
+        Args:
+            nodes: 节点键
+            edges: (源节点键, 目标节点键)，端点必须在 nodes 中
+        """
+        keys: List[str] = []
+        position: Dict[str, int] = {}
+        for key in nodes:
+            if key not in position:
+                position[key] = len(keys)
+                keys.append(key)
+
+        pairs = []
+        seen = set()
+        for source, target in edges:
+            pair = (position[source], position[target])
+            if pair not in seen:
+                seen.add(pair)
+                pairs.append(pair)
+
+        self._load(keys, position, pairs)
+
+    def _load(self, keys: List[str], position: Dict[str, int], pairs: List[Tuple[int, int]]):
+        self.keys = keys
+        self.position = position
+        count = len(keys)
+        self.out_offsets, self.out_targets = self._csr(count, pairs)
+        self.in_offsets, self.in_sources = self._csr(count, [(t, s) for s, t in pairs])
+        self.edge_count = len(pairs)
+        self._alive = bytearray(b'\x01') * count
+        self._dead = 0
+        self._patched: Dict[int, Tuple[List[int], List[int]]] = {}
+        self._changed()
+
+    def _changed(self):
+        self._order = None
+        self._components = None
+        self._live = None
+
+    @staticmethod
+    def _csr(count: int, pairs: List[Tuple[int, int]]) -> Tuple[array, array]:
+        offsets = array('l', [0]) * (count + 1)
+        for source, _ in pairs:
+            offsets[source + 1] += 1
+        for i in range(count):
+            offsets[i + 1] += offsets[i]
+
+        targets = array('l', [0]) * len(pairs)
+        fill = offsets[:-1]
+        for source, target in pairs:
+            targets[fill[source]] = target
+            fill[source] += 1
+        return offsets, targets
+
+    def __len__(self) -> int:
+        return len(self.keys) - self._dead
+
+    def number_of_edges(self) -> int:
+        return self.edge_count
+
+    def _live_indices(self) -> List[int]:
+        if self._live is None:
+            alive = self._alive
+            self._live = [i for i in range(len(self.keys)) if alive[i]] if self._dead else list(range(len(self.keys)))
+        return self._live
+
+    def nodes(self) -> List[str]:
+        return [self.keys[i] for i in self._live_indices()]
+
+    def _out(self, i: int):
+        patch = self._patched.get(i) if self._patched else None
+        if patch is not None:
+            return patch[0]
+        return self.out_targets[self.out_offsets[i]:self.out_offsets[i + 1]]
+
+    def _in(self, i: int):
+        patch = self._patched.get(i) if self._patched else None
+        if patch is not None:
+            return patch[1]
+        return self.in_sources[self.in_offsets[i]:self.in_offsets[i + 1]]
+
+    def successors(self, key: str) -> Iterator[str]:
+        return (self.keys[j] for j in self._out(self.position[key]))
+
+    def predecessors(self, key: str) -> Iterator[str]:
+        return (self.keys[j] for j in self._in(self.position[key]))
+
+    def out_degree(self) -> List[Tuple[str, int]]:
+        if not self._patched:
+            offsets = self.out_offsets
+            return [(key, offsets[i + 1] - offsets[i]) for i, key in enumerate(self.keys)]
+        return [(self.keys[i], len(self._out(i))) for i in self._live_indices()]
+
+    def in_degree(self) -> List[Tuple[str, int]]:
+        if not self._patched:
+            offsets = self.in_offsets
+            return [(key, offsets[i + 1] - offsets[i]) for i, key in enumerate(self.keys)]
+        return [(self.keys[i], len(self._in(i))) for i in self._live_indices()]
+
+    # ---- 增量修改 ----
+
+    def _patch(self, i: int) -> Tuple[List[int], List[int]]:
+        patch = self._patched.get(i)
+        if patch is None:
+            patch = (list(self._out(i)), list(self._in(i)))
+            self._patched[i] = patch
+        return patch
+
+    def add_node(self, key: str):
+        """加入节点 (已存在时忽略)"""
+        if key in self.position:
+            return
+        i = len(self.keys)
+        self.keys.append(key)
+        self.position[key] = i
+        self._alive.append(1)
+        self._patched[i] = ([], [])
+        self._changed()
+
+    def remove_node(self, key: str):
+        """删除节点及其所有边"""
+        i = self.position.pop(key)
+        out_edges, in_edges = (list(edges) for edges in self._patch(i))
+        self.edge_count -= len(out_edges) + len(in_edges) - (1 if i in out_edges else 0)
+        for j in out_edges:
+            self._patch(j)[1].remove(i)
+        for j in in_edges:
+            if j != i:
+                self._patch(j)[0].remove(i)
+        self._patched[i] = ([], [])
+        self._alive[i] = 0
+        self._dead += 1
+        self._changed()
+        self._maybe_compact()
+
+    def add_edge(self, source: str, target: str):
+        """加入边 (已存在时忽略)"""
+        i, j = self.position[source], self.position[target]
+        if j in self._out(i):
+            return
+        self._patch(i)[0].append(j)
+        self._patch(j)[1].append(i)
+        self.edge_count += 1
+        self._changed()
+        self._maybe_compact()
+
+    def remove_edge(self, source: str, target: str):
+        """删除边 (不存在时忽略)"""
+        i, j = self.position[source], self.position[target]
+        if j not in self._out(i):
+            return
+        self._patch(i)[0].remove(j)
+        self._patch(j)[1].remove(i)
+        self.edge_count -= 1
+        self._changed()
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if len(self._patched) > max(64, len(self) // 4):
+            self.compact()
+
+    def compact(self):
+        """把补丁合并回 CSR 数组并去掉已删除的节点 (重新编号)"""
+        live = self._live_indices()
+        renumber = {i: n for n, i in enumerate(live)}
+        keys = [self.keys[i] for i in live]
+        pairs = [(renumber[i], renumber[j]) for i in live for j in self._out(i)]
+        self._load(keys, {key: n for n, key in enumerate(keys)}, pairs)
+
+    # ---- 算法 ----
+
+    def _topological_order(self) -> List[int]:
+        """按层的 Kahn 算法 (与 networkx.topological_sort 顺序一致)；有环时结果不完整"""
+        if self._order is None:
+            self._order = self._kahn()
+        return self._order
+
+    def _kahn(self) -> List[int]:
+        live = self._live_indices()
+        remaining = array('l', [0]) * len(self.keys)
+        for i in live:
+            remaining[i] = len(self._in(i))
+        generation = [i for i in live if remaining[i] == 0]
+        order = []
+        while generation:
+            order.extend(generation)
+            next_generation = []
+            for i in generation:
+                for j in self._out(i):
+                    remaining[j] -= 1
+                    if remaining[j] == 0:
+                        next_generation.append(j)
+            generation = next_generation
+        return order
+
+    def is_directed_acyclic_graph(self) -> bool:
+        return len(self._topological_order()) == len(self)
+
+    def topological_sort(self) -> List[str]:
+        """
+        拓扑排序
+
+        Raises:
+            ValueError: 图中有环
+        """
+        order = self._topological_order()
+        if len(order) != len(self):
+            raise ValueError("Graph contains a cycle")
+        return [self.keys[i] for i in order]
+
+    def dag_longest_path(self) -> List[str]:
+        """
+        边数最多的路径 (平局时取拓扑序靠前的节点，与 networkx.dag_longest_path 一致)
+
+        Raises:
+            ValueError: 图中有环
+        """
+        order = self._topological_order()
+        if len(order) != len(self):
+            raise ValueError("Graph contains a cycle")
+        if not order:
+            return []
+
+        length = array('l', [0]) * len(self.keys)
+        parent = array('l', range(len(self.keys)))
+        for i in order:
+            for j in self._in(i):
+                if length[j] + 1 > length[i]:
+                    length[i] = length[j] + 1
+                    parent[i] = j
+
+        end = max(order, key=lambda i: length[i])
+        path = [end]
+        while parent[end] != end:
+            end = parent[end]
+            path.append(end)
+        return [self.keys[i] for i in reversed(path)]
+
+    def weakly_connected_components(self) -> List[Set[str]]:
+        if self._components is None:
+            self._components = self._find_components()
+        return [set(component) for component in self._components]
+
+    def _find_components(self) -> List[Set[str]]:
+        """并查集合并每条边的两端，根为分量内最小的编号，分量按该编号排序"""
+        parent = list(range(len(self.keys)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = i = parent[parent[i]]
+            return i
+
+        live = self._live_indices()
+        for i in live:
+            for j in self._out(i):
+                a, b = find(i), find(j)
+                if a < b:
+                    parent[b] = a
+                elif b < a:
+                    parent[a] = b
+
+        components: Dict[int, Set[str]] = {}
+        for i in live:
+            components.setdefault(find(i), set()).add(self.keys[i])
+        return list(components.values())
+
+    def number_weakly_connected_components(self) -> int:
+        if self._components is None:
+            self._components = self._find_components()
+        return len(self._components)
+
+    def isolates(self) -> List[str]:
+        return [self.keys[i] for i in self._live_indices() if not self._out(i) and not self._in(i)]
+
+    def strongly_connected_components(self) -> List[Set[str]]:
+        """强连通分量 (非递归的 Tarjan 算法，线性时间)"""
+        count = len(self.keys)
+        index = array('l', [-1]) * count
+        low = array('l', [0]) * count
+        on_stack = bytearray(count)
+        stack: List[int] = []
+        components: List[Set[str]] = []
+        counter = 0
+
+        for root in self._live_indices():
+            if index[root] >= 0:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [(root, self._out(root), 0)]
+
+            while work:
+                i, neighbors, edge = work[-1]
+                if edge < len(neighbors):
+                    work[-1] = (i, neighbors, edge + 1)
+                    j = neighbors[edge]
+                    if index[j] < 0:
+                        index[j] = low[j] = counter
+                        counter += 1
+                        stack.append(j)
+                        on_stack[j] = 1
+                        work.append((j, self._out(j), 0))
+                    elif on_stack[j] and index[j] < low[i]:
+                        low[i] = index[j]
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[i] < low[parent]:
+                        low[parent] = low[i]
+                if low[i] == index[i]:
+                    component = set()
+                    while True:
+                        j = stack.pop()
+                        on_stack[j] = 0
+                        component.add(self.keys[j])
+                        if j == i:
+                            break
+                    components.append(component)
+        return components
+
+
+class NetworkXGraph:
+    """networkx.DiGraph 后端，接口与 CompactGraph 相同；nx 属性为底层的 DiGraph"""
+
+    def __init__(self, nodes: Iterable[str], edges: Iterable[Tuple[str, str]]):
+        """
+        建立图
+
+        Args:
+            nodes: 节点键
+            edges: (源节点键, 目标节点键)
+
+        Raises:
+            RuntimeError: 未安装 networkx
+        """
+        self._nx_module = _networkx_module()
+        if not self._nx_module:
+            raise RuntimeError("networkx is required for the networkx graph backend (pip install networkx)")
+        self.nx = self._nx_module.DiGraph()
+        self.nx.add_nodes_from(nodes)
+        self.nx.add_edges_from(edges)
+
+    def __len__(self) -> int:
+        return len(self.nx)
+
+    def number_of_edges(self) -> int:
+        return self.nx.number_of_edges()
+
+    def nodes(self) -> List[str]:
+        return list(self.nx.nodes())
+
+    def successors(self, key: str) -> Iterator[str]:
+        return self.nx.successors(key)
+
+    def predecessors(self, key: str) -> Iterator[str]:
+        return self.nx.predecessors(key)
+
+    def out_degree(self) -> List[Tuple[str, int]]:
+        return list(self.nx.out_degree())
+
+    def in_degree(self) -> List[Tuple[str, int]]:
+        return list(self.nx.in_degree())
+
+    def is_directed_acyclic_graph(self) -> bool:
+        return self._nx_module.is_directed_acyclic_graph(self.nx)
+
+    def topological_sort(self) -> List[str]:
+        try:
+            return list(self._nx_module.topological_sort(self.nx))
+        except self._nx_module.NetworkXUnfeasible as e:
+            raise ValueError(str(e))
+
+    def dag_longest_path(self) -> List[str]:
+        try:
+            return self._nx_module.dag_longest_path(self.nx)
+        except self._nx_module.NetworkXUnfeasible as e:
+            raise ValueError(str(e))
+
+    def weakly_connected_components(self) -> List[Set[str]]:
+        return list(self._nx_module.weakly_connected_components(self.nx))
+
+    def number_weakly_connected_components(self) -> int:
+        return self._nx_module.number_weakly_connected_components(self.nx)
+
+    def isolates(self) -> List[str]:
+        return list(self._nx_module.isolates(self.nx))
+
+    def strongly_connected_components(self) -> List[Set[str]]:
+        return list(self._nx_module.strongly_connected_components(self.nx))
+
+    def add_node(self, key: str):
+        self.nx.add_node(key)
+
+    def remove_node(self, key: str):
+        self.nx.remove_node(key)
+
+    def add_edge(self, source: str, target: str):
+        self.nx.add_edge(source, target)
+
+    def remove_edge(self, source: str, target: str):
+        if self.nx.has_edge(source, target):
+            self.nx.remove_edge(source, target)
+
+
+def find_cycles(graph, max_cycles: int = 20, time_budget: float = 1.0) -> Dict[str, Any]:
+    """
+    有限地报告图中的环
+
+    先用强连通分量找出所有含环的部分 (线性时间，总是完整报告)，再在每个分量内
+    取代表性的环：第一轮每个分量取一个经过其首个节点的最短环，第二轮用深度优先
+    搜索列举更多简单环。环的总数不超过 max_cycles，超过 time_budget 秒即停止，
+    因此不会像列举全部简单环那样在环很多的工作流上耗费指数时间。
+
+    Args:
+        graph: CompactGraph 或 NetworkXGraph
+        max_cycles: 最多报告的环数
+        time_budget: 列举环的时间上限 (秒)
+
+    Returns:
+        components: 含环的强连通分量 (按节点顺序排列的节点键列表)
+        cycles: 代表性的环 (节点键列表，首尾相连)
+        truncated: 是否在列举完所有环之前达到数量或时间上限
+    """
+    deadline = time.monotonic() + time_budget
+    order = {key: i for i, key in enumerate(graph.nodes())}
+
+    components = []
+    for component in graph.strongly_connected_components():
+        members = sorted(component, key=order.get)
+        if len(members) > 1 or members[0] in set(graph.successors(members[0])):
+            components.append(members)
+    components.sort(key=lambda members: order[members[0]])
+
+    cycles: List[List[str]] = []
+    found = set()
+
+    def add(cycle: List[str]) -> bool:
+        """记录一个环 (按旋转归一化去重)，返回是否还能继续"""
+        start = min(range(len(cycle)), key=lambda i: order[cycle[i]])
+        normalized = tuple(cycle[start:] + cycle[:start])
+        if normalized not in found:
+            found.add(normalized)
+            cycles.append(list(normalized))
+        return len(cycles) < max_cycles
+
+    if max_cycles <= 0:
+        return {"components": components, "cycles": cycles, "truncated": bool(components)}
+
+    # 第一轮：每个分量一个最短环 (分量内从首个节点广度优先搜索回到自身)
+    for members in components:
+        start, inside = members[0], set(members)
+        parent = {start: None}
+        queue = [start]
+        closing = None
+        for key in queue:
+            for succ in graph.successors(key):
+                if succ == start:
+                    closing = key
+                    break
+                if succ in inside and succ not in parent:
+                    parent[succ] = key
+                    queue.append(succ)
+            if closing is not None:
+                break
+        cycle = []
+        while closing is not None:
+            cycle.append(closing)
+            closing = parent[closing]
+        if not add(list(reversed(cycle))):
+            return {"components": components, "cycles": cycles, "truncated": True}
+
+    # 第二轮：深度优先列举更多简单环，每个环只从其最靠前的节点出发找到一次
+    for members in components:
+        inside = set(members)
+        for start in members:
+            path = [start]
+            on_path = {start}
+            stack = [iter(list(graph.successors(start)))]
+            while stack:
+                if time.monotonic() > deadline:
+                    return {"components": components, "cycles": cycles, "truncated": True}
+                advanced = False
+                for succ in stack[-1]:
+                    if succ == start:
+                        if not add(list(path)):
+                            return {"components": components, "cycles": cycles, "truncated": True}
+                    elif succ in inside and order[succ] > order[start] and succ not in on_path:
+                        path.append(succ)
+                        on_path.add(succ)
+                        stack.append(iter(list(graph.successors(succ))))
+                        advanced = True
+                        break
+                if not advanced:
+                    stack.pop()
+                    on_path.discard(path.pop())
+
+    return {"components": components, "cycles": cycles, "truncated": False}
+
+
+class ReachabilityIndex:
+    """
+    有向无环图的可达性索引
+
+    每个节点的后代和祖先各存为一个整数位集 (每个节点占一位)，沿拓扑序反向/正向
+    各扫描一遍边即可建立，之后判断两个节点是否相互独立 (互不可达) 只需一次位运算。
+    """
+
+    def __init__(self, graph, order: List[str], numbering: List[str] = None):
+        """
+        建立索引
+
+        Args:
+            graph: CompactGraph 或 NetworkXGraph (必须无环)
+            order: 图的拓扑序 (graph.topological_sort() 的结果，可以只包含一个弱连通分量)
+            numbering: 节点对应的位 (第 i 个节点为第 i 位)，默认按拓扑序
+        """
+        self.order = list(numbering) if numbering is not None else list(order)
+        self.position = {key: i for i, key in enumerate(self.order)}
+        position = self.position
+        descendants = [0] * len(order)
+        for key in reversed(order):
+            mask = 0
+            for succ in graph.successors(key):
+                j = position[succ]
+                mask |= descendants[j] | (1 << j)
+            descendants[position[key]] = mask
+        ancestors = [0] * len(order)
+        for key in order:
+            mask = 0
+            for pred in graph.predecessors(key):
+                j = position[pred]
+                mask |= ancestors[j] | (1 << j)
+            ancestors[position[key]] = mask
+        self.descendants = descendants
+        self.ancestors = ancestors
+
+    def related(self, key: str) -> int:
+        """与节点有依赖关系的节点 (祖先、后代和自身) 的位集"""
+        i = self.position[key]
+        return self.descendants[i] | self.ancestors[i] | (1 << i)
+
+    def mask(self, keys: Iterable[str]) -> int:
+        """节点集合的位集"""
+        mask = 0
+        for key in keys:
+            mask |= 1 << self.position[key]
+        return mask
+
+    def keys(self, mask: int) -> List[str]:
+        """位集中的节点 (按位的顺序)"""
+        bits = bin(mask)[:1:-1]
+        return [self.order[i] for i, bit in enumerate(bits) if bit == '1']
+
+    def independent(self, first: str, second: str) -> bool:
+        """两个节点互不可达 (可以同时执行)"""
+        return not self.related(first) >> self.position[second] & 1
+
+
+def build_graph(nodes: Iterable[str], edges: Iterable[Tuple[str, str]], backend: str = 'compact'):
+    """
+    按后端建立有向图
+
+    Args:
+        nodes: 节点键
+        edges: (源节点键, 目标节点键)
+        backend: compact | networkx
+
+    Returns:
+        CompactGraph 或 NetworkXGraph
+    """
+    if backend == 'networkx':
+        return NetworkXGraph(nodes, edges)
+    if backend != 'compact':
+        raise ValueError(f"Unknown graph backend: {backend}")
+    return CompactGraph(nodes, edges)
+
+
+# 合成工作流使用的节点类型
+SYNTHETIC_NODE_TYPES = (
+    'n8n-nodes-base.httpRequest', 'n8n-nodes-base.set', 'n8n-nodes-base.if',
+    'n8n-nodes-base.code', 'n8n-nodes-base.postgres', 'n8n-nodes-base.merge',
+    'n8n-nodes-base.wait', 'n8n-nodes-base.splitInBatches',
+)
+
+
+def synthetic_workflow(node_count: int, fanout: int = 3, window: int = 20, seed: int = 1) -> Dict[str, Any]:
+    """
+    生成用于基准测试的合成工作流 (无环，以节点名称为键的 connections)
+
+    Args:
+        node_count: 节点数
+        fanout: 每个节点最多的入边数
+        window: 前驱从之前多少个节点中选取 (越小路径越长)
+        seed: 随机种子
+
+    Returns:
+        工作流对象
+    """
+    rng = random.Random(seed)
+    nodes = [{"id": "n0", "name": "Webhook", "type": "n8n-nodes-base.webhook", "parameters": {"path": "bench"}}]
+    for i in range(1, node_count):
+        node_type = rng.choice(SYNTHETIC_NODE_TYPES)
+        nodes.append({"id": f"n{i}", "name": f"Node {i}", "type": node_type, "parameters": {"value": i}})
+
+    connections: Dict[str, Any] = {}
+    for i in range(1, node_count):
+        for _ in range(rng.randint(1, fanout)):
+            source = nodes[rng.randint(max(0, i - window), i - 1)]['name']
+            targets = connections.setdefault(source, {"main": [[]]})["main"][0]
+            targets.append({"node": nodes[i]['name'], "type": "main", "index": 0})
+
+    return {"name": f"Synthetic {node_count}", "nodes": nodes, "connections": connections}
+
+
+def _timed(func, repeat: int, setup=None) -> float:
+    """最快一次的耗时；setup 的结果作为参数传给 func，不计入耗时"""
+    best = float('inf')
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        started = time.perf_counter()
+        func(arg) if setup else func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def benchmark(node_counts: List[int], fanout: int = 3, repeat: int = 3) -> List[Dict[str, Any]]:
+    """
+    比较各图后端在合成工作流上的耗时 (取 repeat 次中最快的一次，单位秒)
+
+    Args:
+        node_counts: 工作流规模列表
+        fanout: 每个节点最多的入边数
+        repeat: 重复次数
+
+    Returns:
+        每个 (规模, 后端) 一条结果
+    """
+    try:
+        from tools.workflow_analyzer import WorkflowAnalyzer
+        from tools.workflow_model import WorkflowModel
+    except ModuleNotFoundError:  # 作为脚本直接运行
+        from workflow_analyzer import WorkflowAnalyzer
+        from workflow_model import WorkflowModel
+
+    backends = [b for b in GRAPH_BACKENDS if b != 'networkx' or _networkx_module()]
+    results = []
+    for node_count in node_counts:
+        workflow = synthetic_workflow(node_count, fanout)
+        model = WorkflowModel(workflow)
+        edges = [(conn.source, conn.target) for conn in model.connections]
+
+        for backend in backends:
+            def fresh_graph():
+                # 每次计时使用新建的图，避免测到 CompactGraph 的缓存结果
+                return build_graph(model.by_id, edges, backend)
+
+            results.append({
+                "nodes": node_count,
+                "edges": fresh_graph().number_of_edges(),
+                "backend": backend,
+                "build": _timed(fresh_graph, repeat),
+                "degrees": _timed(lambda g: (g.in_degree(), g.out_degree()), repeat, fresh_graph),
+                "is_dag": _timed(lambda g: g.is_directed_acyclic_graph(), repeat, fresh_graph),
+                "longest_path": _timed(lambda g: g.dag_longest_path(), repeat, fresh_graph),
+                "components": _timed(lambda g: g.weakly_connected_components(), repeat, fresh_graph),
+                "isolates": _timed(lambda g: g.isolates(), repeat, fresh_graph),
+                "analyze": _timed(
+                    lambda: WorkflowAnalyzer(graph_backend=backend).analyze_workflow(workflow), repeat
+                ),
+            })
+    return results
+
+
+def main():
+    """命令行接口"""
+    parser = argparse.ArgumentParser(description='n8n Workflow Graph')
+    subparsers = parser.add_subparsers(dest='command', help='Commands')
+
+    bench_parser = subparsers.add_parser('benchmark', help='Compare graph backends on synthetic workflows')
+    bench_parser.add_argument('--nodes', type=int, nargs='+', default=[1000, 10000],
+                              help='Synthetic workflow sizes')
+    bench_parser.add_argument('--fanout', type=int, default=3, help='Maximum incoming connections per node')
+    bench_parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is reported)')
+
+    args = parser.parse_args()
+
+    if args.command == 'benchmark':
+        import logging
+        logging.disable(logging.INFO)
+
+        started = time.perf_counter()
+        available = _networkx_module() is not None
+        import_time = time.perf_counter() - started
+        if available:
+            print(f"networkx import: {import_time * 1000:.1f} ms")
+        else:
+            print("networkx not installed, benchmarking the compact backend only")
+
+        columns = ('build', 'degrees', 'is_dag', 'longest_path', 'components', 'isolates', 'analyze')
+        print(f"{'nodes':>7} {'edges':>7} {'backend':<9}" + ''.join(f"{c:>13}" for c in columns))
+        for row in benchmark(args.nodes, args.fanout, args.repeat):
+            print(f"{row['nodes']:>7} {row['edges']:>7} {row['backend']:<9}"
+                  + ''.join(f"{row[c] * 1000:>10.2f} ms" for c in columns))
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
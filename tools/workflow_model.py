@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+n8n Workflow Model
+工作流的规范化内存模型：节点 ID/名称索引和解析后的连接列表
+
+n8n 的 connections 以节点名称为键、以名称引用目标节点；旧版 NodeBuilder
+生成的工作流以节点ID为键。模型一次遍历建立索引，两种写法都解析为节点ID。
+模型和内容摘要都支持按节点/连接源增量更新 (WorkflowAnalyzer.analyze_delta)。
+
+Author: AI Terminal Team
+Version: 1.0.0
+"""
+
+import json
+import hashlib
+from typing import Dict, List, Any, NamedTuple, Optional, Set, Tuple
+
+# 不影响分析结果的服务端字段，不计入内容摘要
+VOLATILE_WORKFLOW_FIELDS = ('createdAt', 'updatedAt', 'versionId')
+
+
+def _digest(data: Any) -> bytes:
+    # repr 比 json.dumps(sort_keys=True) 快一倍以上；字段顺序不同的相同内容只会导致缓存未命中
+    return hashlib.sha256(repr(data).encode('utf-8')).digest()
+
+
+def canonical_hash(workflow: Dict[str, Any]) -> str:
+    """
+    工作流内容的规范哈希 (键排序的 JSON)，与字段顺序、格式和进程无关，可用作持久缓存的键
+
+    Args:
+        workflow: 工作流对象
+
+    Returns:
+        十六进制 SHA-256，不包含 updatedAt 等服务端字段
+    """
+    content = {key: value for key, value in workflow.items() if key not in VOLATILE_WORKFLOW_FIELDS}
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+    ).hexdigest()
+
+
+class Connection(NamedTuple):
+    """解析后的连接 (两端均为节点ID)"""
+    source: str
+    target: str
+    output_type: str
+    output_index: int
+    input_type: str
+    input_index: int
+
+
+class WorkflowModel:
+    """
+    工作流模型
+
+    Attributes:
+        nodes: 节点列表 (原对象)
+        by_id / by_name: 节点索引
+        connections: 解析后的连接
+        dangling: 无法解析的连接 [(源键, 目标键)]，目标键为 None 表示源节点不存在
+        id_keyed: 以节点ID (而非名称) 为键的连接源
+        duplicate_names: 重名的节点名称
+    """
+
+    def __init__(self, workflow: Dict[str, Any]):
+        """
+        建立索引并解析连接
+
+        Args:
+            workflow: 工作流对象
+        """
+        self.workflow = workflow
+        self.nodes: List[Dict[str, Any]] = workflow.get('nodes', []) or []
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        self.duplicate_names: List[str] = []
+
+        for node in self.nodes:
+            node_id = self.node_id(node)
+            self.by_id[node_id] = node
+            name = node.get('name')
+            if name is None:
+                continue
+            if name in self.by_name:
+                self.duplicate_names.append(name)
+            else:
+                self.by_name[name] = node
+
+        self.connections: List[Connection] = []
+        self.dangling: List[tuple] = []
+        self.id_keyed: List[str] = []
+        self._parse_connections(workflow.get('connections', {}) or {})
+
+    @staticmethod
+    def node_id(node: Dict[str, Any]) -> str:
+        """节点的ID (没有ID的旧版节点使用名称)"""
+        return str(node.get('id') or node.get('name'))
+
+    def resolve(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        按名称或ID查找节点 (名称优先，与 n8n 的连接语义一致)
+
+        Args:
+            key: 节点名称或ID
+
+        Returns:
+            节点对象，不存在时返回 None
+        """
+        return self.by_name.get(key) or self.by_id.get(key)
+
+    def resolve_id(self, key: str) -> Optional[str]:
+        """按名称或ID解析节点ID"""
+        node = self.resolve(key)
+        return self.node_id(node) if node else None
+
+    def _parse_connections(self, connections: Dict[str, Any]):
+        for source_key, outputs in connections.items():
+            self._parse_source(source_key, outputs)
+
+    def _parse_source(self, source_key: str, outputs: Dict[str, Any]):
+        source = self.resolve(source_key)
+        if source is None:
+            self.dangling.append((source_key, None))
+            return
+        if source_key not in self.by_name:
+            self.id_keyed.append(source_key)
+        source_id = self.node_id(source)
+
+        for output_type, connections_list in (outputs or {}).items():
+            for output_index, targets in enumerate(connections_list or []):
+                for conn in targets or []:
+                    target_id = self.resolve_id(conn.get('node'))
+                    if target_id is None:
+                        self.dangling.append((source_key, conn.get('node')))
+                        continue
+                    self.connections.append(Connection(
+                        source_id, target_id, output_type, output_index,
+                        conn.get('type', 'main'), conn.get('index', 0)
+                    ))
+
+    def source_key(self, node_id: str) -> str:
+        """连接中引用节点使用的键 (旧版以ID为键的工作流使用ID，否则为名称)"""
+        node = self.by_id[node_id]
+        name = node.get('name')
+        connections = self.workflow.get('connections') or {}
+        if node_id not in self.by_name and (node_id in connections or self.id_keyed):
+            return node_id
+        if name is not None and self.by_name.get(name) is node:
+            return name
+        return node_id
+
+    def _index_names(self):
+        self.by_name = {}
+        self.duplicate_names = []
+        for node in self.nodes:
+            name = node.get('name')
+            if name is None:
+                continue
+            if name in self.by_name:
+                self.duplicate_names.append(name)
+            else:
+                self.by_name[name] = node
+
+    def add_node(self, node: Dict[str, Any]):
+        """加入节点 (追加到 nodes 列表末尾)"""
+        self.nodes.append(node)
+        self.by_id[self.node_id(node)] = node
+        name = node.get('name')
+        if name is not None:
+            if name in self.by_name:
+                self.duplicate_names.append(name)
+            else:
+                self.by_name[name] = node
+
+    def replace_node(self, node_id: str, node: Dict[str, Any]):
+        """用新对象替换节点 (位置不变，名称和ID也不变)"""
+        old = self.by_id[node_id]
+        for i, existing in enumerate(self.nodes):
+            if existing is old:
+                self.nodes[i] = node
+                break
+        self.by_id[node_id] = node
+        if self.by_name.get(node.get('name')) is old:
+            self.by_name[node['name']] = node
+
+    def remove_node(self, node_id: str):
+        """删除节点 (其作为源或目标的连接应先通过 set_source 更新)"""
+        old = self.by_id.pop(node_id)
+        self.nodes[:] = [node for node in self.nodes if node is not old]
+        self._index_names()
+
+    def set_source(self, source_key: str, outputs: Optional[Dict[str, Any]]) -> Tuple[Set[tuple], Set[tuple]]:
+        """
+        重新解析一个连接源的连接
+
+        Args:
+            source_key: connections 中的键
+            outputs: 新的输出连接，None 表示删除该源的所有连接
+
+        Returns:
+            (原有的 (源ID, 目标ID) 集合, 新的集合)
+        """
+        source = self.resolve(source_key)
+        source_id = self.node_id(source) if source else None
+        old_pairs = {(c.source, c.target) for c in self.connections if c.source == source_id}
+
+        self.connections = [c for c in self.connections if c.source != source_id]
+        self.dangling = [d for d in self.dangling if d[0] != source_key]
+        self.id_keyed = [key for key in self.id_keyed if key != source_key]
+        if outputs is not None:
+            self._parse_source(source_key, outputs)
+
+        new_pairs = {(c.source, c.target) for c in self.connections if c.source == source_id}
+        return old_pairs, new_pairs
+
+    def copy(self) -> 'WorkflowModel':
+        """
+        浅拷贝模型：工作流字典、nodes 列表、connections 字典和各索引为新对象，
+        节点对象和各连接源的输出共享 (apply_delta 修改前会先复制)
+        """
+        clone = WorkflowModel.__new__(WorkflowModel)
+        clone.workflow = dict(self.workflow)
+        clone.nodes = clone.workflow['nodes'] = list(self.nodes)
+        clone.workflow['connections'] = dict(self.workflow.get('connections') or {})
+        clone.by_id = dict(self.by_id)
+        clone.by_name = dict(self.by_name)
+        clone.duplicate_names = list(self.duplicate_names)
+        clone.connections = list(self.connections)
+        clone.dangling = list(self.dangling)
+        clone.id_keyed = list(self.id_keyed)
+        return clone
+
+    def apply_delta(self, delta: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        在模型上应用工作流增量，同时修改 self.workflow (应先 copy)
+
+        按以下顺序应用：
+            remove_connections  [{source, target, type?, output_index?, input_index?}]
+            remove_nodes        [节点ID或名称]，同时删除其所有连接
+            update_nodes        [节点]，按 id (没有 id 时按名称) 匹配并整体替换
+            add_nodes           [节点]
+            add_connections     [{source, target, type='main', output_index=0, input_index=0}]
+            fields              {顶层字段: 值}，nodes/connections 整体替换
+
+        重命名节点时同时改写引用它的连接。名称解析可能变化时 (重命名、名称/ID冲突、
+        整体替换 nodes/connections) 模型重新解析，返回 rebuild=True。
+
+        Args:
+            delta: 增量
+
+        Returns:
+            added / updated / removed: 新增、修改、删除的节点ID (按应用顺序)
+            sources: 变化的连接源键
+            edges_added / edges_removed: 图中增删的 (源ID, 目标ID)
+            meta: 是否修改了其余顶层字段
+            rebuild: 是否需要重新建立图
+
+        Raises:
+            ValueError: 引用了不存在的节点
+        """
+        change = {"added": [], "updated": [], "removed": [], "sources": set(),
+                  "edges_added": set(), "edges_removed": set(), "meta": False, "rebuild": False}
+        initial: Dict[str, Set[tuple]] = {}
+        final: Dict[str, Set[tuple]] = {}
+
+        def set_outputs(source_key: str, outputs: Optional[Dict[str, Any]]):
+            connections = self.workflow['connections']
+            if outputs is None:
+                connections.pop(source_key, None)
+            else:
+                connections[source_key] = outputs
+            source = self.resolve(source_key)
+            if source is not None:
+                # 同一节点同时以名称和ID为键时 set_source 无法区分两者
+                other_keys = {source.get('name'), self.node_id(source)} - {source_key, None}
+                if any(key in connections for key in other_keys):
+                    change["rebuild"] = True
+            old_pairs, new_pairs = self.set_source(source_key, outputs)
+            if source is not None:
+                initial.setdefault(self.node_id(source), old_pairs)
+                final[self.node_id(source)] = new_pairs
+            change["sources"].add(source_key)
+
+        def outputs_of(source_key: str) -> Dict[str, Any]:
+            outputs = self.workflow['connections'].get(source_key) or {}
+            return {output_type: [list(targets or []) for targets in (lists or [])]
+                    for output_type, lists in outputs.items()}
+
+        def require(key: str) -> Dict[str, Any]:
+            node = self.resolve(key)
+            if node is None:
+                raise ValueError(f"Unknown node: {key}")
+            return node
+
+        def rebuild_if_needed():
+            if change["rebuild"]:
+                self.__init__(self.workflow)
+
+        for spec in delta.get('remove_connections', []):
+            source_id = self.node_id(require(spec['source']))
+            target_id = self.node_id(require(spec['target']))
+            source_key = self.source_key(source_id)
+            if source_key not in self.workflow['connections']:
+                continue
+            outputs = outputs_of(source_key)
+            for output_type, lists in outputs.items():
+                if spec.get('type', output_type) != output_type:
+                    continue
+                for output_index, targets in enumerate(lists):
+                    if spec.get('output_index', output_index) != output_index:
+                        continue
+                    lists[output_index] = [
+                        conn for conn in targets
+                        if self.resolve_id(conn.get('node')) != target_id
+                        or spec.get('input_index', conn.get('index', 0)) != conn.get('index', 0)
+                    ]
+            set_outputs(source_key, outputs)
+            rebuild_if_needed()
+
+        for key in delta.get('remove_nodes', []):
+            node = require(key)
+            node_id, name = self.node_id(node), node.get('name')
+            if (name in self.duplicate_names or (name is not None and name != node_id and name in self.by_id)
+                    or self.by_name.get(node_id, node) is not node):
+                change["rebuild"] = True
+            for source_key in {name, node_id} - {None}:
+                if source_key in self.workflow['connections'] and self.resolve(source_key) is node:
+                    set_outputs(source_key, None)
+            for pred in {conn.source for conn in self.connections if conn.target == node_id}:
+                source_key = self.source_key(pred)
+                outputs = outputs_of(source_key)
+                for lists in outputs.values():
+                    for output_index, targets in enumerate(lists):
+                        lists[output_index] = [conn for conn in targets
+                                               if self.resolve_id(conn.get('node')) != node_id]
+                set_outputs(source_key, outputs)
+            self.remove_node(node_id)
+            change["removed"].append(node_id)
+            rebuild_if_needed()
+
+        for node in delta.get('update_nodes', []):
+            if node.get('id'):
+                old = self.by_id.get(str(node['id']))
+                if old is None:
+                    raise ValueError(f"Unknown node: {node['id']}")
+            else:
+                old = require(node.get('name'))
+            node_id = self.node_id(old)
+            if self.node_id(node) != node_id:
+                change["rebuild"] = True
+            elif node.get('name') != old.get('name'):
+                self._rename(old.get('name'), node.get('name'))
+                change["rebuild"] = True
+            self.replace_node(node_id, node)
+            change["updated"].append(node_id)
+            rebuild_if_needed()
+
+        for node in delta.get('add_nodes', []):
+            node_id, name = self.node_id(node), node.get('name')
+            keys = {node_id, name} - {None}
+            if any(key in self.by_id or key in self.by_name for key in keys) or node_id in change["removed"]:
+                change["rebuild"] = True
+            self.add_node(node)
+            change["added"].append(node_id)
+            # 之前无法解析的连接可能引用了新节点
+            for source_key in {source for source, target in self.dangling if source in keys or target in keys}:
+                set_outputs(source_key, self.workflow['connections'].get(source_key))
+            rebuild_if_needed()
+
+        for spec in delta.get('add_connections', []):
+            source_id = self.node_id(require(spec['source']))
+            target_id = self.node_id(require(spec['target']))
+            source_key = self.source_key(source_id)
+            outputs = outputs_of(source_key)
+            lists = outputs.setdefault(spec.get('type', 'main'), [])
+            output_index = spec.get('output_index', 0)
+            while len(lists) <= output_index:
+                lists.append([])
+            lists[output_index].append({"node": self.source_key(target_id), "type": spec.get('type', 'main'),
+                                        "index": spec.get('input_index', 0)})
+            set_outputs(source_key, outputs)
+            rebuild_if_needed()
+
+        for key, value in delta.get('fields', {}).items():
+            if key in ('nodes', 'connections'):
+                self.workflow[key] = list(value) if key == 'nodes' else dict(value)
+                change["rebuild"] = True
+            else:
+                self.workflow[key] = value
+                change["meta"] = True
+        rebuild_if_needed()
+
+        for source_id, new_pairs in final.items():
+            change["edges_added"] |= new_pairs - initial[source_id]
+            change["edges_removed"] |= initial[source_id] - new_pairs
+        return change
+
+    def _rename(self, old_name: str, new_name: str):
+        """节点改名时改写 connections 中的源键和目标引用 (与 n8n 编辑器的行为一致)"""
+        connections = {}
+        for source_key, outputs in self.workflow['connections'].items():
+            if source_key == old_name:
+                source_key = new_name
+            connections[source_key] = {
+                output_type: [[dict(conn, node=new_name) if conn.get('node') == old_name else conn
+                               for conn in targets or []] for targets in lists or []]
+                for output_type, lists in (outputs or {}).items()
+            }
+        self.workflow['connections'] = connections
+
+
+class WorkflowDigest:
+    """
+    工作流内容摘要
+
+    每个节点、每个连接源和其余顶层字段分别哈希，再合并为整体摘要；
+    工作流局部变化时只需重新哈希变化的部分。不包含 updatedAt 等服务端字段。
+    """
+
+    def __init__(self, workflow: Dict[str, Any]):
+        """
+        Args:
+            workflow: 工作流对象
+        """
+        self.set_meta(workflow)
+        self.nodes: Dict[str, bytes] = {}
+        for node in workflow.get('nodes', []) or []:
+            self.nodes[WorkflowModel.node_id(node)] = _digest(node)
+        self.connections: Dict[str, bytes] = {
+            key: _digest(outputs) for key, outputs in (workflow.get('connections') or {}).items()
+        }
+
+    def copy(self) -> 'WorkflowDigest':
+        clone = WorkflowDigest.__new__(WorkflowDigest)
+        clone.meta = self.meta
+        clone.nodes = dict(self.nodes)
+        clone.connections = dict(self.connections)
+        return clone
+
+    def set_meta(self, workflow: Dict[str, Any]):
+        """更新节点和连接以外的顶层字段的摘要"""
+        self.meta = _digest({key: value for key, value in workflow.items()
+                             if key not in ('nodes', 'connections') and key not in VOLATILE_WORKFLOW_FIELDS})
+
+    def set_node(self, node_id: str, node: Optional[Dict[str, Any]]):
+        """更新节点摘要 (新节点追加在末尾)，node 为 None 时删除"""
+        if node is None:
+            self.nodes.pop(node_id, None)
+        else:
+            self.nodes[node_id] = _digest(node)
+
+    def set_connections(self, source_key: str, outputs: Optional[Dict[str, Any]]):
+        """更新连接源的摘要，outputs 为 None 时删除"""
+        if outputs is None:
+            self.connections.pop(source_key, None)
+        else:
+            self.connections[source_key] = _digest(outputs)
+
+    def hexdigest(self) -> str:
+        """整体摘要 (节点按列表顺序，连接按源的键排序)"""
+        h = hashlib.sha256(self.meta)
+        for node_id, digest in self.nodes.items():
+            h.update(node_id.encode('utf-8'))
+            h.update(digest)
+        h.update(b'\x00')
+        for key in sorted(self.connections):
+            h.update(key.encode('utf-8'))
+            h.update(self.connections[key])
+        return h.hexdigest()